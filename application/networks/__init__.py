@@ -1,3 +1,5 @@
+from .backends import ModelBackend
 from .embeddings import CrossEncoderModelSingleton, EmbeddingModelSingleton
+from .engine import EmbeddingEngine
 
-__all__ = ["EmbeddingModelSingleton", "CrossEncoderModelSingleton"]
+__all__ = ["EmbeddingModelSingleton", "CrossEncoderModelSingleton", "EmbeddingEngine", "ModelBackend"]
@@ -0,0 +1,222 @@
+"""
+Inference backends for the CPU models of the RAG path.
+
+- `torch`: the model as loaded, in fp32.
+- `torch-int8`: the `nn.Linear` layers quantized to int8 with PyTorch dynamic quantization. CPU only.
+- `onnx`: the transformer exported to ONNX once, cached on disk, and run with ONNX Runtime. CPU only. Requires the
+  `onnx` extra (`onnx` and `onnxruntime`). An ONNX Runtime session can't be pickled, so this backend can't be
+  sent to a `start_multi_process_pool` of workers.
+
+The backends replace the transformer inside the sentence-transformers wrappers, so tokenization, pooling and
+batching stay the same for all of them.
+"""
+
+import hashlib
+import json
+import os
+from enum import StrEnum
+from pathlib import Path
+
+import torch
+from loguru import logger
+from sentence_transformers.cross_encoder import CrossEncoder
+from sentence_transformers.SentenceTransformer import SentenceTransformer
+from transformers.modeling_outputs import SequenceClassifierOutput
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ONNX_OPSET_VERSION = 17
+# The precision of the exported graph. With the opset and the other export settings, it keys the cached exports.
+ONNX_EXPORT_PRECISION = "fp32"
+
+
+class ModelBackend(StrEnum):
+    TORCH = "torch"
+    TORCH_INT8 = "torch-int8"
+    ONNX = "onnx"
+
+
+def configure_sentence_transformer(
+    model: SentenceTransformer, backend: ModelBackend | str, model_id: str, device: str | None = None
+) -> None:
+    """Switches the transformer of `model` to `backend`, in place."""
+
+    backend = ModelBackend(backend)
+    if backend == ModelBackend.TORCH:
+        return
+
+    _check_cpu(backend, device)
+    transformer = model[0]
+    if backend == ModelBackend.TORCH_INT8:
+        transformer.auto_model = _quantize_dynamic(transformer.auto_model)
+    else:
+        sample = transformer.tokenizer(["An example sentence."], return_tensors="pt")
+        session = _load_onnx_session(
+            transformer.auto_model, model_id=model_id, kind="embedding", sample=sample, output_name="last_hidden_state"
+        )
+        transformer.auto_model = _OnnxEncoder(session, config=transformer.auto_model.config)
+
+    logger.info(f"Embedding model {model_id} runs on the '{backend}' backend.")
+
+
+def configure_cross_encoder(
+    model: CrossEncoder, backend: ModelBackend | str, model_id: str, device: str | None = None
+) -> None:
+    """Switches the transformer of `model` to `backend`, in place."""
+
+    backend = ModelBackend(backend)
+    if backend == ModelBackend.TORCH:
+        return
+
+    _check_cpu(backend, device)
+    if backend == ModelBackend.TORCH_INT8:
+        model.model = _quantize_dynamic(model.model)
+    else:
+        sample = model.tokenizer([["A query.", "A document."]], return_tensors="pt")
+        session = _load_onnx_session(
+            model.model, model_id=model_id, kind="cross-encoder", sample=sample, output_name="logits"
+        )
+        model.model = _OnnxSequenceClassifier(session, config=model.model.config)
+
+    logger.info(f"Cross-encoder {model_id} runs on the '{backend}' backend.")
+
+
+class _OnnxModule(torch.nn.Module):
+    """Runs an ONNX Runtime session where sentence-transformers expects a Hugging Face model."""
+
+    def __init__(self, session, config) -> None:
+        super().__init__()
+
+        self.config = config
+        self._session = session
+        self._input_names = [session_input.name for session_input in session.get_inputs()]
+        self._output_name = session.get_outputs()[0].name
+        # sentence-transformers infers the model's device from its first parameter.
+        self._device_marker = torch.nn.Parameter(torch.zeros(0), requires_grad=False)
+
+    def _run(self, **features: torch.Tensor) -> torch.Tensor:
+        inputs = {name: features[name].cpu().numpy() for name in self._input_names if name in features}
+        (output,) = self._session.run([self._output_name], inputs)
+
+        return torch.from_numpy(output)
+
+
+class _OnnxEncoder(_OnnxModule):
+    def forward(self, return_dict: bool = False, **features: torch.Tensor) -> tuple[torch.Tensor]:
+        return (self._run(**features),)
+
+
+class _OnnxSequenceClassifier(_OnnxModule):
+    def forward(self, return_dict: bool = True, **features: torch.Tensor) -> SequenceClassifierOutput:
+        return SequenceClassifierOutput(logits=self._run(**features))
+
+
+def supports_multi_process(model: SentenceTransformer) -> bool:
+    """Whether `model` can be pickled to the workers of `start_multi_process_pool`."""
+
+    return not any(isinstance(module, _OnnxModule) for module in model.modules())
+
+
+def _check_cpu(backend: ModelBackend, device: str | None) -> None:
+    if device not in (None, "cpu"):
+        raise ValueError(f"The '{backend}' backend runs on CPU only, but the device is '{device}'.")
+
+
+def _quantize_dynamic(module: torch.nn.Module) -> torch.nn.Module:
+    return torch.ao.quantization.quantize_dynamic(module.cpu(), {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_onnx_session(module: torch.nn.Module, model_id: str, kind: str, sample: dict, output_name: str):
+    try:
+        import onnxruntime
+    except ImportError:
+        raise ImportError("The 'onnx' backend requires onnxruntime: install the 'onnx' extra.") from None
+
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes[output_name] = {0: "batch", 1: "sequence"} if output_name == "last_hidden_state" else {0: "batch"}
+
+    export_settings = {
+        "opset_version": ONNX_OPSET_VERSION,
+        "precision": ONNX_EXPORT_PRECISION,
+        "input_names": input_names,
+        "output_name": output_name,
+        "dynamic_axes": dynamic_axes,
+        "torch_version": torch.__version__,
+        "model_config": module.config.to_dict(),
+    }
+    path = (
+        _get_onnx_cache_dir()
+        / kind
+        / model_id.replace("/", "--")
+        / f"opset{ONNX_OPSET_VERSION}-{ONNX_EXPORT_PRECISION}-{_hash_settings(export_settings)}"
+        / "model.onnx"
+    )
+    if not path.exists():
+        _export_onnx(
+            module,
+            path,
+            sample=sample,
+            input_names=input_names,
+            output_name=output_name,
+            dynamic_axes=dynamic_axes,
+        )
+
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = int(os.getenv("ONNX_NUM_THREADS", "0"))
+
+    return onnxruntime.InferenceSession(str(path), sess_options=options, providers=["CPUExecutionProvider"])
+
+
+def _export_onnx(
+    module: torch.nn.Module,
+    path: Path,
+    sample: dict,
+    input_names: list[str],
+    output_name: str,
+    dynamic_axes: dict[str, dict],
+) -> None:
+    logger.info(f"Exporting the model to ONNX at {path}")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Export to a temporary file first, so an interrupted export never leaves a broken graph in the cache.
+    tmp_path = path.with_suffix(".onnx.tmp")
+    with torch.no_grad():
+        torch.onnx.export(
+            _ExportWrapper(module.cpu().eval(), input_names=input_names, output_name=output_name),
+            tuple(sample[name] for name in input_names),
+            str(tmp_path),
+            input_names=input_names,
+            output_names=[output_name],
+            dynamic_axes=dynamic_axes,
+            opset_version=ONNX_OPSET_VERSION,
+        )
+    tmp_path.replace(path)
+
+
+class _ExportWrapper(torch.nn.Module):
+    """Takes the inputs positionally and returns the one output the backend uses."""
+
+    def __init__(self, module: torch.nn.Module, input_names: list[str], output_name: str) -> None:
+        super().__init__()
+
+        self.module = module
+        self.input_names = input_names
+        self.output_name = output_name
+
+    def forward(self, *inputs: torch.Tensor) -> torch.Tensor:
+        outputs = self.module(**dict(zip(self.input_names, inputs)), return_dict=True)
+
+        return outputs[self.output_name]
+
+
+def _hash_settings(settings: dict) -> str:
+    return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _get_onnx_cache_dir() -> Path:
+    cache_dir = os.getenv("ONNX_CACHE_DIR")
+
+    return Path(cache_dir) if cache_dir else Path.home() / ".cache" / "mirrormuse" / "onnx"
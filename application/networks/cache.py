@@ -0,0 +1,156 @@
+import hashlib
+import os
+import sqlite3
+import time
+from pathlib import Path
+from threading import Lock
+
+import numpy as np
+from loguru import logger
+from numpy.typing import NDArray
+
+from dotenv import load_dotenv
+
+from application.utils.cache import LRUCache
+
+load_dotenv()
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different spellings of the same query share an entry."""
+
+    return " ".join(text.split())
+
+
+class DiskEmbeddingStore:
+    """
+    A SQLite-backed embedding store that can be shared between processes on the same host.
+
+    Entries are keyed by model id, inference backend and text hash, so switching the backend never serves the
+    vectors of another one. A store created before the backend was part of the key is dropped and rebuilt.
+    """
+
+    def __init__(self, path: Path, ttl: float | None = None) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._ttl = ttl
+        self._lock = Lock()
+        self._connection = sqlite3.connect(str(path), check_same_thread=False, timeout=5.0)
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            columns = [row[1] for row in self._connection.execute("PRAGMA table_info(embeddings)").fetchall()]
+            if columns and "backend" not in columns:
+                logger.info(f"Dropping the embedding cache at {path}: its entries aren't keyed by backend.")
+
+                self._connection.execute("DROP TABLE embeddings")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model_id TEXT NOT NULL,
+                    backend TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (model_id, backend, text_hash)
+                )
+                """
+            )
+            self._connection.commit()
+
+    def get_many(self, model_id: str, backend: str, texts: list[str]) -> dict[str, NDArray[np.float32]]:
+        hashes = {self._hash(text): text for text in texts}
+        min_created_at = time.time() - self._ttl if self._ttl else 0.0
+
+        placeholders = ",".join("?" * len(hashes))
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT text_hash, embedding FROM embeddings "
+                f"WHERE model_id = ? AND backend = ? AND created_at >= ? AND text_hash IN ({placeholders})",
+                [model_id, backend, min_created_at, *hashes.keys()],
+            ).fetchall()
+
+        return {hashes[text_hash]: np.frombuffer(blob, dtype=np.float32) for text_hash, blob in rows}
+
+    def put_many(
+        self, model_id: str, backend: str, texts: list[str], embeddings: list[NDArray[np.float32]]
+    ) -> None:
+        now = time.time()
+        rows = [
+            (model_id, backend, self._hash(text), embedding.astype(np.float32).tobytes(), now)
+            for text, embedding in zip(texts, embeddings, strict=True)
+        ]
+        with self._lock:
+            self._connection.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)", rows)
+            self._connection.commit()
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha256(text.encode()).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    A bounded cache of embeddings keyed by `(model_id, backend, normalized_text)`.
+
+    The in-process tier is an LRU evicted by memory size. An optional disk tier is shared by every process
+    pointing at the same file; disk hits are promoted into memory.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float | None = None, disk_path: Path | None = None) -> None:
+        self._memory: LRUCache[tuple[str, str, str], NDArray[np.float32]] = LRUCache(
+            max_size=max_bytes, ttl=ttl, sizeof=lambda embedding: embedding.nbytes
+        )
+        self._disk = DiskEmbeddingStore(disk_path, ttl=ttl) if disk_path else None
+
+        self.disk_hits = 0
+
+    @classmethod
+    def from_env(cls) -> "EmbeddingCache | None":
+        max_bytes = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        if max_bytes <= 0:
+            return None
+
+        ttl = float(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", "86400")) or None
+        disk_path = os.getenv("EMBEDDING_CACHE_PATH")
+
+        return cls(max_bytes=max_bytes, ttl=ttl, disk_path=Path(disk_path) if disk_path else None)
+
+    def get_many(self, model_id: str, backend: str, texts: list[str]) -> list[NDArray[np.float32] | None]:
+        keys = [normalize_text(text) for text in texts]
+        embeddings = [self._memory.get((model_id, backend, key)) for key in keys]
+
+        missing_keys = [key for key, embedding in zip(keys, embeddings, strict=True) if embedding is None]
+        if self._disk is not None and missing_keys:
+            try:
+                disk_embeddings = self._disk.get_many(model_id, backend, missing_keys)
+            except sqlite3.Error:
+                logger.exception("Failed to read embeddings from the disk cache.")
+
+                disk_embeddings = {}
+
+            for i, key in enumerate(keys):
+                if embeddings[i] is None and key in disk_embeddings:
+                    embeddings[i] = disk_embeddings[key]
+                    self._memory.put((model_id, backend, key), disk_embeddings[key])
+                    self.disk_hits += 1
+
+        return embeddings
+
+    def put_many(
+        self, model_id: str, backend: str, texts: list[str], embeddings: list[NDArray[np.float32]]
+    ) -> None:
+        keys = [normalize_text(text) for text in texts]
+        # Copy the rows so the cache doesn't keep the whole encoded batch alive.
+        embeddings = [np.array(embedding, dtype=np.float32, copy=True) for embedding in embeddings]
+
+        for key, embedding in zip(keys, embeddings, strict=True):
+            self._memory.put((model_id, backend, key), embedding)
+
+        if self._disk is not None:
+            try:
+                self._disk.put_many(model_id, backend, keys, embeddings)
+            except sqlite3.Error:
+                logger.exception("Failed to write embeddings to the disk cache.")
+
+    def stats(self) -> dict:
+        return {**self._memory.stats(), "disk_hits": self.disk_hits}
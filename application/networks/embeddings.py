@@ -16,7 +16,12 @@ import os
 from dotenv import load_dotenv
 load_dotenv()
 
+from application.utils import metrics
+
+from .backends import ModelBackend, configure_cross_encoder, configure_sentence_transformer
 from .base import SingletonMeta
+from .cache import EmbeddingCache
+from .engine import EmbeddingEngine
 
 
 class EmbeddingModelSingleton(metaclass=SingletonMeta):
@@ -29,9 +34,14 @@ class EmbeddingModelSingleton(metaclass=SingletonMeta):
         model_id: str = os.getenv("TEXT_EMBEDDING_MODEL_ID"),
         device: str = os.getenv("RAG_MODEL_DEVICE"),
         cache_dir: Optional[Path] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        engine: Optional[EmbeddingEngine] = None,
+        backend: str = os.getenv("TEXT_EMBEDDING_BACKEND", ModelBackend.TORCH),
     ) -> None:
         self._model_id = model_id
         self._device = device
+        self._backend = ModelBackend(backend)
+        self._embedding_cache = embedding_cache if embedding_cache is not None else EmbeddingCache.from_env()
 
         self._model = SentenceTransformer(
             self._model_id,
@@ -39,6 +49,9 @@ class EmbeddingModelSingleton(metaclass=SingletonMeta):
             cache_folder=str(cache_dir) if cache_dir else None,
         )
         self._model.eval()
+        configure_sentence_transformer(self._model, self._backend, model_id=self._model_id, device=self._device)
+
+        self._engine = engine if engine is not None else EmbeddingEngine.from_env(self._model)
 
     @property
     def model_id(self) -> str:
@@ -51,6 +64,17 @@ class EmbeddingModelSingleton(metaclass=SingletonMeta):
 
         return self._model_id
 
+    @property
+    def backend(self) -> ModelBackend:
+        """
+        Returns the inference backend of the model: fp32 PyTorch, int8 PyTorch or ONNX Runtime.
+
+        Returns:
+            ModelBackend: The inference backend of the model.
+        """
+
+        return self._backend
+
     @cached_property
     def embedding_size(self) -> int:
         """
@@ -86,54 +110,126 @@ class EmbeddingModelSingleton(metaclass=SingletonMeta):
 
         return self._model.tokenizer
 
+    @property
+    def cache_stats(self) -> dict:
+        """
+        Returns the hit/miss counters of the embedding cache.
+
+        Returns:
+            dict: The embedding cache statistics, empty if the cache is disabled.
+        """
+
+        return self._embedding_cache.stats() if self._embedding_cache else {}
+
+    @metrics.track_stage("embedding")
     def __call__(
         self, input_text: str | list[str], to_list: bool = True
     ) -> NDArray[np.float32] | list[float] | list[list[float]]:
         """
         Generates embeddings for the input text using the pre-trained transformer model.
 
+        Cached embeddings are reused and only the cache misses of a batch are encoded, by the embedding engine:
+        length-sorted, in batches sized by a token budget and optionally over a process pool.
+
         Args:
             input_text (str): The input text to generate embeddings for.
-            to_list (bool): Whether to return the embeddings as a list or numpy array. Defaults to True.
+            to_list (bool): Whether to return the embeddings as a list or a float32 numpy array. Defaults to True.
 
         Returns:
             Union[np.ndarray, list]: The embeddings generated for the input text.
         """
 
+        texts = [input_text] if isinstance(input_text, str) else input_text
         try:
-            embeddings = self._model.encode(input_text)
+            if self._embedding_cache is None:
+                embeddings = self._engine.encode(texts)
+            else:
+                embeddings = self._encode_with_cache(texts)
         except Exception:
             logger.error(f"Error generating embeddings for {self._model_id=} and {input_text=}")
 
-            return [] if to_list else np.array([])
+            return [] if to_list else np.array([], dtype=np.float32)
+
+        if isinstance(input_text, str):
+            embeddings = embeddings[0]
 
         if to_list:
             embeddings = embeddings.tolist()
 
         return embeddings
 
+    def close(self) -> None:
+        """Stops the embedding engine's process pool, if it was started."""
+
+        self._engine.close()
+
+    def _encode_with_cache(self, input_text: list[str]) -> NDArray[np.float32]:
+        if len(input_text) == 0:
+            return self._engine.encode(input_text)
+
+        embeddings = self._embedding_cache.get_many(self._model_id, self._backend.value, input_text)
+
+        missing_indices = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing_indices:
+            missing_text = [input_text[i] for i in missing_indices]
+            missing_embeddings = self._engine.encode(missing_text)
+            self._embedding_cache.put_many(self._model_id, self._backend.value, missing_text, list(missing_embeddings))
+
+            for i, embedding in zip(missing_indices, missing_embeddings, strict=True):
+                embeddings[i] = embedding
+
+        return np.stack(embeddings).astype(np.float32, copy=False)
+
 
 class CrossEncoderModelSingleton(metaclass=SingletonMeta):
     def __init__(
         self,
         model_id: str = os.getenv("RERANKING_CROSS_ENCODER_MODEL_ID"),
         device: str =  os.getenv("RAG_MODEL_DEVICE"),
+        max_length: Optional[int] = int(os.getenv("RERANKING_CROSS_ENCODER_MAX_LENGTH", "512")),
+        batch_size: int = int(os.getenv("RERANKING_BATCH_SIZE", "32")),
+        backend: str = os.getenv("RERANKING_CROSS_ENCODER_BACKEND", ModelBackend.TORCH),
     ) -> None:
         """
         A singleton class that provides a pre-trained cross-encoder model for scoring pairs of input text.
+
+        Each (query, document) pair is truncated to `max_length` tokens, so long chunks don't blow up the
+        attention cost. `backend` selects fp32 PyTorch, int8 PyTorch or ONNX Runtime for the transformer.
         """
 
         self._model_id = model_id
         self._device = device
+        self._batch_size = batch_size
+        self._backend = ModelBackend(backend)
 
         self._model = CrossEncoder(
             model_name=self._model_id,
             device=self._device,
+            max_length=max_length,
         )
         self._model.model.eval()
+        configure_cross_encoder(self._model, self._backend, model_id=self._model_id, device=self._device)
+
+    @property
+    def model_id(self) -> str:
+        return self._model_id
+
+    @property
+    def backend(self) -> ModelBackend:
+        return self._backend
+
+    @property
+    def max_length(self) -> int:
+        return self._model.max_length
+
+    @metrics.track_stage("cross_encoder")
+    def __call__(
+        self, pairs: list[tuple[str, str]], to_list: bool = True, batch_size: Optional[int] = None
+    ) -> NDArray[np.float32] | list[float]:
+        if len(pairs) == 0:
+            return [] if to_list else np.array([], dtype=np.float32)
 
-    def __call__(self, pairs: list[tuple[str, str]], to_list: bool = True) -> NDArray[np.float32] | list[float]:
-        scores = self._model.predict(pairs)
+        scores = self._model.predict(pairs, batch_size=batch_size or self._batch_size, show_progress_bar=False)
 
         if to_list:
             scores = scores.tolist()
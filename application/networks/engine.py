@@ -0,0 +1,141 @@
+import atexit
+import os
+from threading import Lock
+
+import numpy as np
+from loguru import logger
+from numpy.typing import NDArray
+from sentence_transformers.SentenceTransformer import SentenceTransformer
+
+from .backends import supports_multi_process
+
+
+class EmbeddingEngine:
+    """
+    Runs `SentenceTransformer.encode` in length-sorted batches sized by a token budget.
+
+    Inputs are sorted by token length and cut into batches of at most `max_batch_size` texts and `max_batch_tokens`
+    padded tokens (the batch size times its longest text), so short texts share large batches and long ones don't
+    exhaust memory. With `pool_processes`, jobs of at least `pool_min_inputs` texts are sharded over a
+    `start_multi_process_pool` of CPU workers instead, started on first use. The pool pickles the model to its
+    workers, so it can't be used with the ONNX backend. The embeddings come back in the input order, as one float32
+    matrix.
+    """
+
+    def __init__(
+        self,
+        model: SentenceTransformer,
+        max_batch_tokens: int = 16384,
+        max_batch_size: int = 128,
+        pool_processes: int = 0,
+        pool_min_inputs: int = 512,
+    ) -> None:
+        if pool_processes > 1 and not supports_multi_process(model):
+            raise ValueError(
+                "The embedding pool can't run a model on the ONNX backend: its ONNX Runtime session can't be "
+                "pickled to the worker processes. Set EMBEDDING_POOL_PROCESSES to 0 or change TEXT_EMBEDDING_BACKEND."
+            )
+
+        self._model = model
+        self._max_batch_tokens = max_batch_tokens
+        self._max_batch_size = max_batch_size
+        self._pool_processes = pool_processes
+        self._pool_min_inputs = pool_min_inputs
+
+        self._pool: dict | None = None
+        self._pool_lock = Lock()
+
+    @classmethod
+    def from_env(cls, model: SentenceTransformer) -> "EmbeddingEngine":
+        return cls(
+            model=model,
+            max_batch_tokens=int(os.getenv("EMBEDDING_MAX_BATCH_TOKENS", "16384")),
+            max_batch_size=int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "128")),
+            pool_processes=int(os.getenv("EMBEDDING_POOL_PROCESSES", "0")),
+            pool_min_inputs=int(os.getenv("EMBEDDING_POOL_MIN_INPUTS", "512")),
+        )
+
+    def encode(self, texts: list[str]) -> NDArray[np.float32]:
+        """
+        Embeds the texts.
+
+        Args:
+            texts (list[str]): The texts to embed.
+
+        Returns:
+            NDArray[np.float32]: One embedding per row, in the order of `texts`.
+        """
+
+        if len(texts) == 0:
+            return np.empty((0, self._model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        lengths = self._get_token_lengths(texts)
+        order = np.argsort(lengths, kind="stable")
+        sorted_texts = [texts[i] for i in order]
+        sorted_lengths = lengths[order]
+
+        if self._pool_processes > 1 and len(texts) >= self._pool_min_inputs:
+            # The pool takes a single batch size: size it for the longest text so no batch exceeds the budget.
+            batch_size = self._get_batch_size(int(sorted_lengths[-1]))
+            sorted_embeddings = self._model.encode_multi_process(
+                sorted_texts, self._get_pool(), batch_size=batch_size
+            ).astype(np.float32, copy=False)
+        else:
+            sorted_embeddings = np.concatenate(
+                [
+                    self._encode_batch(sorted_texts[start:end])
+                    for start, end in self._plan_batches(sorted_lengths)
+                ]
+            )
+
+        embeddings = np.empty_like(sorted_embeddings)
+        embeddings[order] = sorted_embeddings
+
+        return embeddings
+
+    def close(self) -> None:
+        """Stops the process pool, if it was started."""
+
+        with self._pool_lock:
+            if self._pool is not None:
+                SentenceTransformer.stop_multi_process_pool(self._pool)
+                self._pool = None
+
+    def _encode_batch(self, texts: list[str]) -> NDArray[np.float32]:
+        embeddings = self._model.encode(
+            texts, batch_size=len(texts), convert_to_numpy=True, show_progress_bar=False
+        )
+
+        return embeddings.astype(np.float32, copy=False)
+
+    def _get_token_lengths(self, texts: list[str]) -> NDArray[np.int64]:
+        input_ids = self._model.tokenizer(
+            texts, add_special_tokens=True, truncation=True, max_length=self._model.max_seq_length
+        )["input_ids"]
+
+        return np.array([len(ids) for ids in input_ids], dtype=np.int64)
+
+    def _get_batch_size(self, max_length: int) -> int:
+        return max(1, min(self._max_batch_size, self._max_batch_tokens // max(max_length, 1)))
+
+    def _plan_batches(self, sorted_lengths: NDArray[np.int64]) -> list[tuple[int, int]]:
+        batches = []
+        start = 0
+        for end in range(1, len(sorted_lengths) + 1):
+            # Sorted by length, so the last text of a batch is its longest.
+            if end - start > self._get_batch_size(int(sorted_lengths[end - 1])):
+                batches.append((start, end - 1))
+                start = end - 1
+        batches.append((start, len(sorted_lengths)))
+
+        return batches
+
+    def _get_pool(self) -> dict:
+        with self._pool_lock:
+            if self._pool is None:
+                logger.info(f"Starting an embedding pool of {self._pool_processes} CPU processes.")
+
+                self._pool = self._model.start_multi_process_pool(target_devices=["cpu"] * self._pool_processes)
+                atexit.register(self.close)
+
+            return self._pool
@@ -1,3 +1,12 @@
 from .dispatchers import ChunkingDispatcher, CleaningDispatcher, EmbeddingDispatcher
+from .incremental import EmbeddedChunkIndex
+from .sharding import clean_documents_in_shards, create_cleaning_pool
 
-__all__ = ["CleaningDispatcher", "ChunkingDispatcher", "EmbeddingDispatcher"]
+__all__ = [
+    "CleaningDispatcher",
+    "ChunkingDispatcher",
+    "EmbeddingDispatcher",
+    "EmbeddedChunkIndex",
+    "clean_documents_in_shards",
+    "create_cleaning_pool",
+]
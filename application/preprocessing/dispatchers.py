@@ -115,20 +115,26 @@ class EmbeddingDispatcher:
         if len(data_model) == 0:
             return []
 
-        data_category = data_model[0].get_category()
-        assert all(
-            data_model.get_category() == data_category for data_model in data_model
-        ), "Data models must be of the same category."
-        handler = cls.factory.create_handler(data_category)
+        # Each category goes to its handler in one call: the embedding engine sorts and batches the texts itself.
+        indices_by_category: dict[DataCategory, list[int]] = {}
+        for index, model in enumerate(data_model):
+            indices_by_category.setdefault(model.get_category(), []).append(index)
+
+        embedded_models: list[VectorBaseDocument | None] = [None] * len(data_model)
+        for data_category, indices in indices_by_category.items():
+            handler = cls.factory.create_handler(data_category)
+            category_embedded_models = handler.embed_batch([data_model[index] for index in indices])
+            for index, embedded_model in zip(indices, category_embedded_models, strict=True):
+                embedded_models[index] = embedded_model
 
-        embedded_chunk_model = handler.embed_batch(data_model)
+            logger.info(
+                "Data embedded successfully.",
+                data_category=data_category,
+            )
+
+        embedded_chunk_model = embedded_models
 
         if not is_list:
             embedded_chunk_model = embedded_chunk_model[0]
 
-        logger.info(
-            "Data embedded successfully.",
-            data_category=data_category,
-        )
-
         return embedded_chunk_model
@@ -1,5 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, cast
+from typing import Generic, TypeVar
+
+import numpy as np
+from numpy.typing import NDArray
 
 from application.networks import EmbeddingModelSingleton
 from domain.chunks import ArticleChunk, Chunk, PostChunk, RepositoryChunk
@@ -28,30 +31,33 @@ class EmbeddingDataHandler(ABC, Generic[ChunkT, EmbeddedChunkT]):
 
     def embed_batch(self, data_model: list[ChunkT]) -> list[EmbeddedChunkT]:
         embedding_model_input = [data_model.content for data_model in data_model]
-        embeddings = embedding_model(embedding_model_input, to_list=True)
+        # The embeddings stay float32 rows of the engine's matrix until they're upserted to Qdrant.
+        embeddings = embedding_model(embedding_model_input, to_list=False)
 
         embedded_chunk = [
-            self.map_model(data_model, cast(list[float], embedding))
+            self.map_model(data_model, embedding)
             for data_model, embedding in zip(data_model, embeddings, strict=False)
         ]
 
         return embedded_chunk
 
     @abstractmethod
-    def map_model(self, data_model: ChunkT, embedding: list[float]) -> EmbeddedChunkT:
+    def map_model(self, data_model: ChunkT, embedding: NDArray[np.float32]) -> EmbeddedChunkT:
         pass
 
 
 class QueryEmbeddingHandler(EmbeddingDataHandler):
-    def map_model(self, data_model: Query, embedding: list[float]) -> EmbeddedQuery:
+    def map_model(self, data_model: Query, embedding: NDArray[np.float32]) -> EmbeddedQuery:
         return EmbeddedQuery(
             id=data_model.id,
             author_id=data_model.author_id,
             author_full_name=data_model.author_full_name,
             content=data_model.content,
-            embedding=embedding,
+            # Search requests take plain lists.
+            embedding=embedding.tolist(),
             metadata={
                 "embedding_model_id": embedding_model.model_id,
+                "embedding_backend": embedding_model.backend.value,
                 "embedding_size": embedding_model.embedding_size,
                 "max_input_length": embedding_model.max_input_length,
             },
@@ -59,7 +65,7 @@ class QueryEmbeddingHandler(EmbeddingDataHandler):
 
 
 class PostEmbeddingHandler(EmbeddingDataHandler):
-    def map_model(self, data_model: PostChunk, embedding: list[float]) -> EmbeddedPostChunk:
+    def map_model(self, data_model: PostChunk, embedding: NDArray[np.float32]) -> EmbeddedPostChunk:
         return EmbeddedPostChunk(
             id=data_model.id,
             content=data_model.content,
@@ -70,6 +76,7 @@ class PostEmbeddingHandler(EmbeddingDataHandler):
             author_full_name=data_model.author_full_name,
             metadata={
                 "embedding_model_id": embedding_model.model_id,
+                "embedding_backend": embedding_model.backend.value,
                 "embedding_size": embedding_model.embedding_size,
                 "max_input_length": embedding_model.max_input_length,
             },
@@ -77,7 +84,7 @@ class PostEmbeddingHandler(EmbeddingDataHandler):
 
 
 class ArticleEmbeddingHandler(EmbeddingDataHandler):
-    def map_model(self, data_model: ArticleChunk, embedding: list[float]) -> EmbeddedArticleChunk:
+    def map_model(self, data_model: ArticleChunk, embedding: NDArray[np.float32]) -> EmbeddedArticleChunk:
         return EmbeddedArticleChunk(
             id=data_model.id,
             content=data_model.content,
@@ -89,6 +96,7 @@ class ArticleEmbeddingHandler(EmbeddingDataHandler):
             author_full_name=data_model.author_full_name,
             metadata={
                 "embedding_model_id": embedding_model.model_id,
+                "embedding_backend": embedding_model.backend.value,
                 "embedding_size": embedding_model.embedding_size,
                 "max_input_length": embedding_model.max_input_length,
             },
@@ -96,7 +104,7 @@ class ArticleEmbeddingHandler(EmbeddingDataHandler):
 
 
 class RepositoryEmbeddingHandler(EmbeddingDataHandler):
-    def map_model(self, data_model: RepositoryChunk, embedding: list[float]) -> EmbeddedRepositoryChunk:
+    def map_model(self, data_model: RepositoryChunk, embedding: NDArray[np.float32]) -> EmbeddedRepositoryChunk:
         return EmbeddedRepositoryChunk(
             id=data_model.id,
             content=data_model.content,
@@ -109,6 +117,7 @@ class RepositoryEmbeddingHandler(EmbeddingDataHandler):
             author_full_name=data_model.author_full_name,
             metadata={
                 "embedding_model_id": embedding_model.model_id,
+                "embedding_backend": embedding_model.backend.value,
                 "embedding_size": embedding_model.embedding_size,
                 "max_input_length": embedding_model.max_input_length,
             },
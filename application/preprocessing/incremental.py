@@ -0,0 +1,139 @@
+from loguru import logger
+from qdrant_client.models import FieldCondition, Filter, MatchAny
+
+from application import utils
+from application.networks import EmbeddingModelSingleton, ModelBackend
+from domain.chunks import Chunk
+from domain.embedded_chunks import (
+    EmbeddedArticleChunk,
+    EmbeddedChunk,
+    EmbeddedPostChunk,
+    EmbeddedRepositoryChunk,
+)
+
+
+class EmbeddedChunkIndex:
+    """
+    The chunks of a set of authors already embedded in the vector DB, used to embed only what changed.
+
+    Chunk ids are derived from the MD5 of the chunk content, so a stored chunk with the same id, embedding model id
+    and inference backend is up to date. The stored ids, model ids and backends of the authors are read once per
+    collection, without vectors. After every chunk of the run went through `select_changed` and the changed chunks
+    are loaded, `delete_stale` removes the stored chunks that no longer match any chunk, i.e. those of edited or
+    deleted documents. `to_state` and `from_state` carry the index over a step boundary, so the deletion can wait
+    for the load step.
+    """
+
+    _embedded_classes: tuple[type[EmbeddedChunk], ...] = (
+        EmbeddedPostChunk,
+        EmbeddedArticleChunk,
+        EmbeddedRepositoryChunk,
+    )
+
+    def __init__(
+        self, author_ids: list[str], embedding_model_id: str | None = None, embedding_backend: str | None = None
+    ) -> None:
+        self._author_ids = sorted({str(author_id) for author_id in author_ids})
+        self._embedding_model_id = embedding_model_id or EmbeddingModelSingleton().model_id
+        self._embedding_backend = ModelBackend(embedding_backend or EmbeddingModelSingleton().backend)
+
+        # Per embedded chunk class: the stored chunk ids and the model id and backend that embedded them.
+        self._stored: dict[type[EmbeddedChunk], dict[str, tuple[str | None, str]]] = {}
+        self._seen: dict[type[EmbeddedChunk], set[str]] = {}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "EmbeddedChunkIndex":
+        """Rebuilds an index from `to_state`, with the chunks seen so far. The stored chunks are read again."""
+
+        index = cls(
+            author_ids=state["author_ids"],
+            embedding_model_id=state["embedding_model_id"],
+            embedding_backend=state["embedding_backend"],
+        )
+        for embedded_class in cls._embedded_classes:
+            seen_chunk_ids = state["seen_chunk_ids"].get(embedded_class.get_category(), [])
+            index._seen[embedded_class] = set(seen_chunk_ids)
+
+        return index
+
+    def to_state(self) -> dict:
+        return {
+            "author_ids": self._author_ids,
+            "embedding_model_id": self._embedding_model_id,
+            "embedding_backend": self._embedding_backend.value,
+            "seen_chunk_ids": {
+                embedded_class.get_category(): sorted(seen) for embedded_class, seen in self._seen.items()
+            },
+        }
+
+    @property
+    def author_ids(self) -> list[str]:
+        return self._author_ids
+
+    def select_changed(self, chunks: list[Chunk]) -> list[Chunk]:
+        """
+        Returns the chunks that are not stored yet or were embedded by another model or backend, without duplicates.
+        """
+
+        changed_chunks = []
+        for chunk in chunks:
+            embedded_class = self._get_embedded_class(chunk)
+            seen = self._seen.setdefault(embedded_class, set())
+
+            chunk_id = str(chunk.id)
+            if chunk_id in seen:
+                continue
+            seen.add(chunk_id)
+
+            if self._get_stored(embedded_class).get(chunk_id) != (self._embedding_model_id, self._embedding_backend):
+                changed_chunks.append(chunk)
+
+        return changed_chunks
+
+    def delete_stale(self, batch_size: int = 256) -> dict[str, int]:
+        """
+        Deletes the stored chunks of the authors that were not selected in this run.
+
+        Returns:
+            dict[str, int]: The number of deleted chunks per collection.
+        """
+
+        num_deleted = {}
+        for embedded_class in self._embedded_classes:
+            seen = self._seen.get(embedded_class, set())
+            stale_ids = [chunk_id for chunk_id in self._get_stored(embedded_class) if chunk_id not in seen]
+            if not stale_ids:
+                continue
+
+            collection_name = embedded_class.get_collection_name()
+            logger.info(f"Deleting {len(stale_ids)} stale chunks from '{collection_name}'.")
+
+            num_deleted[collection_name] = 0
+            for stale_ids_batch in utils.misc.batch(stale_ids, batch_size):
+                if embedded_class.bulk_delete(stale_ids_batch):
+                    num_deleted[collection_name] += len(stale_ids_batch)
+
+        return num_deleted
+
+    def _get_stored(self, embedded_class: type[EmbeddedChunk]) -> dict[str, tuple[str | None, str]]:
+        if embedded_class not in self._stored:
+            query_filter = Filter(must=[FieldCondition(key="author_id", match=MatchAny(any=self._author_ids))])
+            self._stored[embedded_class] = {
+                str(record.id): self._get_embedded_by((record.payload or {}).get("metadata", {}))
+                for record in embedded_class.scroll_records(query_filter=query_filter, with_payload=["metadata"])
+            }
+
+        return self._stored[embedded_class]
+
+    @staticmethod
+    def _get_embedded_by(metadata: dict) -> tuple[str | None, str]:
+        # Chunks stored before the backend was recorded were all embedded by the fp32 PyTorch model.
+        return metadata.get("embedding_model_id"), metadata.get("embedding_backend", ModelBackend.TORCH.value)
+
+    def _get_embedded_class(self, chunk: Chunk) -> type[EmbeddedChunk]:
+        category = chunk.get_category()
+        for embedded_class in self._embedded_classes:
+            if embedded_class.get_category() == category:
+                return embedded_class
+
+        raise ValueError(f"Unsupported data category: {category}")
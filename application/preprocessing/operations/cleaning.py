@@ -1,8 +1,12 @@
 import re
 
+# Compiled once: `clean_text` runs over every document, and repositories can be megabytes of text.
+_UNSUPPORTED_CHARACTERS_PATTERN = re.compile(r"[^\w\s.,!?]")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
 
 def clean_text(text: str) -> str:
-    text = re.sub(r"[^\w\s.,!?]", " ", text)
-    text = re.sub(r"\s+", " ", text)
+    text = _UNSUPPORTED_CHARACTERS_PATTERN.sub(" ", text)
+    text = _WHITESPACE_PATTERN.sub(" ", text)
 
     return text.strip()
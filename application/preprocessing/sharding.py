@@ -0,0 +1,129 @@
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from loguru import logger
+
+from domain.cleaned_documents import CleanedDocument
+from domain.documents import Document
+
+from .dispatchers import CleaningDispatcher
+
+
+def clean_documents_in_shards(
+    documents: list[Document],
+    num_workers: int | None = None,
+    shard_size: int = 32,
+    max_in_flight_shards: int | None = None,
+    executor: ProcessPoolExecutor | None = None,
+) -> tuple[list[CleanedDocument], list[dict]]:
+    """
+    Cleans the documents over a process pool, `shard_size` documents per task.
+
+    At most `max_in_flight_shards` shards (twice the workers by default) are submitted at once, and results are
+    collected in submission order, so only a bounded number of pickled shards exists at any time and the output
+    keeps the input order. With a single worker or a single shard, the documents are cleaned in-process.
+
+    Pass an `executor` from `create_cleaning_pool` to reuse one pool across calls, e.g. one per streaming window.
+
+    Args:
+        documents (list[Document]): The raw documents to clean.
+        num_workers (int | None): The number of worker processes. Defaults to the number of CPUs. With an
+            `executor`, it only sizes `max_in_flight_shards`.
+        shard_size (int): The number of documents sent to a worker per task.
+        max_in_flight_shards (int | None): The number of shards submitted but not yet collected.
+        executor (ProcessPoolExecutor | None): A pool to run on. Defaults to a new one, shut down on return.
+
+    Returns:
+        tuple[list[CleanedDocument], list[dict]]: The cleaned documents, in input order, and for each shard
+            its index, number of documents and cleaning time in seconds.
+    """
+
+    num_workers = num_workers or os.cpu_count() or 1
+    shard_size = max(shard_size, 1)
+    max_in_flight_shards = max(max_in_flight_shards or 2 * num_workers, 1)
+
+    shards = [documents[i : i + shard_size] for i in range(0, len(documents), shard_size)]
+    if len(shards) <= 1 or (executor is None and num_workers <= 1):
+        return _collect(enumerate(_clean_shard(shard) for shard in shards), shards)
+
+    logger.info(f"Cleaning {len(documents)} documents in {len(shards)} shards over {num_workers} processes.")
+
+    if executor is not None:
+        return _clean_shards(executor, shards, max_in_flight_shards)
+
+    with create_cleaning_pool(min(num_workers, len(shards))) as executor:
+        return _clean_shards(executor, shards, max_in_flight_shards)
+
+
+def create_cleaning_pool(num_workers: int | None = None) -> ProcessPoolExecutor:
+    """Creates a process pool for `clean_documents_in_shards`, with one worker per CPU by default."""
+
+    executor = ProcessPoolExecutor(max_workers=num_workers or os.cpu_count() or 1, mp_context=_get_mp_context())
+    # Forked pools start all their workers on the first task. Do it now, before the caller starts other threads
+    # whose locks the children would inherit.
+    executor.submit(int).result()
+
+    return executor
+
+
+def _clean_shards(
+    executor: ProcessPoolExecutor, shards: list[list[Document]], max_in_flight_shards: int
+) -> tuple[list[CleanedDocument], list[dict]]:
+    cleaned_documents: list[CleanedDocument] = []
+    shard_timings: list[dict] = []
+    pending: deque[tuple[int, Future]] = deque()
+    for shard_index, shard in enumerate(shards):
+        if len(pending) >= max_in_flight_shards:
+            _collect_next(pending, shards, cleaned_documents, shard_timings)
+        pending.append((shard_index, executor.submit(_clean_shard, shard)))
+
+    while pending:
+        _collect_next(pending, shards, cleaned_documents, shard_timings)
+
+    return cleaned_documents, shard_timings
+
+
+def _clean_shard(documents: list[Document]) -> tuple[list[CleanedDocument], float]:
+    start_time = time.perf_counter()
+    cleaned_documents = [CleaningDispatcher.dispatch(document) for document in documents]
+
+    return cleaned_documents, time.perf_counter() - start_time
+
+
+def _collect(results, shards: list[list[Document]]) -> tuple[list[CleanedDocument], list[dict]]:
+    cleaned_documents: list[CleanedDocument] = []
+    shard_timings: list[dict] = []
+    for shard_index, (shard_documents, seconds) in results:
+        cleaned_documents.extend(shard_documents)
+        shard_timings.append(_shard_timing(shard_index, shards[shard_index], seconds))
+
+    return cleaned_documents, shard_timings
+
+
+def _collect_next(
+    pending: deque[tuple[int, Future]],
+    shards: list[list[Document]],
+    cleaned_documents: list[CleanedDocument],
+    shard_timings: list[dict],
+) -> None:
+    shard_index, future = pending.popleft()
+    shard_documents, seconds = future.result()
+
+    cleaned_documents.extend(shard_documents)
+    shard_timings.append(_shard_timing(shard_index, shards[shard_index], seconds))
+
+
+def _shard_timing(shard_index: int, shard: list[Document], seconds: float) -> dict:
+    return {"shard": shard_index, "num_documents": len(shard), "seconds": round(seconds, 4)}
+
+
+def _get_mp_context():
+    # Fork where available: importing this package loads the embedding model, which spawned workers would
+    # otherwise load again just to clean text.
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+
+    return multiprocessing.get_context()
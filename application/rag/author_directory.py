@@ -0,0 +1,118 @@
+import re
+from threading import Event, Lock, Thread
+
+from loguru import logger
+from pymongo import errors
+
+from domain.documents import UserDocument
+
+_UUID_PATTERN = r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+
+
+class AuthorDirectory:
+    """
+    An in-memory snapshot of the `users` collection used to resolve authors without MongoDB or an LLM.
+
+    Known full names and ids are compiled into a single regex, so matching a query is one linear scan
+    regardless of the number of authors.
+    """
+
+    def __init__(self, refresh_interval: float = 300.0) -> None:
+        self._refresh_interval = refresh_interval
+
+        self._users_by_name: dict[str, UserDocument] = {}
+        self._users_by_id: dict[str, UserDocument] = {}
+        self._pattern: re.Pattern | None = None
+        self._lock = Lock()
+
+        self._stop_event = Event()
+        self._refresh_thread: Thread | None = None
+
+    def load(self) -> None:
+        """
+        Reloads the directory from MongoDB. The directory is only an optimization, so if MongoDB is unreachable
+        the previous snapshot is kept, empty at startup, and SelfQuery falls back to the LLM.
+        """
+
+        try:
+            users = UserDocument.bulk_find()
+        except errors.PyMongoError:
+            logger.exception("Failed to load the author directory. Keeping the previous snapshot.")
+
+            return
+
+        self._rebuild(users)
+
+        logger.info(f"Loaded {len(users)} authors into the author directory.")
+
+    def start_refresh(self) -> None:
+        """Starts a daemon thread that reloads the directory every `refresh_interval` seconds."""
+
+        if self._refresh_thread is not None:
+            return
+
+        self._stop_event.clear()
+        self._refresh_thread = Thread(target=self._refresh_loop, name="author-directory-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def stop_refresh(self) -> None:
+        self._stop_event.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout=1.0)
+            self._refresh_thread = None
+
+    def match(self, text: str) -> UserDocument | None:
+        """Returns the first known author whose full name or id appears in `text`."""
+
+        with self._lock:
+            pattern, users_by_name, users_by_id = self._pattern, self._users_by_name, self._users_by_id
+        if pattern is None:
+            return None
+
+        # Ids are matched by shape, so skip unknown ones and keep scanning.
+        for match in pattern.finditer(text):
+            key = match.group(0)
+            user = users_by_id.get(key.lower()) or users_by_name.get(self._normalize_name(key))
+            if user is not None:
+                return user
+
+        return None
+
+    def resolve(self, name_or_id: str) -> UserDocument | None:
+        """Returns the author with exactly this full name or id, if known."""
+
+        with self._lock:
+            return self._users_by_id.get(name_or_id.strip().lower()) or self._users_by_name.get(
+                self._normalize_name(name_or_id)
+            )
+
+    def add(self, user: UserDocument) -> None:
+        with self._lock:
+            users = list(self._users_by_id.values())
+        self._rebuild([*users, user])
+
+    def _refresh_loop(self) -> None:
+        while not self._stop_event.wait(self._refresh_interval):
+            try:
+                self.load()
+            except Exception:
+                logger.exception("Failed to refresh the author directory. Keeping the previous snapshot.")
+
+    def _rebuild(self, users: list[UserDocument]) -> None:
+        users_by_name = {self._normalize_name(user.full_name): user for user in users}
+        users_by_id = {str(user.id).lower(): user for user in users}
+
+        # Longest names first, so "Aquib Ali Khan" wins over a hypothetical "Ali Khan".
+        names = sorted(users_by_name, key=len, reverse=True)
+        alternatives = [r"\s+".join(re.escape(token) for token in name.split()) for name in names]
+        alternatives.append(_UUID_PATTERN)
+        pattern = re.compile(r"\b(?:" + "|".join(alternatives) + r")\b", flags=re.IGNORECASE)
+
+        with self._lock:
+            self._users_by_name = users_by_name
+            self._users_by_id = users_by_id
+            self._pattern = pattern if users else None
+
+    @staticmethod
+    def _normalize_name(name: str) -> str:
+        return " ".join(name.lower().split())
@@ -1,11 +1,28 @@
+import asyncio
+import os
+import time
 from abc import ABC, abstractmethod
 from typing import Any
 
+from dotenv import load_dotenv
 from langchain.prompts import PromptTemplate
+from langchain_openai import ChatOpenAI
 from pydantic import BaseModel
 
+from application.utils.concurrency import run_in_io_executor
 from domain.queries import Query
 
+load_dotenv()
+
+
+def build_chat_model() -> ChatOpenAI:
+    """Create the OpenAI chat client used by the LLM-backed RAG steps.
+
+    The client owns an HTTP connection pool, so build it once and share it between steps and requests.
+    """
+
+    return ChatOpenAI(model=os.getenv("OPENAI_MODEL_ID"), api_key=os.getenv("OPENAI_API_KEY"), temperature=0)
+
 
 class PromptTemplateFactory(ABC, BaseModel):
     @abstractmethod
@@ -14,9 +31,28 @@ class PromptTemplateFactory(ABC, BaseModel):
 
 
 class RAGStep(ABC):
-    def __init__(self, mock: bool = False) -> None:
+    """
+    A step of the RAG pipeline. With `mock=True` the step answers deterministically without calling an LLM,
+    waiting `mock_latency` seconds to stand in for the round trip, so the pipeline can be benchmarked offline.
+    """
+
+    def __init__(self, mock: bool = False, mock_latency: float = 0.0) -> None:
         self._mock = mock
+        self._mock_latency = mock_latency
 
     @abstractmethod
     def generate(self, query: Query, *args, **kwargs) -> Any:
         pass
+
+    async def agenerate(self, query: Query, *args, **kwargs) -> Any:
+        """Async counterpart of `generate`. Defaults to running `generate` in a worker thread."""
+
+        return await run_in_io_executor(self.generate, query, *args, **kwargs)
+
+    def _simulate_llm_call(self) -> None:
+        if self._mock_latency > 0:
+            time.sleep(self._mock_latency)
+
+    async def _asimulate_llm_call(self) -> None:
+        if self._mock_latency > 0:
+            await asyncio.sleep(self._mock_latency)
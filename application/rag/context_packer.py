@@ -0,0 +1,111 @@
+import os
+
+from dotenv import load_dotenv
+from loguru import logger
+from pydantic import BaseModel
+
+from application.utils import metrics, misc
+from domain.embedded_chunks import EmbeddedChunk
+
+load_dotenv()
+
+
+class PackedContext(BaseModel):
+    context: str
+    chunks: list[EmbeddedChunk]
+    query_tokens: int
+    context_tokens: int
+    dropped_chunks: int = 0
+    truncated: bool = False
+
+
+class ContextPacker:
+    """
+    Fits ranked chunks into the LLM's input token budget.
+
+    Chunks are added best first. The first chunk that doesn't fit is truncated if at least
+    `min_chunk_tokens` tokens are left for its content, and every chunk after it is dropped.
+    """
+
+    def __init__(self, max_input_tokens: int, margin_tokens: int = 16, min_chunk_tokens: int = 64) -> None:
+        self._max_input_tokens = max_input_tokens
+        self._margin_tokens = margin_tokens
+        self._min_chunk_tokens = min_chunk_tokens
+
+        self._template_tokens: dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> "ContextPacker":
+        """
+        Derives the budget from the deployment config: TGI rejects inputs longer than `MAX_INPUT_LENGTH`,
+        and inputs that leave fewer than `MAX_NEW_TOKENS_INFERENCE` tokens before `MAX_TOTAL_TOKENS`.
+        """
+
+        max_input_tokens = int(os.getenv("MAX_INPUT_LENGTH", "2048"))
+        max_total_tokens = os.getenv("MAX_TOTAL_TOKENS")
+        if max_total_tokens:
+            max_new_tokens = int(os.getenv("MAX_NEW_TOKENS_INFERENCE", "0"))
+            max_input_tokens = min(max_input_tokens, int(max_total_tokens) - max_new_tokens)
+
+        return cls(
+            max_input_tokens=max_input_tokens,
+            margin_tokens=int(os.getenv("CONTEXT_MARGIN_TOKENS", "16")),
+            min_chunk_tokens=int(os.getenv("CONTEXT_MIN_CHUNK_TOKENS", "64")),
+        )
+
+    @metrics.track_stage("context_packing")
+    def pack(self, query: str, chunks: list[EmbeddedChunk], prompt: str) -> PackedContext:
+        """
+        Args:
+            query (str): The user query.
+            chunks (list[EmbeddedChunk]): The chunks, best ranked first.
+            prompt (str): The prompt template, with `{query}` and `{context}` placeholders.
+
+        Returns:
+            PackedContext: The context and the token counts computed along the way.
+        """
+
+        query_tokens = misc.compute_num_tokens(query)
+        budget = self._max_input_tokens - self._margin_tokens - self._get_template_tokens(prompt) - query_tokens
+
+        context, packed_chunks, context_tokens, truncated = "", [], 0, False
+        for chunk in chunks:
+            entry = chunk.to_context_entry(len(packed_chunks))
+            entry_tokens = misc.compute_num_tokens(entry)
+            if context_tokens + entry_tokens <= budget:
+                context += entry
+                context_tokens += entry_tokens
+                packed_chunks.append(chunk)
+
+                continue
+
+            # The entry header is small, so most of what doesn't fit is content.
+            content_budget = budget - context_tokens - (entry_tokens - misc.compute_num_tokens(chunk.content))
+            if content_budget >= self._min_chunk_tokens:
+                content = misc.truncate_to_num_tokens(chunk.content, content_budget)
+                entry = chunk.to_context_entry(len(packed_chunks), content)
+                context += entry
+                context_tokens += misc.compute_num_tokens(entry)
+                packed_chunks.append(chunk)
+                truncated = True
+
+            break
+
+        dropped_chunks = len(chunks) - len(packed_chunks)
+        if dropped_chunks or truncated:
+            logger.info(f"Packed {len(packed_chunks)}/{len(chunks)} chunks into {context_tokens} context tokens.")
+
+        return PackedContext(
+            context=context,
+            chunks=packed_chunks,
+            query_tokens=query_tokens,
+            context_tokens=context_tokens,
+            dropped_chunks=dropped_chunks,
+            truncated=truncated,
+        )
+
+    def _get_template_tokens(self, prompt: str) -> int:
+        if prompt not in self._template_tokens:
+            self._template_tokens[prompt] = misc.compute_num_tokens(prompt.format(query="", context=""))
+
+        return self._template_tokens[prompt]
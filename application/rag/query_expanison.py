@@ -1,37 +1,85 @@
-import opik
 from langchain_openai import ChatOpenAI
 from loguru import logger
 
+from application.utils import metrics
 from domain.queries import Query
-from dotenv import load_dotenv
-import os
+from infrastructure import tracing
 
 # Load from .env file in current or parent directory
 from dotenv import load_dotenv
 load_dotenv()
 
-from .base import RAGStep
+from .base import RAGStep, build_chat_model
 from .prompt_templates import QueryExpansionTemplate
 
 
 class QueryExpansion(RAGStep):
-    @opik.track(name="QueryExpansion.generate")
+    def __init__(
+        self,
+        mock: bool = False,
+        model: ChatOpenAI | None = None,
+        mock_latency: float = 0.0,
+        mock_distinct_queries: bool = False,
+    ) -> None:
+        """
+        With `mock=True`, the query is repeated `expand_to_n` times. `mock_distinct_queries` returns deterministic,
+        distinct variants of it instead, so benchmarks embed and search as many different queries as an LLM gives.
+        """
+
+        super().__init__(mock=mock, mock_latency=mock_latency)
+
+        self._model = model if model is not None or mock else build_chat_model()
+        self._mock_distinct_queries = mock_distinct_queries
+
+    @tracing.track(name="QueryExpansion.generate")
+    @metrics.track_stage("query_expansion")
     def generate(self, query: Query, expand_to_n: int) -> list[Query]:
         assert expand_to_n > 0, f"'expand_to_n' should be greater than 0. Got {expand_to_n}."
 
+        query_expansion_template = QueryExpansionTemplate()
         if self._mock:
-            return [query for _ in range(expand_to_n)]
+            self._simulate_llm_call()
+
+            return self._mock_queries(query, expand_to_n, query_expansion_template.separator)
+
+        chain = self._build_chain(query_expansion_template, expand_to_n)
+
+        response = chain.invoke({"question": query})
+
+        return self._parse_response(query, response.content, query_expansion_template.separator)
+
+    @tracing.track(name="QueryExpansion.agenerate")
+    @metrics.track_stage("query_expansion")
+    async def agenerate(self, query: Query, expand_to_n: int) -> list[Query]:
+        assert expand_to_n > 0, f"'expand_to_n' should be greater than 0. Got {expand_to_n}."
 
         query_expansion_template = QueryExpansionTemplate()
+        if self._mock:
+            await self._asimulate_llm_call()
+
+            return self._mock_queries(query, expand_to_n, query_expansion_template.separator)
+
+        chain = self._build_chain(query_expansion_template, expand_to_n)
+
+        response = await chain.ainvoke({"question": query})
+
+        return self._parse_response(query, response.content, query_expansion_template.separator)
+
+    def _build_chain(self, query_expansion_template: QueryExpansionTemplate, expand_to_n: int):
         prompt = query_expansion_template.create_template(expand_to_n - 1)
-        model = ChatOpenAI(model=os.getenv("OPENAI_MODEL_ID"), api_key=os.getenv("OPENAI_API_KEY"), temperature=0)
+        return prompt | self._model
 
-        chain = prompt | model
+    def _mock_queries(self, query: Query, expand_to_n: int, separator: str) -> list[Query]:
+        if not self._mock_distinct_queries:
+            return [query for _ in range(expand_to_n)]
 
-        response = chain.invoke({"question": query})
-        result = response.content
+        # Deterministic stand-in for the LLM answer, so every expanded query is distinct but reproducible.
+        response = separator.join(f"{query.content} (perspective {i})" for i in range(1, expand_to_n))
+
+        return self._parse_response(query, response, separator)
 
-        queries_content = result.strip().split(query_expansion_template.separator)
+    def _parse_response(self, query: Query, result: str, separator: str) -> list[Query]:
+        queries_content = result.strip().split(separator)
 
         queries = [query]
         queries += [
@@ -1,30 +1,130 @@
-import opik
+import hashlib
+import os
+import time
+from threading import Lock
 
+from dotenv import load_dotenv
+
+from application import utils
 from application.networks import CrossEncoderModelSingleton
+from application.utils import metrics
+from application.utils.cache import LRUCache
+from application.utils.concurrency import run_in_cpu_executor
 from domain.embedded_chunks import EmbeddedChunk
 from domain.queries import Query
+from infrastructure import tracing
 
 from .base import RAGStep
 
+load_dotenv()
+
 
 class Reranker(RAGStep):
-    def __init__(self, mock: bool = False) -> None:
+    def __init__(
+        self,
+        mock: bool = False,
+        batch_size: int | None = None,
+        score_cache_size: int | None = None,
+        cascade_top_m: int | None = None,
+    ) -> None:
         super().__init__(mock=mock)
 
         self._model = CrossEncoderModelSingleton()
+        self._batch_size = batch_size or int(os.getenv("RERANKING_BATCH_SIZE", "32"))
+        # When > 0, only the `cascade_top_m` best candidates by vector similarity are cross-encoded.
+        self._cascade_top_m = cascade_top_m if cascade_top_m is not None else int(
+            os.getenv("RERANKING_CASCADE_TOP_M", "0")
+        )
+
+        # Scores only depend on the query and the chunk content, and chunk ids are content hashes.
+        score_cache_size = score_cache_size if score_cache_size is not None else int(
+            os.getenv("RERANKING_SCORE_CACHE_SIZE", "10000")
+        )
+        self._score_cache: LRUCache[tuple[str, str], float] | None = (
+            LRUCache(max_size=score_cache_size) if score_cache_size > 0 else None
+        )
 
-    @opik.track(name="Reranker.generate")
+        self._stats_lock = Lock()
+        self._stats = {
+            "calls": 0,
+            "candidates": 0,
+            "cascade_pruned": 0,
+            "scored_pairs": 0,
+            "cache_lookup_seconds": 0.0,
+            "predict_seconds": 0.0,
+            "sort_seconds": 0.0,
+        }
+
+    @tracing.track(name="Reranker.generate")
+    @metrics.track_stage("rerank")
     def generate(self, query: Query, chunks: list[EmbeddedChunk], keep_top_k: int) -> list[EmbeddedChunk]:
         if self._mock:
             return chunks
 
-        query_doc_tuples = [(query.content, chunk.content) for chunk in chunks]
-        scores = self._model(query_doc_tuples)
+        start_time = time.perf_counter()
+        num_candidates = len(chunks)
+        chunks = self._cascade(chunks)
+
+        query_hash = hashlib.sha1(query.content.encode()).hexdigest()
+        scores = [self._get_cached_score(query_hash, chunk) for chunk in chunks]
+        missing_indices = [i for i, score in enumerate(scores) if score is None]
+        cache_lookup_time = time.perf_counter()
+
+        if missing_indices:
+            query_doc_tuples = [(query.content, chunks[i].content) for i in missing_indices]
+            missing_scores = self._model(query_doc_tuples, batch_size=self._batch_size)
 
-        scored_query_doc_tuples = list(zip(scores, chunks, strict=False))
-        scored_query_doc_tuples.sort(key=lambda x: x[0], reverse=True)
+            for i, score in zip(missing_indices, missing_scores, strict=True):
+                scores[i] = score
+                self._set_cached_score(query_hash, chunks[i], score)
+        predict_time = time.perf_counter()
 
-        reranked_documents = scored_query_doc_tuples[:keep_top_k]
-        reranked_documents = [doc for _, doc in reranked_documents]
+        reranked_documents = [chunks[i] for i in utils.misc.top_k_indices(scores, keep_top_k)]
+        sort_time = time.perf_counter()
+
+        with self._stats_lock:
+            self._stats["calls"] += 1
+            self._stats["candidates"] += num_candidates
+            self._stats["cascade_pruned"] += num_candidates - len(chunks)
+            self._stats["scored_pairs"] += len(missing_indices)
+            self._stats["cache_lookup_seconds"] += cache_lookup_time - start_time
+            self._stats["predict_seconds"] += predict_time - cache_lookup_time
+            self._stats["sort_seconds"] += sort_time - predict_time
 
         return reranked_documents
+
+    async def agenerate(self, query: Query, chunks: list[EmbeddedChunk], keep_top_k: int) -> list[EmbeddedChunk]:
+        if self._mock:
+            return chunks
+
+        return await run_in_cpu_executor(self.generate, query=query, chunks=chunks, keep_top_k=keep_top_k)
+
+    def stats(self) -> dict:
+        """Returns cumulative per-stage timings and the score cache counters."""
+
+        with self._stats_lock:
+            stats = dict(self._stats)
+        if self._score_cache is not None:
+            stats["score_cache"] = self._score_cache.stats()
+
+        return stats
+
+    def _cascade(self, chunks: list[EmbeddedChunk]) -> list[EmbeddedChunk]:
+        if self._cascade_top_m <= 0 or len(chunks) <= self._cascade_top_m:
+            return chunks
+        if any(chunk.score is None for chunk in chunks):
+            return chunks
+
+        return [chunks[i] for i in utils.misc.top_k_indices([chunk.score for chunk in chunks], self._cascade_top_m)]
+
+    def _get_cached_score(self, query_hash: str, chunk: EmbeddedChunk) -> float | None:
+        if self._score_cache is None:
+            return None
+
+        return self._score_cache.get((query_hash, str(chunk.id)))
+
+    def _set_cached_score(self, query_hash: str, chunk: EmbeddedChunk, score: float) -> None:
+        if self._score_cache is None:
+            return
+
+        self._score_cache.put((query_hash, str(chunk.id)), score)
@@ -1,10 +1,14 @@
+import asyncio
 import concurrent.futures
+import contextvars
+from uuid import UUID
 
-import opik
 from loguru import logger
 from qdrant_client.models import FieldCondition, Filter, MatchValue
 
 from application import utils
+from application.utils import metrics
+from application.utils.concurrency import run_in_cpu_executor
 from application.preprocessing.dispatchers import EmbeddingDispatcher
 from domain.embedded_chunks import (
     EmbeddedArticleChunk,
@@ -13,6 +17,7 @@ from domain.embedded_chunks import (
     EmbeddedRepositoryChunk,
 )
 from domain.queries import EmbeddedQuery, Query
+from infrastructure import tracing
 
 from .query_expanison import QueryExpansion
 from .reranking import Reranker
@@ -20,36 +25,69 @@ from .self_query import SelfQuery
 
 
 class ContextRetriever:
-    def __init__(self, mock: bool = False) -> None:
-        self._query_expander = QueryExpansion(mock=mock)
-        self._metadata_extractor = SelfQuery(mock=mock)
-        self._reranker = Reranker(mock=mock)
+    _data_categories: tuple[type[EmbeddedChunk], ...] = (
+        EmbeddedPostChunk,
+        EmbeddedArticleChunk,
+        EmbeddedRepositoryChunk,
+    )
 
-    @opik.track(name="ContextRetriever.search")
+    def __init__(
+        self,
+        mock: bool = False,
+        query_expander: QueryExpansion | None = None,
+        metadata_extractor: SelfQuery | None = None,
+        reranker: Reranker | None = None,
+    ) -> None:
+        self._query_expander = query_expander or QueryExpansion(mock=mock)
+        self._metadata_extractor = metadata_extractor or SelfQuery(mock=mock)
+        self._reranker = reranker or Reranker(mock=mock)
+
+    @property
+    def reranker(self) -> Reranker:
+        return self._reranker
+
+    @tracing.track(name="ContextRetriever.search")
+    @metrics.track_stage("retrieval")
     def search(
         self,
         query: str,
         k: int = 3,
         expand_to_n_queries: int = 3,
+        query_metadata: Query | None = None,
     ) -> list:
         query_model = Query.from_str(query)
 
-        query_model = self._metadata_extractor.generate(query_model)
+        # Both steps are independent LLM round trips, so run them side by side. SelfQuery gets its own copy
+        # because it fills in the author in place while QueryExpansion is still reading the query. Each task runs
+        # in a copy of the current context, so its spans stay children of this trace.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            if query_metadata is None:
+                metadata_task = executor.submit(
+                    contextvars.copy_context().run, self._metadata_extractor.generate, query_model.model_copy()
+                )
+            expansion_task = executor.submit(
+                contextvars.copy_context().run,
+                self._query_expander.generate,
+                query_model,
+                expand_to_n=expand_to_n_queries,
+            )
+
+            query_model = query_metadata if query_metadata is not None else metadata_task.result()
+            n_generated_queries = expansion_task.result()
         logger.info(
             f"Successfully extracted the author_full_name = {query_model.author_full_name} from the query.",
         )
-
-        n_generated_queries = self._query_expander.generate(query_model, expand_to_n=expand_to_n_queries)
         logger.info(
             f"Successfully generated {len(n_generated_queries)} search queries.",
         )
 
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            search_tasks = [executor.submit(self._search, _query_model, k) for _query_model in n_generated_queries]
+        n_generated_queries = self._apply_author(n_generated_queries, query_model)
 
-            n_k_documents = [task.result() for task in concurrent.futures.as_completed(search_tasks)]
-            n_k_documents = utils.misc.flatten(n_k_documents)
-            n_k_documents = list(set(n_k_documents))
+        # Embed every expanded query in a single forward pass, then search every collection with one batched request.
+        n_embedded_queries = self._embed_queries(n_generated_queries)
+
+        n_k_documents = self._search(n_embedded_queries, k)
+        n_k_documents = self._deduplicate(n_k_documents)
 
         logger.info(f"{len(n_k_documents)} documents retrieved successfully")
 
@@ -60,43 +98,145 @@ class ContextRetriever:
 
         return k_documents
 
-    def _search(self, query: Query, k: int = 3) -> list[EmbeddedChunk]:
+    @tracing.track(name="ContextRetriever.asearch")
+    @metrics.track_stage("retrieval")
+    async def asearch(
+        self,
+        query: str,
+        k: int = 3,
+        expand_to_n_queries: int = 3,
+        query_metadata: Query | None = None,
+        expanded_queries: list[Query] | None = None,
+    ) -> list:
+        query_model = Query.from_str(query)
+
+        if query_metadata is None and expanded_queries is None:
+            query_model, n_generated_queries = await asyncio.gather(
+                self._metadata_extractor.agenerate(query_model.model_copy()),
+                self._query_expander.agenerate(query_model, expand_to_n=expand_to_n_queries),
+            )
+        elif query_metadata is None:
+            query_model = await self._metadata_extractor.agenerate(query_model)
+            n_generated_queries = expanded_queries
+        elif expanded_queries is None:
+            n_generated_queries = await self._query_expander.agenerate(query_model, expand_to_n=expand_to_n_queries)
+            query_model = query_metadata
+        else:
+            query_model, n_generated_queries = query_metadata, expanded_queries
+        logger.info(
+            f"Successfully extracted the author_full_name = {query_model.author_full_name} from the query.",
+        )
+        logger.info(
+            f"Successfully generated {len(n_generated_queries)} search queries.",
+        )
+
+        n_generated_queries = self._apply_author(n_generated_queries, query_model)
+
+        n_embedded_queries = await run_in_cpu_executor(self._embed_queries, n_generated_queries)
+
+        n_k_documents = await self._asearch(n_embedded_queries, k)
+        n_k_documents = self._deduplicate(n_k_documents)
+
+        logger.info(f"{len(n_k_documents)} documents retrieved successfully")
+
+        if len(n_k_documents) > 0:
+            k_documents = await self.arerank(query, chunks=n_k_documents, keep_top_k=k)
+        else:
+            k_documents = []
+
+        return k_documents
+
+    def extract_metadata(self, query: str) -> Query:
+        """Runs only the SelfQuery step. Pass the result as `query_metadata` to `search` to avoid repeating it."""
+
+        return self._metadata_extractor.generate(Query.from_str(query))
+
+    async def aextract_metadata(self, query: str) -> Query:
+        return await self._metadata_extractor.agenerate(Query.from_str(query))
+
+    async def aexpand_query(self, query: str, expand_to_n_queries: int = 3) -> list[Query]:
+        """Runs only the QueryExpansion step. Pass the result as `expanded_queries` to `asearch`."""
+
+        return await self._query_expander.agenerate(Query.from_str(query), expand_to_n=expand_to_n_queries)
+
+    def _apply_author(self, queries: list[Query], metadata_query: Query) -> list[Query]:
+        """Propagates the author extracted by SelfQuery to every expanded query."""
+
+        for query in queries:
+            query.author_id = metadata_query.author_id
+            query.author_full_name = metadata_query.author_full_name
+
+        return queries
+
+    def _embed_queries(self, queries: list[Query]) -> list[EmbeddedQuery]:
+        return EmbeddingDispatcher.dispatch(queries)
+
+    def _search(self, embedded_queries: list[EmbeddedQuery], k: int = 3) -> list[EmbeddedChunk]:
         assert k >= 3, "k should be >= 3"
 
-        def _search_data_category(
-            data_category_odm: type[EmbeddedChunk], embedded_query: EmbeddedQuery
-        ) -> list[EmbeddedChunk]:
-            if embedded_query.author_id:
-                query_filter = Filter(
-                    must=[
-                        FieldCondition(
-                            key="author_id",
-                            match=MatchValue(
-                                value=str(embedded_query.author_id),
-                            ),
-                        )
-                    ]
+        def _search_data_category(data_category_odm: type[EmbeddedChunk]) -> list[EmbeddedChunk]:
+            return utils.misc.flatten(
+                data_category_odm.search_batch(
+                    query_vectors=[embedded_query.embedding for embedded_query in embedded_queries],
+                    limit=k // 3,
+                    query_filters=[self._build_author_filter(embedded_query) for embedded_query in embedded_queries],
                 )
-            else:
-                query_filter = None
-
-            return data_category_odm.search(
-                query_vector=embedded_query.embedding,
-                limit=k // 3,
-                query_filter=query_filter,
             )
 
-        embedded_query: EmbeddedQuery = EmbeddingDispatcher.dispatch(query)
+        # Qdrant batches are scoped to a single collection, so issue one batch per data category concurrently.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(self._data_categories)) as executor:
+            search_tasks = [
+                executor.submit(contextvars.copy_context().run, _search_data_category, data_category_odm)
+                for data_category_odm in self._data_categories
+            ]
+
+            retrieved_chunks = utils.misc.flatten([task.result() for task in search_tasks])
 
-        # post_chunks = _search_data_category(EmbeddedPostChunk, embedded_query)
-        articles_chunks = _search_data_category(EmbeddedArticleChunk, embedded_query)
-        # repositories_chunks = _search_data_category(EmbeddedRepositoryChunk, embedded_query)
+        return retrieved_chunks
+
+    async def _asearch(self, embedded_queries: list[EmbeddedQuery], k: int = 3) -> list[EmbeddedChunk]:
+        assert k >= 3, "k should be >= 3"
 
-        # retrieved_chunks = post_chunks + articles_chunks + repositories_chunks
-        return articles_chunks
+        query_vectors = [embedded_query.embedding for embedded_query in embedded_queries]
+        query_filters = [self._build_author_filter(embedded_query) for embedded_query in embedded_queries]
+
+        n_category_chunks = await asyncio.gather(
+            *[
+                data_category_odm.asearch_batch(query_vectors=query_vectors, limit=k // 3, query_filters=query_filters)
+                for data_category_odm in self._data_categories
+            ]
+        )
+        retrieved_chunks = utils.misc.flatten(utils.misc.flatten(n_category_chunks))
 
         return retrieved_chunks
 
+    def _deduplicate(self, chunks: list[EmbeddedChunk]) -> list[EmbeddedChunk]:
+        """Drops chunks retrieved by several queries, keeping the best vector similarity score of each."""
+
+        unique_chunks: dict[tuple[type, UUID], EmbeddedChunk] = {}
+        for chunk in chunks:
+            key = (chunk.__class__, chunk.id)
+            existing_chunk = unique_chunks.get(key)
+            if existing_chunk is None or (chunk.score or 0.0) > (existing_chunk.score or 0.0):
+                unique_chunks[key] = chunk
+
+        return list(unique_chunks.values())
+
+    def _build_author_filter(self, embedded_query: EmbeddedQuery) -> Filter | None:
+        if not embedded_query.author_id:
+            return None
+
+        return Filter(
+            must=[
+                FieldCondition(
+                    key="author_id",
+                    match=MatchValue(
+                        value=str(embedded_query.author_id),
+                    ),
+                )
+            ]
+        )
+
     def rerank(self, query: str | Query, chunks: list[EmbeddedChunk], keep_top_k: int) -> list[EmbeddedChunk]:
         if isinstance(query, str):
             query = Query.from_str(query)
@@ -106,3 +246,15 @@ class ContextRetriever:
         logger.info(f"{len(reranked_documents)} documents reranked successfully.")
 
         return reranked_documents
+
+    async def arerank(
+        self, query: str | Query, chunks: list[EmbeddedChunk], keep_top_k: int
+    ) -> list[EmbeddedChunk]:
+        if isinstance(query, str):
+            query = Query.from_str(query)
+
+        reranked_documents = await self._reranker.agenerate(query=query, chunks=chunks, keep_top_k=keep_top_k)
+
+        logger.info(f"{len(reranked_documents)} documents reranked successfully.")
+
+        return reranked_documents
@@ -3,44 +3,111 @@ from langchain_openai import ChatOpenAI
 from loguru import logger
 
 from application import utils
+from application.utils import metrics
+from application.utils.concurrency import run_in_io_executor
 from domain.documents import UserDocument
 from domain.queries import Query
-from dotenv import load_dotenv
-import os
 
 # Load from .env file in current or parent directory
 from dotenv import load_dotenv
 load_dotenv()
 
-from .base import RAGStep
+from .author_directory import AuthorDirectory
+from .base import RAGStep, build_chat_model
 from .prompt_templates import SelfQueryTemplate
 
 
 class SelfQuery(RAGStep):
+    def __init__(
+        self,
+        mock: bool = False,
+        model: ChatOpenAI | None = None,
+        author_directory: AuthorDirectory | None = None,
+        mock_latency: float = 0.0,
+    ) -> None:
+        super().__init__(mock=mock, mock_latency=mock_latency)
+
+        self._model = model if model is not None or mock else build_chat_model()
+        self._author_directory = author_directory
+
     # @opik.track(name="SelfQuery.generate")
+    @metrics.track_stage("self_query")
     def generate(self, query: Query) -> Query:
         if self._mock:
+            self._simulate_llm_call()
+
             return query
 
-        prompt = SelfQueryTemplate().create_template()
-        model = ChatOpenAI(model=os.getenv("OPENAI_MODEL_ID"), api_key=os.getenv("OPENAI_API_KEY"), temperature=0)
+        user = self._match_known_author(query)
+        if user is None:
+            chain = self._build_chain()
+
+            response = chain.invoke({"question": query})
+            user_full_name = response.content.strip("\n ")
 
-        chain = prompt | model
+            if user_full_name == "none":
+                return query
 
-        response = chain.invoke({"question": query})
-        user_full_name = response.content.strip("\n ")
+            user = self._get_user(user_full_name)
+
+        query.author_id = user.id
+        query.author_full_name = user.full_name
+
+        return query
+
+    @metrics.track_stage("self_query")
+    async def agenerate(self, query: Query) -> Query:
+        if self._mock:
+            await self._asimulate_llm_call()
 
-        if user_full_name == "none":
             return query
 
-        first_name, last_name = utils.split_user_full_name(user_full_name)
-        user = UserDocument.get_or_create(first_name=first_name, last_name=last_name)
+        user = self._match_known_author(query)
+        if user is None:
+            chain = self._build_chain()
+
+            response = await chain.ainvoke({"question": query})
+            user_full_name = response.content.strip("\n ")
+
+            if user_full_name == "none":
+                return query
+
+            user = await run_in_io_executor(self._get_user, user_full_name)
 
         query.author_id = user.id
         query.author_full_name = user.full_name
 
         return query
 
+    def _build_chain(self):
+        prompt = SelfQueryTemplate().create_template()
+
+        return prompt | self._model
+
+    def _match_known_author(self, query: Query) -> UserDocument | None:
+        if self._author_directory is None:
+            return None
+
+        user = self._author_directory.match(query.content)
+        if user is not None:
+            logger.debug(f"Matched author {user.full_name} locally, skipping the LLM call.")
+
+        return user
+
+    def _get_user(self, user_full_name: str) -> UserDocument:
+        if self._author_directory is not None:
+            user = self._author_directory.resolve(user_full_name)
+            if user is not None:
+                return user
+
+        first_name, last_name = utils.split_user_full_name(user_full_name)
+        user = UserDocument.get_or_create(first_name=first_name, last_name=last_name)
+
+        if self._author_directory is not None:
+            self._author_directory.add(user)
+
+        return user
+
 
 if __name__ == "__main__":
     query = Query.from_str("I am Aquib Ali Khan. Write an article about the best types of advanced RAG methods.")
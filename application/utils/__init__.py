@@ -1,4 +1,4 @@
-from . import misc
+from . import concurrency, metrics, misc
 from .split_user_full_name import split_user_full_name
 
-__all__ = ["misc", "split_user_full_name"]
+__all__ = ["concurrency", "metrics", "misc", "split_user_full_name"]
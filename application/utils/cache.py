@@ -0,0 +1,90 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    A thread-safe, in-process LRU cache with an optional time-to-live.
+
+    Capacity is expressed in arbitrary cost units computed by `sizeof` (one unit per entry by default),
+    which lets callers bound the cache by memory instead of by number of entries.
+    """
+
+    def __init__(self, max_size: int, ttl: float | None = None, sizeof: Callable[[V], int] | None = None) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._sizeof = sizeof or (lambda _: 1)
+
+        self._entries: OrderedDict[K, tuple[V, float, int]] = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+
+                return default
+
+            value, expires_at, _ = entry
+            if expires_at < time.monotonic():
+                self._pop(key)
+                self.misses += 1
+
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return value
+
+    def put(self, key: K, value: V) -> None:
+        size = self._sizeof(value)
+        if size > self._max_size:
+            return
+
+        expires_at = time.monotonic() + self._ttl if self._ttl else float("inf")
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+
+            self._entries[key] = (value, expires_at, size)
+            self._size += size
+
+            while self._size > self._max_size:
+                oldest_key = next(iter(self._entries))
+                self._pop(oldest_key)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size": self._size,
+                "max_size": self._max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _pop(self, key: K) -> None:
+        _, _, size = self._entries.pop(key)
+        self._size -= size
@@ -0,0 +1,105 @@
+import asyncio
+import contextvars
+import functools
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Iterable, Iterator, TypeVar
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+T = TypeVar("T")
+
+_cpu_executor: ThreadPoolExecutor | None = None
+_cpu_executor_lock = Lock()
+
+
+def get_cpu_executor() -> ThreadPoolExecutor:
+    """Return the process-wide bounded executor used for CPU-bound model calls.
+
+    The pool is kept small on purpose: torch already parallelizes each forward pass, so
+    running more than a couple of them at once only oversubscribes the cores.
+    """
+
+    global _cpu_executor
+
+    with _cpu_executor_lock:
+        if _cpu_executor is None:
+            max_workers = int(os.getenv("RAG_CPU_WORKERS", "2"))
+            _cpu_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rag-cpu")
+
+    return _cpu_executor
+
+
+async def run_in_cpu_executor(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking, CPU-bound callable on the bounded CPU executor without blocking the event loop."""
+
+    return await _run_in_executor(get_cpu_executor(), func, *args, **kwargs)
+
+
+async def run_in_io_executor(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking, IO-bound callable (e.g. a boto3 request) on the event loop's default executor."""
+
+    return await _run_in_executor(None, func, *args, **kwargs)
+
+
+def iterate_in_background(iterable: Iterable[T], max_pending: int = 1) -> Iterator[T]:
+    """Consume `iterable` on a background thread, at most `max_pending` items ahead of the caller.
+
+    The producer blocks once `max_pending` items wait to be consumed, so a slow consumer holds back the
+    producer instead of letting items pile up in memory. Exceptions raised by the producer are re-raised here.
+    """
+
+    items: queue.Queue = queue.Queue(maxsize=max(max_pending, 1))
+    stop_event = Event()
+    done = object()
+
+    def put(item: Any) -> bool:
+        while not stop_event.is_set():
+            try:
+                items.put(item, timeout=0.1)
+
+                return True
+            except queue.Full:
+                continue
+
+        return False
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except BaseException as e:
+            put((done, e))
+
+            return
+        put((done, None))
+
+    producer = Thread(target=produce, name="background-iterator", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+
+                return
+            yield item
+    finally:
+        # Unblocks the producer when the consumer stops early.
+        stop_event.set()
+        producer.join()
+
+
+async def _run_in_executor(executor: ThreadPoolExecutor | None, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    # Like `asyncio.to_thread`, propagate the caller's context so tracing spans nest correctly.
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    func_call = functools.partial(context.run, func, *args, **kwargs)
+
+    return await loop.run_in_executor(executor, func_call)
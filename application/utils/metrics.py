@@ -0,0 +1,253 @@
+"""
+In-process metrics rendered in the Prometheus text format, without a client library or an external service.
+
+Use `track_stage` to record the latency, in-flight count and errors of a stage of the RAG path. Components
+that already keep their own counters expose them through `REGISTRY.register_collector`.
+"""
+
+import functools
+import inspect
+import math
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from threading import Lock
+from typing import Callable, Iterator
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _Metric(ABC):
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+
+        self._lock = Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(labelname, "")) for labelname in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        pass
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help, labelnames)
+
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, help, labelnames)
+
+        self._buckets = tuple(sorted(buckets))
+        # Per label set: the count of each bucket (not cumulative) and the sum of the observed values.
+        self._values: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        bucket_index = next((i for i, bound in enumerate(self._buckets) if value <= bound), len(self._buckets))
+        with self._lock:
+            entry = self._values.setdefault(key, [[0] * (len(self._buckets) + 1), 0.0])
+            entry[0][bucket_index] += 1
+            entry[1] += value
+
+    def totals(self) -> dict[tuple[str, ...], tuple[int, float]]:
+        """Returns the number of observations and their sum for each label set."""
+
+        with self._lock:
+            return {key: (sum(counts), total) for key, (counts, total) in self._values.items()}
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        for key, (counts, total) in values.items():
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip((*self._buckets, math.inf), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: dict[str, Callable[[], dict]] = {}
+        self._lock = Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics[metric.name] = metric
+
+        return metric
+
+    def register_collector(self, prefix: str, collect: Callable[[], dict]) -> None:
+        """
+        Exposes the numeric values of the dict returned by `collect` as `<prefix>_<key>` metrics. Nested dicts
+        are flattened into `<prefix>_<key>_<nested key>`. Registering the same prefix again replaces the previous
+        collector.
+        """
+
+        with self._lock:
+            self._collectors[prefix] = collect
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = dict(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for prefix, collect in collectors.items():
+            try:
+                stats = collect()
+            except Exception as e:
+                lines.append(f"# collector {prefix} failed: {e.__class__.__name__}")
+
+                continue
+
+            for name, value in _flatten(stats, prefix):
+                lines.append(f"# TYPE {name} untyped")
+                lines.append(f"{name} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_DURATION = REGISTRY.register(
+    Histogram("rag_stage_duration_seconds", "Latency of each stage of the RAG request path.", labelnames=("stage",))
+)
+STAGE_IN_FLIGHT = REGISTRY.register(
+    Gauge("rag_stage_in_flight", "Calls currently running in each stage of the RAG request path.", labelnames=("stage",))
+)
+STAGE_ERRORS = REGISTRY.register(
+    Counter("rag_stage_errors_total", "Failed calls of each stage of the RAG request path.", labelnames=("stage",))
+)
+
+
+@contextmanager
+def measure_stage(stage: str) -> Iterator[None]:
+    """Records the duration, in-flight count and errors of the wrapped block as `stage`."""
+
+    STAGE_IN_FLIGHT.inc(stage=stage)
+    start_time = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+
+        raise
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - start_time, stage=stage)
+        STAGE_IN_FLIGHT.dec(stage=stage)
+
+
+def stage_totals() -> dict[str, dict[str, float]]:
+    """Returns the number of calls and the total seconds recorded for each stage so far."""
+
+    return {key[0]: {"count": count, "seconds": total} for key, (count, total) in STAGE_DURATION.totals().items()}
+
+
+def track_stage(stage: str) -> Callable:
+    """Decorator version of `measure_stage`, for sync, async and generator functions."""
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.isgeneratorfunction(func):
+
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                # Measured until the generator is exhausted or closed, not just until it's created.
+                with measure_stage(stage):
+                    yield from func(*args, **kwargs)
+
+            return generator_wrapper
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with measure_stage(stage):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with measure_stage(stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _flatten(stats: dict, prefix: str) -> Iterator[tuple[str, float]]:
+    for key, value in stats.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            yield from _flatten(value, name)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+
+    escaped = (f'{key}="{_escape_label_value(value)}"' for key, value in labels.items())
+
+    return "{" + ",".join(escaped) + "}"
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
@@ -1,5 +1,8 @@
-from typing import Generator
+import functools
+import itertools
+from typing import Generator, Iterable, Sequence
 
+import numpy as np
 from transformers import AutoTokenizer
 
 from dotenv import load_dotenv
@@ -19,7 +22,48 @@ def batch(list_: list, size: int) -> Generator[list, None, None]:
     yield from (list_[i : i + size] for i in range(0, len(list_), size))
 
 
+def batch_iterable(iterable: Iterable, size: int) -> Generator[list, None, None]:
+    """Like `batch`, but pulls only `size` items at a time from any iterable, e.g. a database cursor."""
+
+    iterator = iter(iterable)
+    while batch_ := list(itertools.islice(iterator, size)):
+        yield batch_
+
+
+def top_k_indices(scores: Sequence[float], k: int) -> list[int]:
+    """Return the indices of the `k` highest scores, best first, without fully sorting the scores."""
+
+    scores = np.asarray(scores, dtype=np.float32)
+    if k <= 0 or len(scores) == 0:
+        return []
+
+    if k < len(scores):
+        candidate_indices = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidate_indices = np.arange(len(scores))
+
+    return candidate_indices[np.argsort(-scores[candidate_indices], kind="stable")].tolist()
+
+
+@functools.lru_cache(maxsize=8)
+def get_tokenizer(model_id: str | None = None):
+    """Load a tokenizer once per process. Defaults to the tokenizer of the deployed LLM (`HF_MODEL_ID`)."""
+
+    return AutoTokenizer.from_pretrained(model_id or os.getenv("HF_MODEL_ID"))
+
+
 def compute_num_tokens(text: str) -> int:
-    tokenizer = AutoTokenizer.from_pretrained(os.getenv("HF_MODEL_ID"))
+    tokenizer = get_tokenizer()
+
+    return len(tokenizer.encode(text, add_special_tokens=False))
+
+
+def truncate_to_num_tokens(text: str, max_tokens: int) -> str:
+    """Keep at most the first `max_tokens` tokens of `text`."""
+
+    tokenizer = get_tokenizer()
+    token_ids = tokenizer.encode(text, add_special_tokens=False)
+    if len(token_ids) <= max_tokens:
+        return text
 
-    return len(tokenizer.encode(text, add_special_tokens=False))
\ No newline at end of file
+    return tokenizer.decode(token_ids[: max(max_tokens, 0)], skip_special_tokens=True)
@@ -0,0 +1,236 @@
+"""
+Accuracy-vs-latency check of the CPU inference backends of the embedding model and the cross-encoder.
+
+The bundled articles are cleaned and chunked as in the feature pipeline. Then every backend embeds the chunks and the
+benchmark queries, and reranks the top candidates of each query. The results are compared with the fp32 PyTorch
+baseline:
+
+- embeddings: cosine similarity to the baseline vectors and overlap of the top-k retrieved chunks;
+- reranking: agreement on the best candidate and overlap of the top-k after reranking, and the largest score drift.
+
+Examples:
+    python -m benchmarks.backend_accuracy
+    python -m benchmarks.backend_accuracy --backends torch-int8 --max-documents 10
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+# The embedding cache would hide the backends' differences, so it's disabled before the repo modules are imported.
+load_dotenv()
+os.environ["EMBEDDING_CACHE_MAX_BYTES"] = "0"
+os.environ.setdefault("RAG_MODEL_DEVICE", "cpu")
+
+import time  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+import click  # noqa: E402
+import numpy as np  # noqa: E402
+from loguru import logger  # noqa: E402
+from sentence_transformers.cross_encoder import CrossEncoder  # noqa: E402
+from sentence_transformers.SentenceTransformer import SentenceTransformer  # noqa: E402
+
+from application import utils  # noqa: E402
+from application.networks.backends import (  # noqa: E402
+    ModelBackend,
+    configure_cross_encoder,
+    configure_sentence_transformer,
+)
+from application.preprocessing import ChunkingDispatcher, CleaningDispatcher  # noqa: E402
+from domain.documents import ArticleDocument  # noqa: E402
+
+from benchmarks.common import ROOT_DIR, build_report, load_queries, load_raw_documents, save_report  # noqa: E402
+
+
+def load_chunks(max_documents: int | None) -> list[str]:
+    raw_documents = load_raw_documents("ArticleDocument", limit=max_documents)
+    documents = [ArticleDocument.from_mongo(dict(raw_document)) for raw_document in raw_documents]
+    cleaned_documents = [CleaningDispatcher.dispatch(document) for document in documents]
+
+    chunks = utils.misc.flatten([ChunkingDispatcher.dispatch(document) for document in cleaned_documents])
+
+    return [chunk.content for chunk in chunks]
+
+
+def embed(backend: ModelBackend, chunks: list[str], queries: list[str], batch_size: int) -> dict:
+    model_id = os.getenv("TEXT_EMBEDDING_MODEL_ID")
+    model = SentenceTransformer(model_id, device="cpu")
+    model.eval()
+    configure_sentence_transformer(model, backend, model_id=model_id, device="cpu")
+
+    # Warm up outside the measurement: the first call allocates, and the ONNX session compiles its graph.
+    model.encode(chunks[:batch_size], batch_size=batch_size, show_progress_bar=False)
+
+    start_time = time.perf_counter()
+    chunk_embeddings = model.encode(chunks, batch_size=batch_size, show_progress_bar=False)
+    chunk_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    query_embeddings = np.stack([model.encode(query, show_progress_bar=False) for query in queries])
+    query_seconds = time.perf_counter() - start_time
+
+    return {
+        "chunk_embeddings": _normalize(chunk_embeddings),
+        "query_embeddings": _normalize(query_embeddings),
+        "chunks_per_second": round(len(chunks) / chunk_seconds, 3),
+        "query_latency_ms": round(query_seconds / len(queries) * 1000, 3),
+    }
+
+
+def rerank(backend: ModelBackend, queries: list[str], candidates: list[list[str]], batch_size: int) -> dict:
+    model_id = os.getenv("RERANKING_CROSS_ENCODER_MODEL_ID")
+    model = CrossEncoder(
+        model_name=model_id, device="cpu", max_length=int(os.getenv("RERANKING_CROSS_ENCODER_MAX_LENGTH", "512"))
+    )
+    model.model.eval()
+    configure_cross_encoder(model, backend, model_id=model_id, device="cpu")
+
+    model.predict([(queries[0], candidates[0][0])], show_progress_bar=False)
+
+    scores, latencies = [], []
+    for query, query_candidates in zip(queries, candidates, strict=True):
+        start_time = time.perf_counter()
+        query_scores = model.predict(
+            [(query, candidate) for candidate in query_candidates], batch_size=batch_size, show_progress_bar=False
+        )
+        latencies.append(time.perf_counter() - start_time)
+        scores.append(np.asarray(query_scores, dtype=np.float32))
+
+    return {"scores": scores, "rerank_latency_ms": round(float(np.mean(latencies)) * 1000, 3)}
+
+
+def compare_embeddings(baseline: dict, results: dict, top_k: int) -> dict:
+    cosine = np.sum(baseline["chunk_embeddings"] * results["chunk_embeddings"], axis=1)
+    baseline_top_k = _top_k(baseline["query_embeddings"] @ baseline["chunk_embeddings"].T, top_k)
+    results_top_k = _top_k(results["query_embeddings"] @ results["chunk_embeddings"].T, top_k)
+
+    return {
+        "chunks_per_second": results["chunks_per_second"],
+        "query_latency_ms": results["query_latency_ms"],
+        "cosine_to_baseline_mean": round(float(cosine.mean()), 5),
+        "cosine_to_baseline_min": round(float(cosine.min()), 5),
+        f"retrieval_overlap_at_{top_k}": _mean_overlap(baseline_top_k, results_top_k),
+    }
+
+
+def compare_reranking(baseline: dict, results: dict, top_k: int) -> dict:
+    baseline_order = [np.argsort(-scores) for scores in baseline["scores"]]
+    results_order = [np.argsort(-scores) for scores in results["scores"]]
+    score_drift = max(
+        float(np.max(np.abs(baseline_scores - results_scores)))
+        for baseline_scores, results_scores in zip(baseline["scores"], results["scores"], strict=True)
+    )
+
+    return {
+        "rerank_latency_ms": results["rerank_latency_ms"],
+        "top_1_agreement": round(
+            float(np.mean([a[0] == b[0] for a, b in zip(baseline_order, results_order, strict=True)])), 5
+        ),
+        f"rerank_overlap_at_{top_k}": _mean_overlap(
+            [order[:top_k] for order in baseline_order], [order[:top_k] for order in results_order]
+        ),
+        "max_score_drift": round(score_drift, 5),
+    }
+
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+
+    return embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+
+def _top_k(similarities: np.ndarray, k: int) -> list[np.ndarray]:
+    return [np.argsort(-row)[:k] for row in similarities]
+
+
+def _mean_overlap(baseline: list[np.ndarray], results: list[np.ndarray]) -> float:
+    overlaps = [len(set(a.tolist()) & set(b.tolist())) / max(len(a), 1) for a, b in zip(baseline, results, strict=True)]
+
+    return round(float(np.mean(overlaps)), 5)
+
+
+@click.command(help="Compare the accuracy and latency of the CPU inference backends against fp32 PyTorch.")
+@click.option(
+    "--backends",
+    "backend_names",
+    multiple=True,
+    type=click.Choice([backend.value for backend in ModelBackend if backend != ModelBackend.TORCH]),
+    default=[ModelBackend.TORCH_INT8.value, ModelBackend.ONNX.value],
+    help="Backends compared with the fp32 baseline. Repeat for several.",
+)
+@click.option(
+    "--queries",
+    "queries_path",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=ROOT_DIR / "benchmarks" / "queries.jsonl",
+    help="The query corpus, one JSON object with a 'query' key per line.",
+)
+@click.option("--max-documents", default=None, type=int, help="Articles taken from the dump. Defaults to all.")
+@click.option("--top-k", default=3, type=int, help="Retrieved and reranked chunks compared per query.")
+@click.option("--rerank-candidates", default=20, type=int, help="Baseline-retrieved chunks reranked per query.")
+@click.option("--batch-size", default=32, type=int, help="Batch size of both models.")
+@click.option("--output", type=click.Path(dir_okay=False, path_type=Path), default=None, help="Report path.")
+def main(
+    backend_names: tuple[str, ...],
+    queries_path: Path,
+    max_documents: int | None,
+    top_k: int,
+    rerank_candidates: int,
+    batch_size: int,
+    output: Path | None,
+) -> None:
+    queries = load_queries(queries_path)
+    chunks = load_chunks(max_documents)
+    logger.info(f"Comparing backends over {len(chunks)} chunks and {len(queries)} queries.")
+
+    baseline_embeddings = embed(ModelBackend.TORCH, chunks, queries, batch_size=batch_size)
+    # Every backend reranks the same candidates: the baseline's nearest chunks of each query.
+    candidate_indices = _top_k(
+        baseline_embeddings["query_embeddings"] @ baseline_embeddings["chunk_embeddings"].T, rerank_candidates
+    )
+    candidates = [[chunks[i] for i in indices] for indices in candidate_indices]
+    baseline_reranking = rerank(ModelBackend.TORCH, queries, candidates, batch_size=batch_size)
+
+    results = {
+        ModelBackend.TORCH.value: {
+            "embedding": compare_embeddings(baseline_embeddings, baseline_embeddings, top_k),
+            "reranking": compare_reranking(baseline_reranking, baseline_reranking, top_k),
+        }
+    }
+    for backend in map(ModelBackend, backend_names):
+        try:
+            backend_embeddings = embed(backend, chunks, queries, batch_size=batch_size)
+            backend_reranking = rerank(backend, queries, candidates, batch_size=batch_size)
+        except ImportError as e:
+            logger.warning(f"Skipping the '{backend}' backend: {e}")
+
+            results[backend.value] = {"error": str(e)}
+
+            continue
+
+        results[backend.value] = {
+            "embedding": compare_embeddings(baseline_embeddings, backend_embeddings, top_k),
+            "reranking": compare_reranking(baseline_reranking, backend_reranking, top_k),
+        }
+
+    config = {
+        "backends": list(backend_names),
+        "queries": queries_path.name,
+        "max_documents": max_documents,
+        "num_chunks": len(chunks),
+        "top_k": top_k,
+        "rerank_candidates": rerank_candidates,
+        "batch_size": batch_size,
+        "embedding_model_id": os.getenv("TEXT_EMBEDDING_MODEL_ID"),
+        "cross_encoder_model_id": os.getenv("RERANKING_CROSS_ENCODER_MODEL_ID"),
+    }
+    report = build_report("backend-accuracy", config, results)
+    save_report(report, output)
+
+    for backend, backend_results in results.items():
+        logger.info(f"{backend}: {backend_results}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Helpers shared by the benchmarks: loading the sample data, latency statistics and JSON reports that can be
+compared across commits.
+"""
+
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT_DIR / "data" / "data_warehouse_raw_data"
+RESULTS_DIR = ROOT_DIR / "benchmarks" / "results"
+
+
+def load_queries(path: Path) -> list[str]:
+    with path.open() as f:
+        return [json.loads(line)["query"] for line in f if line.strip()]
+
+
+def load_raw_documents(name: str = "ArticleDocument", limit: int | None = None) -> list[dict]:
+    with (DATA_DIR / f"{name}.json").open() as f:
+        documents = json.load(f)
+
+    # Some exports contain documents without content.
+    documents = [document for document in documents if document.get("content")]
+
+    return documents[:limit] if limit else documents
+
+
+def latency_summary(latencies: list[float]) -> dict:
+    """Returns the latency percentiles of `latencies` (seconds) in milliseconds."""
+
+    if len(latencies) == 0:
+        return {"count": 0}
+
+    latencies_ms = np.asarray(latencies, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+
+    return {
+        "count": len(latencies),
+        "mean_ms": round(float(latencies_ms.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(latencies_ms.max()), 3),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Returns the peak resident set size of this process, in MiB."""
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    return round(peak_rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(benchmark: str, config: dict, results: dict) -> dict:
+    return {
+        "benchmark": benchmark,
+        "revision": git_revision(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": config,
+        "results": results,
+    }
+
+
+def save_report(report: dict, output: Path | None) -> Path:
+    if output is None:
+        output = RESULTS_DIR / f"{report['benchmark']}-{report['revision'] or 'unknown'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+
+    logger.info(f"Benchmark report written to {output}")
+
+    return output
+
+
+def compare_reports(report: dict, baseline_path: Path, metrics: dict[str, str], tolerance: float) -> bool:
+    """
+    Compares `report` with a baseline report of the same benchmark.
+
+    Args:
+        report (dict): The report of this run.
+        baseline_path (Path): The report to compare against, e.g. from the previous commit.
+        metrics (dict[str, str]): Dotted paths into `results`, mapped to "lower" or "higher" is better.
+        tolerance (float): The relative change tolerated before a metric counts as a regression.
+
+    Returns:
+        bool: Whether no metric regressed by more than `tolerance`.
+    """
+
+    baseline = json.loads(baseline_path.read_text())
+    if baseline.get("config") != report["config"]:
+        logger.warning("The baseline was run with a different configuration. The comparison may be meaningless.")
+
+    passed = True
+    for path, better in metrics.items():
+        current, previous = _get_path(report["results"], path), _get_path(baseline["results"], path)
+        if current is None or not previous:
+            continue
+
+        change = (current - previous) / previous
+        regressed = change > tolerance if better == "lower" else change < -tolerance
+        passed = passed and not regressed
+
+        log = logger.error if regressed else logger.info
+        log(f"{path}: {previous} -> {current} ({change:+.1%}){' REGRESSION' if regressed else ''}")
+
+    return passed
+
+
+def _get_path(results: dict, path: str):
+    value = results
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+
+    return value
@@ -0,0 +1,234 @@
+"""
+Throughput benchmark of the feature-engineering pipeline: clean -> chunk -> embed -> load.
+
+It runs the same dispatchers as the ZenML steps over the bundled data warehouse dump, outside ZenML, and
+loads the results into an in-process Qdrant. `--scale` replicates the dump with fresh ids to size batch jobs
+beyond the sample data. Every sentence of a replica is tagged with its copy number, so its chunks get their own
+content-hashed ids instead of overwriting the original's points. The embedding cache is disabled too, so
+replicated chunks are embedded again.
+
+Examples:
+    python -m benchmarks.feature_benchmark
+    python -m benchmarks.feature_benchmark --per-document-batches
+    python -m benchmarks.feature_benchmark --scale 4 --baseline benchmarks/results/feature-engineering-abc123.json
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+# Set before the repo modules are imported: they connect to Qdrant and read the environment at import time.
+load_dotenv()
+os.environ["QDRANT_LOCATION"] = ":memory:"
+os.environ["EMBEDDING_CACHE_MAX_BYTES"] = "0"
+
+import re  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+import uuid  # noqa: E402
+from contextlib import contextmanager  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+import click  # noqa: E402
+from loguru import logger  # noqa: E402
+
+from application import utils  # noqa: E402
+from application.networks import EmbeddingModelSingleton  # noqa: E402
+from application.preprocessing import ChunkingDispatcher, EmbeddingDispatcher, clean_documents_in_shards  # noqa: E402
+from domain.base import VectorBaseDocument  # noqa: E402
+from domain.documents import ArticleDocument  # noqa: E402
+
+from benchmarks.common import (  # noqa: E402
+    build_report,
+    compare_reports,
+    load_raw_documents,
+    peak_rss_mb,
+    save_report,
+)
+
+COMPARED_METRICS = {
+    "docs_per_second": "higher",
+    "chunks_per_second": "higher",
+    "peak_rss_mb": "lower",
+}
+
+
+class StageTimer:
+    def __init__(self) -> None:
+        self.seconds: dict[str, float] = {}
+
+    @contextmanager
+    def measure(self, stage: str):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + time.perf_counter() - start_time
+
+
+def load_documents(max_documents: int | None, scale: int) -> list[ArticleDocument]:
+    raw_documents = load_raw_documents("ArticleDocument", limit=max_documents)
+
+    documents = []
+    for copy in range(scale):
+        for raw_document in raw_documents:
+            raw_document = dict(raw_document)
+            if copy > 0:
+                raw_document["_id"] = str(uuid.uuid4())
+                raw_document["content"] = {
+                    key: _mark_copy(value, copy) if isinstance(value, str) else value
+                    for key, value in raw_document["content"].items()
+                }
+            documents.append(ArticleDocument.from_mongo(raw_document))
+
+    return documents
+
+
+def _mark_copy(text: str, copy: int) -> str:
+    """Starts every sentence with a copy marker, so every chunk of the replica differs from the original's."""
+
+    if not text:
+        return text
+
+    # Only whitespace after a sentence end is rewritten, so the chunker splits the sentences at the same places.
+    return f"copy{copy} " + re.sub(r"(?<=[.?!])\s+", f" copy{copy} ", text)
+
+
+def load_to_vector_db(documents: list[VectorBaseDocument], created_collections: set[str]) -> None:
+    for document_class, class_documents in VectorBaseDocument.group_by_class(documents).items():
+        # The embedded Qdrant raises on unknown collections instead of returning the error `bulk_insert` handles.
+        if document_class.get_collection_name() not in created_collections:
+            document_class.create_collection()
+            created_collections.add(document_class.get_collection_name())
+
+        for batch in utils.misc.batch(class_documents, size=4):
+            document_class.bulk_insert(batch)
+
+
+def run_pipeline(
+    documents: list[ArticleDocument],
+    cleaning_workers: int,
+    shard_size: int,
+    per_document_batches: bool,
+    timer: StageTimer,
+) -> dict:
+    created_collections: set[str] = set()
+
+    with timer.measure("clean"):
+        cleaned_documents, shard_timings = clean_documents_in_shards(
+            documents, num_workers=cleaning_workers, shard_size=shard_size
+        )
+
+    with timer.measure("load_cleaned"):
+        load_to_vector_db(cleaned_documents, created_collections)
+
+    with timer.measure("chunk"):
+        chunks_per_document = [ChunkingDispatcher.dispatch(document) for document in cleaned_documents]
+    num_chunks = sum(len(chunks) for chunks in chunks_per_document)
+
+    with timer.measure("embed"):
+        if per_document_batches:
+            # The batching of the pipeline before cross-document batches, kept as a reference point.
+            embedded_chunks = utils.misc.flatten(
+                [EmbeddingDispatcher.dispatch(chunks) for chunks in chunks_per_document]
+            )
+        else:
+            embedded_chunks = EmbeddingDispatcher.dispatch(utils.misc.flatten(chunks_per_document))
+
+    with timer.measure("load_embedded"):
+        load_to_vector_db(embedded_chunks, created_collections)
+
+    return {
+        "num_chunks": num_chunks,
+        "num_embedded_chunks": len(embedded_chunks),
+        # Chunk ids hash the content, so duplicated chunks upsert onto the same Qdrant point.
+        "num_points": len({chunk.id for chunk in embedded_chunks}),
+        "num_shards": len(shard_timings),
+    }
+
+
+@click.command(help="Benchmark the feature-engineering pipeline over the bundled data warehouse dump.")
+@click.option("--max-documents", default=None, type=int, help="Articles taken from the dump. Defaults to all.")
+@click.option("--scale", default=1, type=int, help="How many times the dump is replicated.")
+@click.option("--cleaning-workers", default=1, type=int, help="Cleaning processes. 0 for one per CPU.")
+@click.option("--shard-size", default=32, type=int, help="Documents per cleaning task.")
+@click.option(
+    "--per-document-batches/--cross-document-batches",
+    default=False,
+    help="Batch the chunks of each document on their own, as the pipeline used to.",
+)
+@click.option("--output", type=click.Path(dir_okay=False, path_type=Path), default=None, help="Report path.")
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="A previous report to compare with. Exits with 1 on a regression.",
+)
+@click.option("--tolerance", default=0.1, type=float, help="Relative change tolerated before a regression.")
+def main(
+    max_documents: int | None,
+    scale: int,
+    cleaning_workers: int,
+    shard_size: int,
+    per_document_batches: bool,
+    output: Path | None,
+    baseline: Path | None,
+    tolerance: float,
+) -> None:
+    timer = StageTimer()
+
+    # Load the model outside the measured stages.
+    EmbeddingModelSingleton()
+
+    with timer.measure("read"):
+        documents = load_documents(max_documents, scale)
+    logger.info(f"Benchmarking the feature pipeline over {len(documents)} documents.")
+
+    start_time = time.perf_counter()
+    counts = run_pipeline(
+        documents,
+        cleaning_workers=cleaning_workers,
+        shard_size=shard_size,
+        per_document_batches=per_document_batches,
+        timer=timer,
+    )
+    elapsed = time.perf_counter() - start_time
+
+    results = {
+        "num_documents": len(documents),
+        **counts,
+        "elapsed_seconds": round(elapsed, 3),
+        "docs_per_second": round(len(documents) / elapsed, 3),
+        "chunks_per_second": round(counts["num_chunks"] / elapsed, 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {
+            stage: {"seconds": round(seconds, 3), "share": round(seconds / elapsed, 3)}
+            for stage, seconds in timer.seconds.items()
+        },
+    }
+    config = {
+        "max_documents": max_documents,
+        "scale": scale,
+        "cleaning_workers": cleaning_workers,
+        "shard_size": shard_size,
+        "embed_batch_size": int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "128")),
+        "embed_batch_tokens": int(os.getenv("EMBEDDING_MAX_BATCH_TOKENS", "16384")),
+        "per_document_batches": per_document_batches,
+        "embedding_model_id": EmbeddingModelSingleton().model_id,
+    }
+    report = build_report("feature-engineering", config, results)
+    save_report(report, output)
+
+    logger.info(
+        f"{results['docs_per_second']} docs/s | {results['chunks_per_second']} chunks/s | "
+        f"peak RSS {results['peak_rss_mb']} MiB"
+    )
+    for stage, stage_results in results["stages"].items():
+        logger.info(f"{stage}: {stage_results}")
+
+    if baseline is not None and not compare_reports(report, baseline, COMPARED_METRICS, tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
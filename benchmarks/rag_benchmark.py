@@ -0,0 +1,309 @@
+"""
+Offline latency and throughput benchmark of the RAG request path.
+
+Everything external is replaced by a local stand-in:
+
+- Qdrant runs in-process (`QDRANT_LOCATION=:memory:`), seeded with the sample articles in `data/`.
+- SelfQuery and QueryExpansion run in mock mode and answer deterministically after `--llm-latency` seconds.
+- The LLM is the fake SageMaker client, generating a fixed answer with `--token-latency` seconds per token.
+
+The embedding model and the cross-encoder are the real ones, so their cost is measured as in production.
+
+Examples:
+    python -m benchmarks.rag_benchmark --target retriever --concurrency 4
+    python -m benchmarks.rag_benchmark --target api --concurrency 8 --baseline benchmarks/results/rag-abc123.json
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+# Set before the repo modules are imported: they connect to Qdrant and read the environment at import time.
+# The stand-ins are forced so a benchmark never reaches a real service, whatever the .env says.
+load_dotenv()
+os.environ["QDRANT_LOCATION"] = ":memory:"
+os.environ["SAGEMAKER_USE_FAKE_CLIENT"] = "true"
+os.environ["LLM_INFERENCE_BACKEND"] = "sagemaker"
+os.environ["SEMANTIC_CACHE_ENABLED"] = "false"
+if os.getenv("BENCHMARK_TRACING", "false").strip().lower() != "true":
+    os.environ["COMET_API_KEY"] = ""
+os.environ.setdefault("HF_MODEL_ID", "HuggingFaceTB/SmolLM2-135M-Instruct")
+os.environ.setdefault("MAX_NEW_TOKENS_INFERENCE", "150")
+os.environ.setdefault("TOP_P_INFERENCE", "0.9")
+os.environ.setdefault("TEMPERATURE_INFERENCE", "0.01")
+
+import asyncio  # noqa: E402
+import pickle  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+import click  # noqa: E402
+import httpx  # noqa: E402
+from loguru import logger  # noqa: E402
+from qdrant_client.http.models import Distance, VectorParams  # noqa: E402
+
+from application.networks import EmbeddingModelSingleton  # noqa: E402
+from application.preprocessing import ChunkingDispatcher, CleaningDispatcher, EmbeddingDispatcher  # noqa: E402
+from application.rag.query_expanison import QueryExpansion  # noqa: E402
+from application.rag.reranking import Reranker  # noqa: E402
+from application.rag.retriever import ContextRetriever  # noqa: E402
+from application.rag.self_query import SelfQuery  # noqa: E402
+from application.utils import metrics, misc  # noqa: E402
+from domain.base import VectorBaseDocument  # noqa: E402
+from domain.documents import ArticleDocument  # noqa: E402
+from domain.embedded_chunks import EmbeddedChunk  # noqa: E402
+from infrastructure.db.qdrant import async_connection  # noqa: E402
+from infrastructure.inference_pipeline_api import app  # noqa: E402
+from infrastructure.resources import RAGResources  # noqa: E402
+from model.inference import create_inference_backend  # noqa: E402
+
+from benchmarks.common import (  # noqa: E402
+    ROOT_DIR,
+    build_report,
+    compare_reports,
+    latency_summary,
+    load_queries,
+    load_raw_documents,
+    save_report,
+)
+
+CACHE_DIR = ROOT_DIR / "benchmarks" / ".cache"
+
+# Metrics compared against the baseline, and whether lower or higher is better.
+COMPARED_METRICS = {
+    "latency.p50_ms": "lower",
+    "latency.p95_ms": "lower",
+    "latency.p99_ms": "lower",
+    "qps": "higher",
+}
+
+
+def build_embedded_chunks(max_documents: int) -> list[EmbeddedChunk]:
+    """Cleans, chunks and embeds the sample articles. The result is cached on disk per model and size."""
+
+    model_id = EmbeddingModelSingleton().model_id.replace("/", "--")
+    cache_path = CACHE_DIR / f"embedded-articles-{max_documents}-{model_id}.pkl"
+    if cache_path.exists():
+        logger.info(f"Loading the embedded chunks from {cache_path}")
+
+        return pickle.loads(cache_path.read_bytes())
+
+    raw_documents = load_raw_documents("ArticleDocument", limit=max_documents)
+    documents = [ArticleDocument.from_mongo(dict(raw_document)) for raw_document in raw_documents]
+    cleaned_documents = [CleaningDispatcher.dispatch(document) for document in documents]
+    chunks = misc.flatten([ChunkingDispatcher.dispatch(document) for document in cleaned_documents])
+    embedded_chunks = misc.flatten([EmbeddingDispatcher.dispatch(batch) for batch in misc.batch(chunks, 32)])
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cache_path.write_bytes(pickle.dumps(embedded_chunks))
+
+    return embedded_chunks
+
+
+async def seed_vector_db(embedded_chunks: list[EmbeddedChunk]) -> None:
+    """Loads the chunks into both in-memory Qdrant stores: the sync and async clients don't share one."""
+
+    vectors_config = VectorParams(size=EmbeddingModelSingleton().embedding_size, distance=Distance.COSINE)
+    for document_class in ContextRetriever._data_categories:
+        document_class.create_collection()
+        await async_connection.create_collection(
+            collection_name=document_class.get_collection_name(), vectors_config=vectors_config
+        )
+
+    for document_class, documents in VectorBaseDocument.group_by_class(embedded_chunks).items():
+        document_class.bulk_insert(documents)
+        await async_connection.upsert(
+            collection_name=document_class.get_collection_name(),
+            points=[document.to_point() for document in documents],
+        )
+
+    logger.info(f"Seeded the vector DB with {len(embedded_chunks)} chunks.")
+
+
+def build_resources(llm_latency: float, mock_rerank: bool) -> RAGResources:
+    retriever = ContextRetriever(
+        mock=True,
+        query_expander=QueryExpansion(mock=True, mock_latency=llm_latency, mock_distinct_queries=True),
+        metadata_extractor=SelfQuery(mock=True, mock_latency=llm_latency),
+        reranker=Reranker(mock=mock_rerank),
+    )
+
+    return RAGResources(retriever=retriever, endpoint=create_inference_backend())
+
+
+async def run_load(request, queries: list[str], concurrency: int) -> tuple[list[float], int, float]:
+    """Sends every query through `request` with at most `concurrency` in flight, in corpus order."""
+
+    latencies, errors = [], 0
+    pending = iter(queries)
+
+    async def worker() -> None:
+        nonlocal errors
+        for query in pending:
+            start_time = time.perf_counter()
+            try:
+                await request(query)
+            except Exception:
+                logger.exception("Benchmark request failed.")
+
+                errors += 1
+
+                continue
+            latencies.append(time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+    return latencies, errors, time.perf_counter() - start_time
+
+
+def stage_breakdown(before: dict, after: dict, num_requests: int) -> dict:
+    breakdown = {}
+    for stage, totals in sorted(after.items()):
+        count = totals["count"] - before.get(stage, {}).get("count", 0)
+        seconds = totals["seconds"] - before.get(stage, {}).get("seconds", 0.0)
+        if count == 0:
+            continue
+
+        breakdown[stage] = {
+            "calls": count,
+            "mean_ms": round(seconds / count * 1000, 3),
+            "ms_per_request": round(seconds / max(num_requests, 1) * 1000, 3),
+        }
+
+    return breakdown
+
+
+async def benchmark(
+    target: str,
+    queries: list[str],
+    embedded_chunks: list[EmbeddedChunk],
+    concurrency: int,
+    warmup: int,
+    llm_latency: float,
+    mock_rerank: bool,
+) -> dict:
+    await seed_vector_db(embedded_chunks)
+
+    resources = build_resources(llm_latency=llm_latency, mock_rerank=mock_rerank)
+
+    if target == "retriever":
+
+        async def request(query: str) -> None:
+            await resources.retriever.asearch(query, k=3)
+
+        client = None
+    else:
+        # ASGITransport doesn't run the lifespan, so inject the offline resources directly.
+        app.state.resources = resources
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=None)
+
+        async def request(query: str) -> None:
+            response = await client.post("/rag", json={"query": query})
+            response.raise_for_status()
+
+    try:
+        for query in queries[:warmup]:
+            await request(query)
+
+        stages_before = metrics.stage_totals()
+        latencies, errors, elapsed = await run_load(request, queries, concurrency)
+        stages_after = metrics.stage_totals()
+    finally:
+        if client is not None:
+            await client.aclose()
+        resources.close()
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "qps": round(len(latencies) / elapsed, 3) if elapsed > 0 else 0.0,
+        "latency": latency_summary(latencies),
+        "stages": stage_breakdown(stages_before, stages_after, len(latencies)),
+        "reranker": resources.retriever.reranker.stats(),
+        "embedding_cache": EmbeddingModelSingleton().cache_stats,
+        "llm_batcher": resources.llm.stats() if target == "api" else {},
+    }
+
+
+@click.command(help="Benchmark the RAG request path offline with local stand-ins for every external service.")
+@click.option("--target", type=click.Choice(["retriever", "api"]), default="api", help="What to drive.")
+@click.option(
+    "--queries",
+    "queries_path",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=ROOT_DIR / "benchmarks" / "queries.jsonl",
+    help="The replayable query corpus, one JSON object with a 'query' key per line.",
+)
+@click.option("--repeat", default=3, type=int, help="How many times the corpus is replayed.")
+@click.option("--concurrency", default=4, type=int, help="Requests in flight at any time.")
+@click.option("--warmup", default=3, type=int, help="Queries sent before measuring.")
+@click.option("--max-documents", default=20, type=int, help="Sample articles loaded into the vector DB.")
+@click.option("--llm-latency", default=0.2, type=float, help="Simulated round trip of the SelfQuery/expansion LLM.")
+@click.option("--token-latency", default=0.005, type=float, help="Simulated decoding time per generated token.")
+@click.option("--mock-rerank/--no-mock-rerank", default=False, help="Skip the cross-encoder.")
+@click.option("--output", type=click.Path(dir_okay=False, path_type=Path), default=None, help="Report path.")
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="A previous report to compare with. Exits with 1 on a regression.",
+)
+@click.option("--tolerance", default=0.1, type=float, help="Relative change tolerated before a regression.")
+def main(
+    target: str,
+    queries_path: Path,
+    repeat: int,
+    concurrency: int,
+    warmup: int,
+    max_documents: int,
+    llm_latency: float,
+    token_latency: float,
+    mock_rerank: bool,
+    output: Path | None,
+    baseline: Path | None,
+    tolerance: float,
+) -> None:
+    os.environ["SAGEMAKER_FAKE_TOKEN_LATENCY"] = str(token_latency)
+
+    queries = load_queries(queries_path) * repeat
+    embedded_chunks = build_embedded_chunks(max_documents)
+
+    results = asyncio.run(
+        benchmark(
+            target=target,
+            queries=queries,
+            embedded_chunks=embedded_chunks,
+            concurrency=concurrency,
+            warmup=warmup,
+            llm_latency=llm_latency,
+            mock_rerank=mock_rerank,
+        )
+    )
+    config = {
+        "target": target,
+        "queries": queries_path.name,
+        "repeat": repeat,
+        "concurrency": concurrency,
+        "warmup": warmup,
+        "max_documents": max_documents,
+        "llm_latency": llm_latency,
+        "token_latency": token_latency,
+        "mock_rerank": mock_rerank,
+        "embedding_model_id": EmbeddingModelSingleton().model_id,
+    }
+    report = build_report(f"rag-{target}", config, results)
+    save_report(report, output)
+
+    logger.info(f"QPS: {results['qps']} | latency: {results['latency']}")
+    for stage, breakdown in results["stages"].items():
+        logger.info(f"{stage}: {breakdown}")
+
+    if baseline is not None and not compare_reports(report, baseline, COMPARED_METRICS, tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
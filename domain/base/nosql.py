@@ -1,6 +1,6 @@
 import uuid
 from abc import ABC
-from typing import Generic, Type, TypeVar
+from typing import Generic, Iterator, Type, TypeVar
 
 from loguru import logger
 from pydantic import UUID4, BaseModel, Field
@@ -134,6 +134,17 @@ class NoSQLBaseDocument(BaseModel, Generic[T], ABC):
 
             return []
 
+    @classmethod
+    def iter_find(cls: Type[T], batch_size: int = 100, **filter_options) -> Iterator[T]:
+        """Like `bulk_find`, but yields the documents from the cursor, `batch_size` per round trip."""
+
+        collection = _database[cls.get_collection_name()]
+        try:
+            for instance in collection.find(filter_options).batch_size(batch_size):
+                yield cls.from_mongo(instance)
+        except errors.OperationFailure:
+            logger.error("Failed to retrieve documents")
+
     @classmethod
     def get_collection_name(cls: Type[T]) -> str:
         if not hasattr(cls, "Settings") or not hasattr(cls.Settings, "name"):
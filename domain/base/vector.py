@@ -1,6 +1,6 @@
 import uuid
 from abc import ABC
-from typing import Any, Callable, Dict, Generic, Type, TypeVar
+from typing import Any, Callable, Dict, Generic, Iterator, Optional, Type, TypeVar
 from uuid import UUID
 
 import numpy as np
@@ -8,12 +8,13 @@ from loguru import logger
 from pydantic import UUID4, BaseModel, Field
 from qdrant_client.http import exceptions
 from qdrant_client.http.models import Distance, VectorParams
-from qdrant_client.models import CollectionInfo, PointStruct, Record
+from qdrant_client.models import CollectionInfo, Filter, PointIdsList, PointStruct, Record, SearchRequest
 
 from application.networks.embeddings import EmbeddingModelSingleton
+from application.utils import metrics
 from domain.exceptions import ImproperlyConfigured
 from domain.types import DataCategory
-from infrastructure.db.qdrant import connection
+from infrastructure.db.qdrant import async_connection, connection
 
 T = TypeVar("T", bound="VectorBaseDocument")
 
@@ -41,6 +42,8 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
         }
         if cls._has_class_attribute("embedding"):
             attributes["embedding"] = point.vector or None
+        if cls._has_class_attribute("score") and getattr(point, "score", None) is not None:
+            attributes["score"] = point.score
 
         return cls(**attributes)
 
@@ -52,7 +55,7 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
 
         _id = str(payload.pop("id"))
         vector = payload.pop("embedding", {})
-        if vector and isinstance(vector, np.ndarray):
+        if isinstance(vector, np.ndarray):
             vector = vector.tolist()
 
         return PointStruct(id=_id, vector=vector, payload=payload)
@@ -135,6 +138,48 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
         return documents, next_offset
 
     @classmethod
+    def scroll_records(
+        cls: Type[T], query_filter: Filter | None = None, with_payload: bool | list[str] = False, batch_size: int = 256
+    ) -> Iterator[Record]:
+        """Yields the raw records matching `query_filter`, without vectors, `batch_size` per request."""
+
+        offset = None
+        while True:
+            try:
+                records, offset = connection.scroll(
+                    collection_name=cls.get_collection_name(),
+                    scroll_filter=query_filter,
+                    limit=batch_size,
+                    offset=offset,
+                    with_payload=with_payload,
+                    with_vectors=False,
+                )
+            except exceptions.UnexpectedResponse:
+                logger.error(f"Failed to scroll documents in '{cls.get_collection_name()}'.")
+
+                return
+
+            yield from records
+
+            if offset is None:
+                return
+
+    @classmethod
+    def bulk_delete(cls: Type[T], ids: list[UUID | str]) -> bool:
+        try:
+            connection.delete(
+                collection_name=cls.get_collection_name(),
+                points_selector=PointIdsList(points=[str(id_) for id_ in ids]),
+            )
+        except exceptions.UnexpectedResponse:
+            logger.error(f"Failed to delete documents from '{cls.get_collection_name()}'.")
+
+            return False
+
+        return True
+
+    @classmethod
+    @metrics.track_stage("vector_search")
     def search(cls: Type[T], query_vector: list, limit: int = 10, **kwargs) -> list[T]:
         try:
             documents = cls._search(query_vector=query_vector, limit=limit, **kwargs)
@@ -160,6 +205,128 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
 
         return documents
 
+    @classmethod
+    @metrics.track_stage("vector_search")
+    async def asearch(cls: Type[T], query_vector: list, limit: int = 10, **kwargs) -> list[T]:
+        try:
+            documents = await cls._asearch(query_vector=query_vector, limit=limit, **kwargs)
+        except exceptions.UnexpectedResponse:
+            logger.error(f"Failed to search documents in '{cls.get_collection_name()}'.")
+
+            documents = []
+
+        return documents
+
+    @classmethod
+    async def _asearch(cls: Type[T], query_vector: list, limit: int = 10, **kwargs) -> list[T]:
+        collection_name = cls.get_collection_name()
+        records = await async_connection.search(
+            collection_name=collection_name,
+            query_vector=query_vector,
+            limit=limit,
+            with_payload=kwargs.pop("with_payload", True),
+            with_vectors=kwargs.pop("with_vectors", False),
+            **kwargs,
+        )
+        documents = [cls.from_record(record) for record in records]
+
+        return documents
+
+    @classmethod
+    @metrics.track_stage("vector_search")
+    def search_batch(
+        cls: Type[T],
+        query_vectors: list[list],
+        limit: int = 10,
+        query_filters: list[Optional[Filter]] | None = None,
+        **kwargs,
+    ) -> list[list[T]]:
+        """Runs one search per query vector against this collection in a single network round trip."""
+
+        try:
+            documents = cls._search_batch(query_vectors=query_vectors, limit=limit, query_filters=query_filters, **kwargs)
+        except exceptions.UnexpectedResponse:
+            logger.error(f"Failed to batch search documents in '{cls.get_collection_name()}'.")
+
+            documents = [[] for _ in query_vectors]
+
+        return documents
+
+    @classmethod
+    def _search_batch(
+        cls: Type[T],
+        query_vectors: list[list],
+        limit: int = 10,
+        query_filters: list[Optional[Filter]] | None = None,
+        **kwargs,
+    ) -> list[list[T]]:
+        collection_name = cls.get_collection_name()
+        requests = cls._build_search_requests(query_vectors, limit=limit, query_filters=query_filters, **kwargs)
+
+        batch_records = connection.search_batch(collection_name=collection_name, requests=requests)
+        documents = [[cls.from_record(record) for record in records] for records in batch_records]
+
+        return documents
+
+    @classmethod
+    @metrics.track_stage("vector_search")
+    async def asearch_batch(
+        cls: Type[T],
+        query_vectors: list[list],
+        limit: int = 10,
+        query_filters: list[Optional[Filter]] | None = None,
+        **kwargs,
+    ) -> list[list[T]]:
+        try:
+            documents = await cls._asearch_batch(
+                query_vectors=query_vectors, limit=limit, query_filters=query_filters, **kwargs
+            )
+        except exceptions.UnexpectedResponse:
+            logger.error(f"Failed to batch search documents in '{cls.get_collection_name()}'.")
+
+            documents = [[] for _ in query_vectors]
+
+        return documents
+
+    @classmethod
+    async def _asearch_batch(
+        cls: Type[T],
+        query_vectors: list[list],
+        limit: int = 10,
+        query_filters: list[Optional[Filter]] | None = None,
+        **kwargs,
+    ) -> list[list[T]]:
+        collection_name = cls.get_collection_name()
+        requests = cls._build_search_requests(query_vectors, limit=limit, query_filters=query_filters, **kwargs)
+
+        batch_records = await async_connection.search_batch(collection_name=collection_name, requests=requests)
+        documents = [[cls.from_record(record) for record in records] for records in batch_records]
+
+        return documents
+
+    @classmethod
+    def _build_search_requests(
+        cls: Type[T],
+        query_vectors: list[list],
+        limit: int = 10,
+        query_filters: list[Optional[Filter]] | None = None,
+        **kwargs,
+    ) -> list[SearchRequest]:
+        if query_filters is None:
+            query_filters = [None] * len(query_vectors)
+        assert len(query_filters) == len(query_vectors), "Expected one query filter per query vector."
+
+        return [
+            SearchRequest(
+                vector=query_vector,
+                filter=query_filter,
+                limit=limit,
+                with_payload=kwargs.get("with_payload", True),
+                with_vector=kwargs.get("with_vectors", False),
+            )
+            for query_vector, query_filter in zip(query_vectors, query_filters, strict=True)
+        ]
+
     @classmethod
     def get_or_create_collection(cls: Type[T]) -> CollectionInfo:
         collection_name = cls.get_collection_name()
@@ -1,34 +1,59 @@
 from abc import ABC
+from typing import Annotated, Any
 
-from pydantic import UUID4, Field
+import numpy as np
+from pydantic import UUID4, Field, PlainSerializer, PlainValidator
 
 from domain.types import DataCategory
 from .base import VectorBaseDocument
 
 
+def _validate_embedding(value: Any) -> list[float] | np.ndarray | None:
+    if value is None or isinstance(value, np.ndarray):
+        return value
+
+    return [float(item) for item in value]
+
+
+def _serialize_embedding(value: list[float] | np.ndarray | None) -> list[float] | None:
+    return value.tolist() if isinstance(value, np.ndarray) else value
+
+
+# An optional embedding. Freshly embedded chunks keep the engine's float32 rows, converted to lists only in `to_point`
+# or in JSON.
+Embedding = Annotated[Any, PlainValidator(_validate_embedding), PlainSerializer(_serialize_embedding, when_used="json")]
+
+
 class EmbeddedChunk(VectorBaseDocument, ABC):
     content: str
-    embedding: list[float] | None
+    embedding: Embedding
     platform: str
     document_id: UUID4
     author_id: UUID4
     author_full_name: str
     metadata: dict = Field(default_factory=dict)
+    # Similarity to the query that retrieved the chunk. Only set on search results and never persisted.
+    score: float | None = Field(default=None, exclude=True)
 
     @classmethod
     def to_context(cls, chunks: list["EmbeddedChunk"]) -> str:
         context = ""
         for i, chunk in enumerate(chunks):
-            context += f"""
-            Chunk {i + 1}:
-            Type: {chunk.__class__.__name__}
-            Platform: {chunk.platform}
-            Author: {chunk.author_full_name}
-            Content: {chunk.content}\n
-            """
+            context += chunk.to_context_entry(i)
 
         return context
 
+    def to_context_entry(self, index: int, content: str | None = None) -> str:
+        """Formats the chunk as the `index`-th entry of the LLM context, optionally with truncated `content`."""
+
+        return f"""
+            Chunk {index + 1}:
+            Type: {self.__class__.__name__}
+            Platform: {self.platform}
+            Author: {self.author_full_name}
+            Content: {self.content if content is None else content}\n
+            """
+
 
 class EmbeddedPostChunk(EmbeddedChunk):
     class Config:
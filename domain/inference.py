@@ -1,4 +1,13 @@
+import asyncio
+import functools
+import os
 from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+from dotenv import load_dotenv
+from pydantic import BaseModel, ConfigDict
+
+load_dotenv()
 
 
 class DeploymentStrategy(ABC):
@@ -7,16 +16,68 @@ class DeploymentStrategy(ABC):
         pass
 
 
+class InferenceParameters(BaseModel):
+    """Immutable generation parameters. Use `merge` to derive a validated per-call variant."""
+
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
+    max_new_tokens: int
+    top_p: float
+    temperature: float
+    repetition_penalty: Optional[float] = None
+    return_full_text: bool = False
+
+    @classmethod
+    @functools.cache
+    def from_env(cls) -> "InferenceParameters":
+        """Parses the default parameters from the environment once per process."""
+
+        return cls(
+            max_new_tokens=int(os.getenv("MAX_NEW_TOKENS_INFERENCE")),
+            top_p=float(os.getenv("TOP_P_INFERENCE")),
+            temperature=float(os.getenv("TEMPERATURE_INFERENCE")),
+        )
+
+    def merge(self, parameters: "InferenceParameters | dict | None") -> "InferenceParameters":
+        if parameters is None:
+            return self
+        if isinstance(parameters, InferenceParameters):
+            parameters = parameters.model_dump(exclude_unset=True)
+
+        # `model_copy(update=...)` skips validation, so unknown keys and wrong types would reach the endpoint.
+        return self.model_validate({**self.model_dump(), **parameters})
+
+    def to_payload(self) -> dict:
+        return self.model_dump(exclude_none=True)
+
+
 class Inference(ABC):
-    """An abstract class for performing inference."""
+    """
+    An abstract class for performing inference.
+
+    Every call receives its own inputs and parameters and implementations keep no per-call state, so a
+    single instance can be shared across threads and asyncio tasks.
+    """
+
+    # Whether `invoke` accepts a payload whose `inputs` is a list of prompts, as the batcher sends.
+    supports_batched_inputs: bool = False
 
     def __init__(self):
         self.model = None
 
     @abstractmethod
-    def set_payload(self, inputs, parameters=None):
+    def inference(self, inputs: str, parameters: InferenceParameters | dict | None = None) -> Any:
         pass
 
-    @abstractmethod
-    def inference(self):
-        pass
+    async def ainference(self, inputs: str, parameters: InferenceParameters | dict | None = None) -> Any:
+        """Async counterpart of `inference`. Defaults to running `inference` in a worker thread."""
+
+        return await asyncio.to_thread(self.inference, inputs, parameters)
+
+    def inference_stream(self, inputs: str, parameters: InferenceParameters | dict | None = None):
+        """Yields the generated tokens as they are produced. Backends without streaming yield the whole answer."""
+
+        yield self.inference(inputs, parameters)[0]["generated_text"]
+
+    def close(self) -> None:
+        """Releases the connections or models held by the backend."""
@@ -1,37 +1,65 @@
 import os
 from loguru import logger
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http.exceptions import UnexpectedResponse
 from dotenv import load_dotenv
 
 load_dotenv()  # Load .env file
 
+
+def _client_kwargs() -> tuple[dict, str]:
+    # ":memory:" runs an embedded Qdrant in the process, e.g. for benchmarks. The sync and async clients
+    # then each get their own store.
+    location = os.getenv("QDRANT_LOCATION", "").strip()
+    if location:
+        return {"location": location}, location
+
+    use_qdrant_cloud = os.getenv("USE_QDRANT_CLOUD", "False").strip().lower() == "true"
+
+    if use_qdrant_cloud:
+        url = os.getenv("QDRANT_CLOUD_URL", "").strip()
+        api_key = os.getenv("QDRANT_APIKEY", "").strip()
+
+        return {"url": url, "api_key": api_key}, url
+
+    host = os.getenv("QDRANT_DATABASE_HOST", "localhost").strip()
+    port = int(os.getenv("QDRANT_DATABASE_PORT", "6333").strip())
+
+    return {"host": host, "port": port}, f"{host}:{port}"
+
+
 class QdrantDatabaseConnector:
     _instance: QdrantClient | None = None
 
     def __new__(cls, *args, **kwargs) -> QdrantClient:
         if cls._instance is None:
             try:
-                use_qdrant_cloud = os.getenv("USE_QDRANT_CLOUD", "False").strip().lower() == "true"
+                client_kwargs, uri = _client_kwargs()
+                cls._instance = QdrantClient(**client_kwargs)
 
-                if use_qdrant_cloud:
-                    url = os.getenv("QDRANT_CLOUD_URL", "").strip()
-                    api_key = os.getenv("QDRANT_APIKEY", "").strip()
+                logger.info(f"✅ Connected to Qdrant DB: {uri}")
+            except Exception as e:
+                logger.exception("❌ Failed to connect to Qdrant DB")
+                raise
 
-                    cls._instance = QdrantClient(url=url, api_key=api_key)
-                    uri = url
-                else:
-                    host = os.getenv("QDRANT_DATABASE_HOST", "localhost").strip()
-                    port = int(os.getenv("QDRANT_DATABASE_PORT", "6333").strip())
+        return cls._instance
 
-                    cls._instance = QdrantClient(host=host, port=port)
-                    uri = f"{host}:{port}"
 
-                logger.info(f"✅ Connected to Qdrant DB: {uri}")
+class AsyncQdrantDatabaseConnector:
+    _instance: AsyncQdrantClient | None = None
+
+    def __new__(cls, *args, **kwargs) -> AsyncQdrantClient:
+        if cls._instance is None:
+            try:
+                client_kwargs, uri = _client_kwargs()
+                cls._instance = AsyncQdrantClient(**client_kwargs)
+
+                logger.info(f"✅ Connected to Qdrant DB (async): {uri}")
             except Exception as e:
-                logger.exception("❌ Failed to connect to Qdrant DB")
+                logger.exception("❌ Failed to connect to Qdrant DB (async)")
                 raise
 
         return cls._instance
 
 connection = QdrantDatabaseConnector()
+async_connection = AsyncQdrantDatabaseConnector()
@@ -1,13 +1,24 @@
-import opik
-from fastapi import FastAPI, HTTPException
-from opik import opik_context
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Iterator
+
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from loguru import logger
 from pydantic import BaseModel
 
+from application.networks import EmbeddingModelSingleton
+from application.rag.context_packer import ContextPacker, PackedContext
 from application.rag.retriever import ContextRetriever
-from application.utils import misc
-from domain.embedded_chunks import EmbeddedChunk
+from application.utils import metrics, misc
+from application.utils.concurrency import run_in_cpu_executor
+from domain.inference import Inference
+from infrastructure import tracing
 from infrastructure.opik_utils import configure_opik
-from model.inference import InferenceExecutor, LLMInferenceSagemakerEndpoint
+from infrastructure.resources import RAGResources
+from model.inference import InferenceExecutor, create_inference_backend
+from model.inference.run import DEFAULT_PROMPT
 
 from dotenv import load_dotenv
 import os
@@ -18,7 +29,19 @@ load_dotenv()
 
 configure_opik()
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.resources = RAGResources.build()
+    app.state.resources.register_metrics()
+    try:
+        yield
+    finally:
+        app.state.resources.close()
+        tracing.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 class QueryRequest(BaseModel):
@@ -29,44 +52,182 @@ class QueryResponse(BaseModel):
     answer: str
 
 
-@opik.track
-def call_llm_service(query: str, context: str | None) -> str:
-    llm = LLMInferenceSagemakerEndpoint(
-        endpoint_name=os.getenv("SAGEMAKER_ENDPOINT_INFERENCE"), inference_component_name=None
-    )
+def get_resources(request: Request) -> RAGResources:
+    return request.app.state.resources
+
+
+def build_trace_metadata(packed: PackedContext, answer_tokens: int) -> dict:
+    return {
+        "model_id": os.getenv("HF_MODEL_ID"),
+        "embedding_model_id": os.getenv("TEXT_EMBEDDING_MODEL_ID"),
+        "temperature": float(os.getenv("TEMPERATURE_INFERENCE")),
+        "query_tokens": packed.query_tokens,
+        "context_tokens": packed.context_tokens,
+        "answer_tokens": answer_tokens,
+        "context_chunks": len(packed.chunks),
+        "dropped_chunks": packed.dropped_chunks,
+    }
+
+
+@tracing.track
+def call_llm_service(query: str, context: str | None, llm: Inference | None = None) -> str:
+    if llm is None:
+        llm = create_inference_backend()
     answer = InferenceExecutor(llm, query, context).execute()
 
     return answer
 
 
-@opik.track
-def rag(query: str) -> str:
-    retriever = ContextRetriever(mock=False)
+@tracing.track
+@metrics.track_stage("rag")
+def rag(query: str, resources: RAGResources | None = None) -> str:
+    retriever = resources.retriever if resources else ContextRetriever(mock=False)
+    context_packer = resources.context_packer if resources else ContextPacker.from_env()
     documents = retriever.search(query, k=3)
-    context = EmbeddedChunk.to_context(documents)
-
-    answer = call_llm_service(query, context)
-
-    opik_context.update_current_trace(
-        tags=["rag"],
-        metadata={
-            "model_id": os.getenv("HF_MODEL_ID"),
-            "embedding_model_id": os.getenv("TEXT_EMBEDDING_MODEL_ID"),
-            "temperature": float(os.getenv("TEMPERATURE_INFERENCE")),
-            "query_tokens": misc.compute_num_tokens(query),
-            "context_tokens": misc.compute_num_tokens(context),
-            "answer_tokens": misc.compute_num_tokens(answer),
-        },
+    packed = context_packer.pack(query, documents, DEFAULT_PROMPT)
+
+    answer = call_llm_service(query, packed.context, llm=resources.llm if resources else None)
+
+    tracing.update_current_trace(
+        tags=["rag"], metadata=build_trace_metadata(packed, misc.compute_num_tokens(answer))
     )
 
     return answer
 
 
+@tracing.track
+async def acall_llm_service(query: str, context: str | None, llm: Inference | None = None) -> str:
+    if llm is None:
+        llm = create_inference_backend()
+    answer = await InferenceExecutor(llm, query, context).aexecute()
+
+    return answer
+
+
+@tracing.track
+@metrics.track_stage("rag")
+async def arag(query: str, resources: RAGResources | None = None) -> str:
+    retriever = resources.retriever if resources else ContextRetriever(mock=False)
+    semantic_cache = resources.semantic_cache if resources else None
+    context_packer = resources.context_packer if resources else ContextPacker.from_env()
+
+    if semantic_cache is None:
+        documents = await retriever.asearch(query, k=3)
+    else:
+        # The expansion only matters on a cache miss, but starting it with the lookup keeps it off the critical path.
+        expansion_task = asyncio.create_task(retriever.aexpand_query(query))
+        try:
+            query_metadata, query_embedding = await asyncio.gather(
+                retriever.aextract_metadata(query),
+                run_in_cpu_executor(EmbeddingModelSingleton(), query, to_list=False),
+            )
+            cached_entry = semantic_cache.lookup(query_embedding, author_id=query_metadata.author_id)
+            if cached_entry is not None:
+                expansion_task.cancel()
+                # Let the expansion unwind, so its span ends before this request's trace is submitted.
+                await asyncio.gather(expansion_task, return_exceptions=True)
+                tracing.update_current_trace(tags=["rag", "semantic_cache_hit"])
+
+                return cached_entry.answer
+
+            expanded_queries = await expansion_task
+        except BaseException:
+            expansion_task.cancel()
+
+            raise
+
+        documents = await retriever.asearch(
+            query, k=3, query_metadata=query_metadata, expanded_queries=expanded_queries
+        )
+    packed = await run_in_cpu_executor(context_packer.pack, query, documents, DEFAULT_PROMPT)
+
+    answer = await acall_llm_service(query, packed.context, llm=resources.llm if resources else None)
+
+    if semantic_cache is not None:
+        semantic_cache.store(
+            query_embedding,
+            author_id=query_metadata.author_id,
+            chunk_ids=[str(document.id) for document in packed.chunks],
+            answer=answer,
+        )
+
+    answer_tokens = await run_in_cpu_executor(misc.compute_num_tokens, answer)
+    tracing.update_current_trace(tags=["rag"], metadata=build_trace_metadata(packed, answer_tokens))
+
+    return answer
+
+
 @app.post("/rag", response_model=QueryResponse)
-async def rag_endpoint(request: QueryRequest):
+async def rag_endpoint(request: QueryRequest, resources: RAGResources = Depends(get_resources)):
     try:
-        answer = rag(query=request.query)
+        answer = await arag(query=request.query, resources=resources)
 
         return {"answer": answer}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@tracing.track
+def trace_rag_stream(query: str, packed: PackedContext, answer: str) -> None:
+    tracing.update_current_trace(
+        tags=["rag", "stream"], metadata=build_trace_metadata(packed, misc.compute_num_tokens(answer))
+    )
+
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_rag_events(query: str, packed: PackedContext, llm: Inference) -> Iterator[str]:
+    yield format_sse(
+        "context",
+        {
+            "chunks": [
+                {
+                    "id": str(document.id),
+                    "type": document.__class__.__name__,
+                    "platform": document.platform,
+                    "author_full_name": document.author_full_name,
+                    "score": document.score,
+                }
+                for document in packed.chunks
+            ]
+        },
+    )
+
+    tokens = []
+    try:
+        for token in InferenceExecutor(llm, query, packed.context).execute_stream():
+            tokens.append(token)
+
+            yield format_sse("token", {"text": token})
+
+        yield format_sse("done", {})
+    except Exception as e:
+        logger.exception("Streaming the RAG answer failed.")
+
+        yield format_sse("error", {"detail": str(e)})
+    finally:
+        # Token counting is off the critical path: it only runs once the client has the whole answer.
+        trace_rag_stream(query, packed, "".join(tokens))
+
+
+@app.post("/rag/stream")
+async def rag_stream_endpoint(request: QueryRequest, resources: RAGResources = Depends(get_resources)):
+    try:
+        documents = await resources.retriever.asearch(request.query, k=3)
+        packed = await run_in_cpu_executor(resources.context_packer.pack, request.query, documents, DEFAULT_PROMPT)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+    # The LLM backends stream synchronously, so Starlette iterates this sync generator in its threadpool.
+    return StreamingResponse(
+        stream_rag_events(request.query, packed, resources.llm),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint() -> PlainTextResponse:
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
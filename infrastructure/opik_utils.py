@@ -4,6 +4,8 @@ import opik
 from loguru import logger
 from opik.configurator.configure import OpikConfigurator
 
+from infrastructure import tracing
+
 from dotenv import load_dotenv
 import os
 
@@ -26,6 +28,8 @@ def configure_opik() -> None:
 
         opik.configure(api_key=os.getenv("COMET_API_KEY"), workspace=default_workspace, use_local=False, force=True)
         logger.info("Opik configured successfully.")
+
+        tracing.configure()
     else:
         logger.warning(
             "COMET_API_KEY and COMET_PROJECT are not set. Set them to enable prompt monitoring with Opik (powered by Comet ML)."
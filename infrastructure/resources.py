@@ -0,0 +1,102 @@
+import os
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from application.networks import CrossEncoderModelSingleton, EmbeddingModelSingleton
+from application.rag.author_directory import AuthorDirectory
+from application.rag.base import build_chat_model
+from application.rag.context_packer import ContextPacker
+from application.rag.query_expanison import QueryExpansion
+from application.rag.reranking import Reranker
+from application.rag.retriever import ContextRetriever
+from application.rag.self_query import SelfQuery
+from application.utils import metrics, misc
+from domain.inference import Inference
+from infrastructure import tracing
+from infrastructure.semantic_cache import SemanticCache
+from model.inference import InferenceBatcher, create_inference_backend
+
+load_dotenv()
+
+
+class RAGResources:
+    """
+    Application-lifetime container for the clients and models used by the RAG request path.
+
+    Everything that is expensive to build (the OpenAI client, the LLM backend, the embedding and
+    cross-encoder models) is created once in `build()` and shared by every request.
+    """
+
+    def __init__(
+        self,
+        retriever: ContextRetriever,
+        endpoint: Inference,
+        semantic_cache: SemanticCache | None = None,
+        author_directory: AuthorDirectory | None = None,
+        context_packer: ContextPacker | None = None,
+    ) -> None:
+        self.retriever = retriever
+        self.author_directory = author_directory
+        self.endpoint = endpoint
+        self.semantic_cache = semantic_cache
+        self.context_packer = context_packer or ContextPacker.from_env()
+
+        # The endpoint keeps no per-request state, so a single instance serves every request. The batcher in
+        # front of it coalesces or caps concurrent generations, streaming ones included.
+        self.llm = InferenceBatcher.from_env(self.endpoint)
+
+    @classmethod
+    def build(cls, mock: bool = False) -> "RAGResources":
+        logger.info("Building the RAG service resources.")
+
+        # Load the models eagerly so the first request doesn't pay for it.
+        EmbeddingModelSingleton()
+        CrossEncoderModelSingleton()
+        misc.get_tokenizer()
+
+        author_directory = AuthorDirectory(
+            refresh_interval=float(os.getenv("AUTHOR_DIRECTORY_REFRESH_SECONDS", "300"))
+        )
+        author_directory.load()
+        author_directory.start_refresh()
+
+        chat_model = None if mock else build_chat_model()
+        retriever = ContextRetriever(
+            mock=mock,
+            query_expander=QueryExpansion(mock=mock, model=chat_model),
+            metadata_extractor=SelfQuery(mock=mock, model=chat_model, author_directory=author_directory),
+            reranker=Reranker(mock=mock),
+        )
+
+        semantic_cache = SemanticCache.from_env()
+        if semantic_cache is not None:
+            semantic_cache.start_refresh()
+
+        return cls(
+            retriever=retriever,
+            endpoint=create_inference_backend(),
+            semantic_cache=semantic_cache,
+            author_directory=author_directory,
+        )
+
+    def register_metrics(self) -> None:
+        """Exposes the counters the components already keep on `/metrics`."""
+
+        metrics.REGISTRY.register_collector("rag_embedding_cache", lambda: EmbeddingModelSingleton().cache_stats)
+        metrics.REGISTRY.register_collector("rag_reranker", self.retriever.reranker.stats)
+        metrics.REGISTRY.register_collector("rag_llm_batcher", self.llm.stats)
+        metrics.REGISTRY.register_collector("rag_tracing", tracing.stats)
+        if self.semantic_cache is not None:
+            metrics.REGISTRY.register_collector("rag_semantic_cache", self.semantic_cache.stats)
+
+    def close(self) -> None:
+        logger.info("Releasing the RAG service resources.")
+
+        if self.author_directory is not None:
+            self.author_directory.stop_refresh()
+        if self.semantic_cache is not None:
+            self.semantic_cache.stop_refresh()
+
+        # Stops the batcher's threads, then closes the endpoint behind it.
+        self.llm.close()
@@ -0,0 +1,252 @@
+import os
+import time
+import uuid
+from collections import OrderedDict
+from threading import Event, Lock, Thread
+
+import numpy as np
+from loguru import logger
+from numpy.typing import NDArray
+from pydantic import UUID4, BaseModel, ConfigDict, Field
+from pymongo import errors
+
+from infrastructure.db.mongo import connection
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ALL_AUTHORS_SCOPE = "__all__"
+
+
+class AuthorGenerationStore:
+    """
+    Per-author version counters shared through MongoDB.
+
+    The feature pipeline bumps the counter of every author it writes chunks for. The API compares the counter
+    stored with each cached answer against the current one, which invalidates answers across processes.
+    A daemon thread reloads the counters every `refresh_interval` seconds, so `get` only reads memory and never
+    blocks the event loop on MongoDB.
+    """
+
+    collection_name = "semantic_cache_generations"
+
+    def __init__(self, refresh_interval: float = 5.0) -> None:
+        self._refresh_interval = refresh_interval
+        self._generations: dict[str, int] = {}
+        self._lock = Lock()
+
+        self._stop_event = Event()
+        self._refresh_thread: Thread | None = None
+
+    @property
+    def _collection(self):
+        return connection.get_database(os.getenv("DATABASE_NAME"))[self.collection_name]
+
+    def load(self) -> None:
+        """Reloads every counter from MongoDB. If MongoDB is unreachable the last known values are kept."""
+
+        try:
+            generations = {document["_id"]: document["generation"] for document in self._collection.find()}
+        except errors.PyMongoError:
+            logger.exception("Failed to load the semantic cache generations. Keeping the last known values.")
+
+            return
+
+        with self._lock:
+            self._generations = generations
+
+    def start_refresh(self) -> None:
+        """Starts a daemon thread that reloads the counters every `refresh_interval` seconds."""
+
+        if self._refresh_thread is not None:
+            return
+
+        self._stop_event.clear()
+        self._refresh_thread = Thread(target=self._refresh_loop, name="semantic-cache-generations", daemon=True)
+        self._refresh_thread.start()
+
+    def stop_refresh(self) -> None:
+        self._stop_event.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout=1.0)
+            self._refresh_thread = None
+
+    def get(self, scope: str) -> int:
+        with self._lock:
+            return self._generations.get(scope, 0)
+
+    def bump(self, author_ids: list[str]) -> None:
+        # Unscoped answers may draw from any author, so they are invalidated by every write.
+        scopes = [*set(author_ids), ALL_AUTHORS_SCOPE]
+        for scope in scopes:
+            self._collection.update_one({"_id": scope}, {"$inc": {"generation": 1}}, upsert=True)
+
+        with self._lock:
+            for scope in scopes:
+                self._generations[scope] = self._generations.get(scope, 0) + 1
+
+    def _refresh_loop(self) -> None:
+        while not self._stop_event.wait(self._refresh_interval):
+            try:
+                self.load()
+            except Exception:
+                logger.exception("Failed to refresh the semantic cache generations. Keeping the last known values.")
+
+
+class SemanticCacheEntry(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    id: UUID4 = Field(default_factory=uuid.uuid4)
+    scope: str
+    embedding: NDArray[np.float32]
+    chunk_ids: list[str]
+    answer: str
+    generation: int
+    created_at: float = Field(default_factory=time.monotonic)
+
+
+class SemanticCache:
+    """
+    An in-process cache of full RAG answers, looked up by the cosine similarity of the query embedding.
+
+    Entries are scoped by author, so a paraphrase only hits answers generated from the same author's chunks.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        ttl: float = 3600.0,
+        max_size: int = 1000,
+        generations: AuthorGenerationStore | None = None,
+    ) -> None:
+        self._threshold = threshold
+        self._ttl = ttl
+        self._max_size = max_size
+        self._generations = generations or AuthorGenerationStore()
+
+        self._entries: OrderedDict[UUID4, SemanticCacheEntry] = OrderedDict()
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "SemanticCache | None":
+        if os.getenv("SEMANTIC_CACHE_ENABLED", "False").strip().lower() != "true":
+            return None
+
+        return cls(
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+            ttl=float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600")),
+            max_size=int(os.getenv("SEMANTIC_CACHE_MAX_SIZE", "1000")),
+            generations=AuthorGenerationStore(
+                refresh_interval=float(os.getenv("SEMANTIC_CACHE_GENERATION_REFRESH_SECONDS", "5"))
+            ),
+        )
+
+    def lookup(self, embedding: NDArray[np.float32] | list[float], author_id: UUID4 | None) -> SemanticCacheEntry | None:
+        scope = self._get_scope(author_id)
+        generation = self._generations.get(scope)
+        embedding = self._normalize(embedding)
+
+        with self._lock:
+            self._evict_stale(scope, generation)
+
+            candidates = [entry for entry in self._entries.values() if entry.scope == scope]
+            if not candidates:
+                self.misses += 1
+
+                return None
+
+            similarities = np.stack([entry.embedding for entry in candidates]) @ embedding
+            best_index = int(np.argmax(similarities))
+            if similarities[best_index] < self._threshold:
+                self.misses += 1
+
+                return None
+
+            entry = candidates[best_index]
+            self._entries.move_to_end(entry.id)
+            self.hits += 1
+
+        logger.info(f"Semantic cache hit with similarity {similarities[best_index]:.3f}.")
+
+        return entry
+
+    def store(
+        self,
+        embedding: NDArray[np.float32] | list[float],
+        author_id: UUID4 | None,
+        chunk_ids: list[str],
+        answer: str,
+    ) -> None:
+        scope = self._get_scope(author_id)
+        entry = SemanticCacheEntry(
+            scope=scope,
+            embedding=self._normalize(embedding),
+            chunk_ids=chunk_ids,
+            answer=answer,
+            generation=self._generations.get(scope),
+        )
+
+        with self._lock:
+            self._entries[entry.id] = entry
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def start_refresh(self) -> None:
+        """Loads the author generations and keeps them fresh in the background."""
+
+        self._generations.load()
+        self._generations.start_refresh()
+
+    def stop_refresh(self) -> None:
+        self._generations.stop_refresh()
+
+    def invalidate(self, author_id: UUID4 | None = None) -> None:
+        """Drops the local entries of an author, or every entry if no author is given."""
+
+        with self._lock:
+            if author_id is None:
+                self._entries.clear()
+
+                return
+
+            scopes = {self._get_scope(author_id), ALL_AUTHORS_SCOPE}
+            for entry_id in [entry.id for entry in self._entries.values() if entry.scope in scopes]:
+                del self._entries[entry_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _evict_stale(self, scope: str, generation: int) -> None:
+        expired_before = time.monotonic() - self._ttl
+        stale_ids = [
+            entry.id
+            for entry in self._entries.values()
+            if entry.created_at < expired_before or (entry.scope == scope and entry.generation != generation)
+        ]
+        for entry_id in stale_ids:
+            del self._entries[entry_id]
+
+    @staticmethod
+    def _get_scope(author_id: UUID4 | None) -> str:
+        return str(author_id) if author_id else ALL_AUTHORS_SCOPE
+
+    @staticmethod
+    def _normalize(embedding: NDArray[np.float32] | list[float]) -> NDArray[np.float32]:
+        embedding = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+
+        return embedding / norm if norm > 0 else embedding
+
+
+def invalidate_authors(author_ids: list[str]) -> None:
+    """Invalidates the cached answers of the given authors in every API process."""
+
+    try:
+        AuthorGenerationStore().bump(author_ids)
+    except errors.PyMongoError:
+        logger.exception("Failed to invalidate the semantic cache.")
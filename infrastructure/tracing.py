@@ -0,0 +1,397 @@
+"""
+A tracing facade that keeps Opik off the request path.
+
+`track` records spans in memory. When a root span ends, its whole trace is put on a bounded queue and a
+background thread exports queued traces to Opik in batches. Traces are sampled when the root span starts
+(`TRACING_SAMPLE_RATE`), and when the queue is full new traces are dropped instead of blocking the request.
+
+Tracing stays disabled, and `track` calls the wrapped function directly, until `configure` is called.
+`configure_opik` does that only if it finds Opik credentials.
+"""
+
+import datetime
+import functools
+import inspect
+import os
+import queue
+import random
+import time
+from contextvars import ContextVar
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Optional
+
+from dotenv import load_dotenv
+from loguru import logger
+
+load_dotenv()
+
+_MAX_STRING_LENGTH = 2000
+_MAX_ITEMS = 20
+
+
+class Span:
+    __slots__ = ("name", "type", "trace", "parent", "inputs", "output", "error", "start_time", "end_time", "children")
+
+    def __init__(self, name: str, type: str, trace: "Trace", parent: Optional["Span"], inputs: Any) -> None:
+        self.name = name
+        self.type = type
+        self.trace = trace
+        self.parent = parent
+        self.inputs = inputs
+        self.output: Any = None
+        self.error: Optional[str] = None
+        self.start_time = time.time()
+        self.end_time: Optional[float] = None
+        self.children: list[Span] = []
+
+
+class Trace:
+    __slots__ = ("root", "tags", "metadata", "submitted")
+
+    def __init__(self) -> None:
+        self.root: Optional[Span] = None
+        self.tags: list[str] = []
+        self.metadata: dict[str, Any] = {}
+        # Set once the root span ends. The exporter thread owns the trace from then on.
+        self.submitted = False
+
+
+# Marks the context of a trace that lost the sampling draw, so its child spans are skipped as well.
+_UNSAMPLED = object()
+
+_current_span: ContextVar[Span | object | None] = ContextVar("tracing_current_span", default=None)
+
+
+class _Tracer:
+    def __init__(self) -> None:
+        self.enabled = False
+        self.sample_rate = 1.0
+
+        self._queue: queue.Queue[Trace] = queue.Queue(maxsize=1)
+        self._batch_size = 1
+        self._flush_interval = 1.0
+        self._stop_event = Event()
+        self._exporter: Thread | None = None
+
+        self._stats_lock = Lock()
+        self._stats = {"sampled": 0, "unsampled": 0, "dropped": 0, "exported": 0, "export_errors": 0}
+
+    def configure(self, sample_rate: float, queue_size: int, batch_size: int, flush_interval: float) -> None:
+        self.shutdown()
+
+        self.sample_rate = sample_rate
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+
+        self._stop_event.clear()
+        self._exporter = Thread(target=self._run, name="tracing-exporter", daemon=True)
+        self._exporter.start()
+        self.enabled = True
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Stops accepting traces and exports the ones already queued."""
+
+        self.enabled = False
+        if self._exporter is not None:
+            self._stop_event.set()
+            self._exporter.join(timeout=timeout)
+            self._exporter = None
+
+    def submit(self, trace: Trace) -> None:
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self._increment("dropped")
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {**self._stats, "queue_depth": self._queue.qsize()}
+
+    def _increment(self, key: str, value: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += value
+
+    def _run(self) -> None:
+        import opik
+
+        client = opik.Opik()
+        while not (self._stop_event.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if not batch:
+                continue
+
+            # A trace that fails to export must not take the rest of its batch down with it.
+            num_exported = 0
+            for trace in batch:
+                try:
+                    _export_trace(client, trace)
+                    num_exported += 1
+                except Exception:
+                    logger.exception("Failed to export a trace to Opik.")
+
+                    self._increment("export_errors")
+
+            try:
+                client.flush()
+
+                self._increment("exported", num_exported)
+            except Exception:
+                logger.exception(f"Failed to flush {num_exported} trace(s) to Opik.")
+
+                self._increment("export_errors", num_exported)
+
+    def _next_batch(self) -> list[Trace]:
+        batch = []
+        deadline = time.monotonic() + self._flush_interval
+        while len(batch) < self._batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        return batch
+
+
+_tracer = _Tracer()
+
+
+def configure(
+    sample_rate: float | None = None,
+    queue_size: int | None = None,
+    batch_size: int | None = None,
+    flush_interval: float | None = None,
+) -> None:
+    """Enables tracing. Every argument defaults to its `TRACING_*` environment variable."""
+
+    _tracer.configure(
+        sample_rate=sample_rate if sample_rate is not None else float(os.getenv("TRACING_SAMPLE_RATE", "1.0")),
+        queue_size=queue_size if queue_size is not None else int(os.getenv("TRACING_QUEUE_SIZE", "1000")),
+        batch_size=batch_size if batch_size is not None else int(os.getenv("TRACING_BATCH_SIZE", "50")),
+        flush_interval=(
+            flush_interval if flush_interval is not None else float(os.getenv("TRACING_FLUSH_INTERVAL_SECONDS", "2"))
+        ),
+    )
+    logger.info(f"Tracing enabled with a sample rate of {_tracer.sample_rate}.")
+
+
+def shutdown(timeout: float = 5.0) -> None:
+    _tracer.shutdown(timeout=timeout)
+
+
+def stats() -> dict:
+    """Returns the number of sampled, unsampled, dropped and exported traces, and the export queue depth."""
+
+    return _tracer.stats()
+
+
+def update_current_trace(tags: list[str] | None = None, metadata: dict | None = None) -> None:
+    """Adds tags and metadata to the trace of the current span. A no-op outside a sampled trace."""
+
+    span = _current_span.get()
+    if not isinstance(span, Span):
+        return
+
+    if tags:
+        span.trace.tags.extend(tag for tag in tags if tag not in span.trace.tags)
+    if metadata:
+        span.trace.metadata.update(metadata)
+
+
+def track(name: str | Callable | None = None, type: str = "general") -> Callable:
+    """
+    Records calls of the decorated function, sync or async, as spans. Usable as `@track` or `@track(name=...)`.
+    """
+
+    if callable(name):
+        return track()(name)
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+        signature = inspect.signature(func)
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _tracer.enabled:
+                    return await func(*args, **kwargs)
+
+                span, token = _start_span(span_name, type, signature, args, kwargs)
+                if span is None:
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        if token is not None:
+                            _current_span.reset(token)
+
+                try:
+                    output = await func(*args, **kwargs)
+                except BaseException as e:
+                    _end_span(span, token, error=e)
+
+                    raise
+                _end_span(span, token, output=output)
+
+                return output
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _tracer.enabled:
+                return func(*args, **kwargs)
+
+            span, token = _start_span(span_name, type, signature, args, kwargs)
+            if span is None:
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    if token is not None:
+                        _current_span.reset(token)
+
+            try:
+                output = func(*args, **kwargs)
+            except BaseException as e:
+                _end_span(span, token, error=e)
+
+                raise
+            _end_span(span, token, output=output)
+
+            return output
+
+        return wrapper
+
+    return decorator
+
+
+def _start_span(name: str, type: str, signature: inspect.Signature, args: tuple, kwargs: dict):
+    parent = _current_span.get()
+    if parent is _UNSAMPLED:
+        return None, None
+
+    if parent is not None and parent.trace.submitted:
+        # A task that outlived its trace, e.g. a cancelled background call. Its spans would race the exporter.
+        return None, None
+
+    if parent is None:
+        if random.random() >= _tracer.sample_rate:
+            _tracer._increment("unsampled")
+
+            return None, _current_span.set(_UNSAMPLED)
+
+        _tracer._increment("sampled")
+        trace = Trace()
+    else:
+        trace = parent.trace
+
+    # Arguments may be mutated once the call starts, so keep shallow copies. The exporter thread serializes them.
+    span = Span(name=name, type=type, trace=trace, parent=parent, inputs=_snapshot_inputs(signature, args, kwargs))
+    if parent is None:
+        trace.root = span
+    else:
+        parent.children.append(span)
+
+    return span, _current_span.set(span)
+
+
+def _end_span(span: Span, token, output: Any = None, error: BaseException | None = None) -> None:
+    _current_span.reset(token)
+    if span.trace.submitted:
+        return
+
+    span.end_time = time.time()
+    span.output = _snapshot(output)
+    if error is not None:
+        span.error = f"{error.__class__.__name__}: {error}"
+
+    if span.parent is None:
+        span.trace.submitted = True
+        _tracer.submit(span.trace)
+
+
+def _export_trace(client, trace: Trace) -> None:
+    root = trace.root
+    opik_trace = client.trace(
+        name=root.name,
+        start_time=_to_datetime(root.start_time),
+        end_time=_to_datetime(root.end_time),
+        input=_serialize_inputs(root.inputs),
+        output=_serialize_output(root),
+        metadata=trace.metadata,
+        tags=trace.tags,
+    )
+    _export_span(opik_trace, root)
+
+
+def _export_span(parent, span: Span) -> None:
+    opik_span = parent.span(
+        name=span.name,
+        type=span.type,
+        start_time=_to_datetime(span.start_time),
+        end_time=_to_datetime(span.end_time),
+        input=_serialize_inputs(span.inputs),
+        output=_serialize_output(span),
+    )
+    for child in span.children:
+        _export_span(opik_span, child)
+
+
+def _to_datetime(timestamp: float | None) -> datetime.datetime | None:
+    return datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc) if timestamp is not None else None
+
+
+def _snapshot_inputs(signature: inspect.Signature, args: tuple, kwargs: dict) -> dict:
+    try:
+        arguments = signature.bind_partial(*args, **kwargs).arguments
+    except TypeError:
+        arguments = {"args": args, "kwargs": kwargs}
+
+    return {key: _snapshot(value) for key, value in arguments.items() if key not in ("self", "cls")}
+
+
+def _snapshot(value: Any, depth: int = 0) -> Any:
+    """Shallow-copies the containers and models `_serialize` reads, so later mutations don't leak into the trace."""
+
+    if value is None or isinstance(value, (bool, int, float, str)) or depth >= 3:
+        return value
+    if isinstance(value, dict):
+        return {key: _snapshot(item, depth + 1) for key, item in list(value.items())[:_MAX_ITEMS]}
+    if isinstance(value, (list, tuple, set)):
+        return [_snapshot(item, depth + 1) for item in list(value)[:_MAX_ITEMS]]
+    if hasattr(value, "model_copy"):
+        return value.model_copy()
+
+    return value
+
+
+def _serialize_inputs(inputs: dict) -> dict:
+    return {key: _serialize(value) for key, value in inputs.items()}
+
+
+def _serialize_output(span: Span) -> dict:
+    if span.error is not None:
+        return {"error": span.error}
+
+    return {"output": _serialize(span.output)}
+
+
+def _serialize(value: Any, depth: int = 0) -> Any:
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        return value[:_MAX_STRING_LENGTH]
+    if depth >= 3:
+        return repr(value)[:_MAX_STRING_LENGTH]
+    if isinstance(value, dict):
+        return {str(key): _serialize(item, depth + 1) for key, item in list(value.items())[:_MAX_ITEMS]}
+    if isinstance(value, (list, tuple, set)):
+        return [_serialize(item, depth + 1) for item in list(value)[:_MAX_ITEMS]]
+    if hasattr(value, "model_dump"):
+        # Drop embeddings: they are large and meaningless in a trace.
+        return _serialize(value.model_dump(exclude={"embedding"}), depth + 1)
+
+    return repr(value)[:_MAX_STRING_LENGTH]
@@ -1,4 +1,16 @@
-from .inference import LLMInferenceSagemakerEndpoint
+from .backends import create_inference_backend
+from .fake import FakeSagemakerRuntimeClient
+from .http_endpoint import LLMInferenceHTTPEndpoint
+from .inference import LLMInferenceSagemakerEndpoint, create_sagemaker_runtime_client
 from .run import InferenceExecutor
+from .scheduler import InferenceBatcher
 
-__all__ = ["LLMInferenceSagemakerEndpoint", "InferenceExecutor"]
+__all__ = [
+    "LLMInferenceSagemakerEndpoint",
+    "LLMInferenceHTTPEndpoint",
+    "InferenceExecutor",
+    "InferenceBatcher",
+    "FakeSagemakerRuntimeClient",
+    "create_inference_backend",
+    "create_sagemaker_runtime_client",
+]
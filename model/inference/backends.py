@@ -0,0 +1,58 @@
+import os
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from domain.inference import Inference
+
+from .http_endpoint import LLMInferenceHTTPEndpoint
+from .inference import LLMInferenceSagemakerEndpoint, create_sagemaker_runtime_client
+
+load_dotenv()
+
+INFERENCE_BACKENDS = ("sagemaker", "tgi", "openai", "transformers")
+
+
+def create_inference_backend(backend: str | None = None) -> Inference:
+    """
+    Creates the LLM backend selected by `LLM_INFERENCE_BACKEND`.
+
+    - `sagemaker` (default): the SageMaker endpoint from `SAGEMAKER_ENDPOINT_INFERENCE`.
+    - `tgi` / `openai`: a TGI or OpenAI-compatible server (vLLM, llama.cpp) at `LLM_HTTP_BASE_URL`.
+    - `transformers`: `LLM_LOCAL_MODEL_ID` loaded in-process on `LLM_LOCAL_DEVICE`.
+
+    Args:
+        backend (str, optional): Overrides `LLM_INFERENCE_BACKEND`. Defaults to None.
+
+    Returns:
+        Inference: The backend. It holds pooled connections or a loaded model, so share it across requests.
+    """
+
+    backend = (backend or os.getenv("LLM_INFERENCE_BACKEND", "sagemaker")).strip().lower()
+    assert backend in INFERENCE_BACKENDS, f"Unknown LLM inference backend '{backend}'. Pick one of {INFERENCE_BACKENDS}."
+
+    logger.info(f"Using the '{backend}' LLM inference backend.")
+
+    if backend in ("tgi", "openai"):
+        return LLMInferenceHTTPEndpoint(
+            base_url=os.getenv("LLM_HTTP_BASE_URL", "http://localhost:8080"),
+            api=backend,
+            model=os.getenv("LLM_HTTP_MODEL", os.getenv("HF_MODEL_ID")),
+            timeout=float(os.getenv("LLM_HTTP_TIMEOUT_SECONDS", "60")),
+            max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "32")),
+        )
+
+    if backend == "transformers":
+        # Imported here so the API doesn't pay for it unless the local backend is selected.
+        from .local import LLMInferenceTransformers
+
+        return LLMInferenceTransformers(
+            model_id=os.getenv("LLM_LOCAL_MODEL_ID", "HuggingFaceTB/SmolLM2-135M-Instruct"),
+            device=os.getenv("LLM_LOCAL_DEVICE", "cpu"),
+        )
+
+    return LLMInferenceSagemakerEndpoint(
+        endpoint_name=os.getenv("SAGEMAKER_ENDPOINT_INFERENCE"),
+        inference_component_name=None,
+        client=create_sagemaker_runtime_client(),
+    )
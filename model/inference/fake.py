@@ -0,0 +1,73 @@
+import io
+import json
+import time
+from typing import Any, Dict, Iterator
+
+
+def generate_fake_tokens(
+    inputs: str, max_new_tokens: int | None = None, answer: str | None = None, token_latency: float = 0.0
+) -> Iterator[str]:
+    """Yields a deterministic answer word by word, sleeping `token_latency` seconds before every word."""
+
+    answer = answer or f"This is a generated answer for a prompt of {len(inputs.split())} words."
+    max_new_tokens = max_new_tokens or len(answer)
+
+    for i, word in enumerate(answer.split(" ")[:max_new_tokens]):
+        if token_latency > 0:
+            time.sleep(token_latency)
+
+        yield word if i == 0 else f" {word}"
+
+
+class FakeSagemakerRuntimeClient:
+    """
+    A local stand-in for the boto3 `sagemaker-runtime` client that mimics a TGI endpoint.
+
+    It answers with a deterministic text derived from the prompt, so the serving path can be exercised and
+    measured without AWS. `token_latency` simulates the per-token decoding time of the real model.
+    """
+
+    def __init__(self, answer: str | None = None, token_latency: float = 0.0) -> None:
+        self._answer = answer
+        self._token_latency = token_latency
+
+        self.num_requests = 0
+
+    def invoke_endpoint(self, **kwargs) -> Dict[str, Any]:
+        payload = json.loads(kwargs["Body"])
+        self.num_requests += 1
+
+        inputs = payload["inputs"]
+        if isinstance(inputs, list):
+            body = [{"generated_text": "".join(self._generate_tokens(text, payload))} for text in inputs]
+        else:
+            body = [{"generated_text": "".join(self._generate_tokens(inputs, payload))}]
+
+        return {"Body": io.BytesIO(json.dumps(body).encode("utf8")), "ContentType": "application/json"}
+
+    def invoke_endpoint_with_response_stream(self, **kwargs) -> Dict[str, Any]:
+        payload = json.loads(kwargs["Body"])
+        self.num_requests += 1
+
+        return {"Body": self._stream_events(payload), "ContentType": "text/event-stream"}
+
+    def close(self) -> None:
+        pass
+
+    def _stream_events(self, payload: dict) -> Iterator[Dict[str, Any]]:
+        generated_text = ""
+        for i, token in enumerate(self._generate_tokens(payload["inputs"], payload)):
+            generated_text += token
+            event = {"token": {"id": i, "text": token, "special": False}, "generated_text": None}
+            yield {"PayloadPart": {"Bytes": f"data:{json.dumps(event)}\n\n".encode("utf8")}}
+
+        event = {"token": {"id": -1, "text": "", "special": True}, "generated_text": generated_text}
+        yield {"PayloadPart": {"Bytes": f"data:{json.dumps(event)}\n\n".encode("utf8")}}
+
+    def _generate_tokens(self, inputs: str, payload: dict) -> Iterator[str]:
+        return generate_fake_tokens(
+            inputs,
+            max_new_tokens=payload.get("parameters", {}).get("max_new_tokens"),
+            answer=self._answer,
+            token_latency=self._token_latency,
+        )
@@ -0,0 +1,196 @@
+import json
+from typing import Any, Dict, Iterator, Literal, Optional
+
+import httpx
+from loguru import logger
+
+from application.utils import metrics
+from application.utils.concurrency import run_in_io_executor
+from domain.inference import Inference, InferenceParameters
+
+
+class LLMInferenceHTTPEndpoint(Inference):
+    """
+    Class for performing inference against a self-hosted HTTP model server.
+
+    `api="tgi"` talks to the Text Generation Inference `/generate` routes, the same protocol as the SageMaker
+    endpoint. `api="openai"` talks to an OpenAI-compatible `/v1/completions` route, as served by vLLM or
+    llama.cpp. Connections are pooled and kept alive by a single `httpx.Client` shared by every request.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api: Literal["tgi", "openai"] = "tgi",
+        model: Optional[str] = None,
+        default_parameters: Optional[InferenceParameters] = None,
+        timeout: float = 60.0,
+        max_connections: int = 32,
+        client: Optional[httpx.Client] = None,
+    ) -> None:
+        super().__init__()
+
+        assert api in ("tgi", "openai"), f"Unsupported HTTP inference API: {api}"
+
+        self.api = api
+        self.model = model
+        self.default_parameters = default_parameters if default_parameters else InferenceParameters.from_env()
+        self.client = (
+            client
+            if client is not None
+            else httpx.Client(
+                base_url=base_url,
+                timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)),
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            )
+        )
+
+    @property
+    def supports_batched_inputs(self) -> bool:
+        # Only the OpenAI-compatible route takes a list of prompts, TGI's `/generate` takes one.
+        return self.api == "openai"
+
+    def build_payload(self, inputs: str, parameters: InferenceParameters | dict | None = None) -> Dict[str, Any]:
+        """
+        Builds a fresh payload for one inference request, in the TGI format used by every backend.
+
+        Args:
+            inputs (str): The input text for the inference.
+            parameters (InferenceParameters | dict, optional): Overrides of the default parameters. Defaults to None.
+
+        Returns:
+            dict: The payload of the inference request.
+        """
+
+        return {
+            "inputs": inputs,
+            "parameters": self.default_parameters.merge(parameters).to_payload(),
+        }
+
+    def inference(self, inputs: str, parameters: InferenceParameters | dict | None = None) -> list[Dict[str, Any]]:
+        """
+        Performs the inference request using the HTTP model server.
+
+        Args:
+            inputs (str): The input text for the inference.
+            parameters (InferenceParameters | dict, optional): Overrides of the default parameters. Defaults to None.
+
+        Returns:
+            list[dict]: The generations, as `[{"generated_text": ...}]`.
+        Raises:
+            httpx.HTTPError: If the request fails or times out.
+        """
+
+        return self.invoke(self.build_payload(inputs, parameters))
+
+    @metrics.track_stage("llm")
+    def invoke(self, payload: Dict[str, Any]) -> Any:
+        """
+        Sends an explicit TGI-style payload to the model server.
+
+        Args:
+            payload (dict): The request payload. `inputs` may be a list to send a batch of prompts, which only the
+                OpenAI-compatible API supports.
+
+        Returns:
+            Any: The generations, in the same shape as the SageMaker endpoint returns them.
+        """
+
+        try:
+            logger.info("HTTP inference request sent.")
+            if self.api == "openai":
+                response = self.client.post("/v1/completions", json=self._to_openai_payload(payload))
+                response.raise_for_status()
+                choices = sorted(response.json()["choices"], key=lambda choice: choice["index"])
+                generations = [[{"generated_text": choice["text"]}] for choice in choices]
+
+                return generations if isinstance(payload["inputs"], list) else generations[0]
+
+            if isinstance(payload["inputs"], list):
+                raise ValueError("The TGI API doesn't accept batched inputs. Disable 'LLM_BATCHING_ENABLED'.")
+
+            response = self.client.post("/generate", json=payload)
+            response.raise_for_status()
+            body = response.json()
+
+            return body if isinstance(body, list) else [body]
+
+        except Exception:
+            logger.exception("HTTP inference failed.")
+
+            raise
+
+    @metrics.track_stage("llm_stream")
+    def inference_stream(self, inputs: str, parameters: InferenceParameters | dict | None = None) -> Iterator[str]:
+        """
+        Performs a streaming inference request using the HTTP model server.
+
+        Args:
+            inputs (str): The input text for the inference.
+            parameters (InferenceParameters | dict, optional): Overrides of the default parameters. Defaults to None.
+
+        Yields:
+            str: The generated tokens, as soon as the server emits them.
+        """
+
+        payload = self.build_payload(inputs, parameters)
+        if self.api == "openai":
+            url, body = "/v1/completions", {**self._to_openai_payload(payload), "stream": True}
+        else:
+            url, body = "/generate_stream", {**payload, "stream": True}
+
+        try:
+            logger.info("Streaming HTTP inference request sent.")
+            with self.client.stream("POST", url, json=body) as response:
+                response.raise_for_status()
+
+                for line in response.iter_lines():
+                    line = line.strip()
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:") :].strip()
+                    if data == "[DONE]":
+                        break
+
+                    event = json.loads(data)
+                    if self.api == "openai":
+                        yield event["choices"][0].get("text", "")
+                    elif not event.get("token", {}).get("special", False):
+                        yield event["token"].get("text", "")
+
+        except Exception:
+            logger.exception("HTTP streaming inference failed.")
+
+            raise
+
+    async def ainference(
+        self, inputs: str, parameters: InferenceParameters | dict | None = None
+    ) -> list[Dict[str, Any]]:
+        """
+        Performs the inference request without blocking the event loop.
+
+        The pooled client is synchronous so it can be shared with the batcher threads, hence the IO executor.
+
+        Returns:
+            list[dict]: The generations, as `[{"generated_text": ...}]`.
+        """
+
+        return await run_in_io_executor(self.inference, inputs, parameters)
+
+    def close(self) -> None:
+        self.client.close()
+
+    def _to_openai_payload(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        parameters = payload["parameters"]
+        openai_payload = {
+            "model": self.model,
+            "prompt": payload["inputs"],
+            "max_tokens": parameters["max_new_tokens"],
+            "temperature": parameters["temperature"],
+            "top_p": parameters["top_p"],
+        }
+        # Not part of the OpenAI API, but vLLM and llama.cpp accept it as an extra sampling parameter.
+        if parameters.get("repetition_penalty") is not None:
+            openai_payload["repetition_penalty"] = parameters["repetition_penalty"]
+
+        return openai_payload
@@ -1,6 +1,6 @@
 import os
 import json
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Optional
 
 from loguru import logger
 from dotenv import load_dotenv
@@ -9,10 +9,44 @@ load_dotenv()
 
 # try:
 import boto3
+from botocore.config import Config
 # except ModuleNotFoundError:
 #     logger.warning("Couldn't load AWS or SageMaker imports. Run 'poetry install --with aws' to support AWS.")
 
-from domain.inference import Inference
+from application.utils import metrics
+from application.utils.concurrency import run_in_io_executor
+from domain.inference import Inference, InferenceParameters
+
+from .fake import FakeSagemakerRuntimeClient
+
+
+def create_sagemaker_runtime_client():
+    """
+    Creates a SageMaker runtime client with keep-alive connections.
+
+    boto3 clients are thread-safe and expensive to build, so create one per process and share it between requests.
+
+    Set `SAGEMAKER_USE_FAKE_CLIENT=true` to get a local fake that mimics a TGI endpoint instead.
+
+    Returns:
+        SageMakerRuntime.Client: The SageMaker runtime client.
+    """
+
+    if os.getenv('SAGEMAKER_USE_FAKE_CLIENT', "False").strip().lower() == "true":
+        logger.warning("Using the fake SageMaker runtime client. No requests will reach AWS.")
+
+        return FakeSagemakerRuntimeClient(token_latency=float(os.getenv('SAGEMAKER_FAKE_TOKEN_LATENCY', "0")))
+
+    return boto3.client(
+        "sagemaker-runtime",
+        region_name=os.getenv('AWS_REGION'),
+        aws_access_key_id=os.getenv('AWS_ACCESS_KEY'),
+        aws_secret_access_key=os.getenv('AWS_SECRET_KEY'),
+        config=Config(
+            tcp_keepalive=True,
+            max_pool_connections=int(os.getenv('SAGEMAKER_MAX_POOL_CONNECTIONS', "32")),
+        ),
+    )
 
 
 class LLMInferenceSagemakerEndpoint(Inference):
@@ -23,58 +57,65 @@ class LLMInferenceSagemakerEndpoint(Inference):
     def __init__(
         self,
         endpoint_name: str,
-        default_payload: Optional[Dict[str, Any]] = None,
+        default_parameters: Optional[InferenceParameters] = None,
         inference_component_name: Optional[str] = None,
+        client: Optional[Any] = None,
     ) -> None:
         super().__init__()
 
-        self.client = boto3.client(
-            "sagemaker-runtime",
-            region_name=os.getenv('AWS_REGION'),
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_KEY'),
-        )
+        self.client = client if client is not None else create_sagemaker_runtime_client()
         self.endpoint_name = endpoint_name
-        self.payload = default_payload if default_payload else self._default_payload()
+        self.default_parameters = default_parameters if default_parameters else InferenceParameters.from_env()
         self.inference_component_name = inference_component_name
 
-    def _default_payload(self) -> Dict[str, Any]:
+    @property
+    def supports_batched_inputs(self) -> bool:
+        # The TGI container behind a real endpoint rejects a list of `inputs`; only the local fake accepts one.
+        return isinstance(self.client, FakeSagemakerRuntimeClient)
+
+    def build_payload(self, inputs: str, parameters: InferenceParameters | dict | None = None) -> Dict[str, Any]:
         """
-        Generates the default payload for the inference request.
+        Builds a fresh payload for one inference request.
+
+        Args:
+            inputs (str): The input text for the inference.
+            parameters (InferenceParameters | dict, optional): Overrides of the default parameters. Defaults to None.
 
         Returns:
-            dict: The default payload.
+            dict: The payload of the inference request.
         """
 
         return {
-            "inputs": "How is the weather?",
-            "parameters": {
-                "max_new_tokens": int(os.getenv('MAX_NEW_TOKENS_INFERENCE')),
-                "top_p": float(os.getenv('TOP_P_INFERENCE')),
-                "temperature": float(os.getenv('TEMPERATURE_INFERENCE')),
-                "return_full_text": False,
-            },
+            "inputs": inputs,
+            "parameters": self.default_parameters.merge(parameters).to_payload(),
         }
 
-    def set_payload(self, inputs: str, parameters: Optional[Dict[str, Any]] = None) -> None:
+    def inference(self, inputs: str, parameters: InferenceParameters | dict | None = None) -> Dict[str, Any]:
         """
-        Sets the payload for the inference request.
+        Performs the inference request using the SageMaker endpoint.
 
         Args:
             inputs (str): The input text for the inference.
-            parameters (dict, optional): Additional parameters for the inference. Defaults to None.
+            parameters (InferenceParameters | dict, optional): Overrides of the default parameters. Defaults to None.
+
+        Returns:
+            dict: The response from the inference request.
+        Raises:
+            Exception: If an error occurs during the inference request.
         """
 
-        self.payload["inputs"] = inputs
-        if parameters:
-            self.payload["parameters"].update(parameters)
+        return self.invoke(self.build_payload(inputs, parameters))
 
-    def inference(self) -> Dict[str, Any]:
+    @metrics.track_stage("llm")
+    def invoke(self, payload: Dict[str, Any]) -> Any:
         """
-        Performs the inference request using the SageMaker endpoint.
+        Sends an explicit payload to the SageMaker endpoint.
+
+        Args:
+            payload (dict): The request payload. `inputs` may be a list to send a batch of prompts.
 
         Returns:
-            dict: The response from the inference request.
+            Any: The decoded response from the inference request.
         Raises:
             Exception: If an error occurs during the inference request.
         """
@@ -84,7 +125,7 @@ class LLMInferenceSagemakerEndpoint(Inference):
             invoke_args = {
                 "EndpointName": self.endpoint_name,
                 "ContentType": "application/json",
-                "Body": json.dumps(self.payload),
+                "Body": json.dumps(payload),
             }
             if self.inference_component_name not in ["None", None]:
                 invoke_args["InferenceComponentName"] = self.inference_component_name
@@ -97,3 +138,71 @@ class LLMInferenceSagemakerEndpoint(Inference):
             logger.exception("SageMaker inference failed.")
 
             raise
+
+    @metrics.track_stage("llm_stream")
+    def inference_stream(self, inputs: str, parameters: InferenceParameters | dict | None = None) -> Iterator[str]:
+        """
+        Performs a streaming inference request using the SageMaker endpoint.
+
+        Args:
+            inputs (str): The input text for the inference.
+            parameters (InferenceParameters | dict, optional): Overrides of the default parameters. Defaults to None.
+
+        Yields:
+            str: The generated tokens, as soon as the endpoint emits them.
+        Raises:
+            Exception: If an error occurs during the inference request.
+        """
+
+        try:
+            logger.info("Streaming inference request sent.")
+            invoke_args = {
+                "EndpointName": self.endpoint_name,
+                "ContentType": "application/json",
+                "Body": json.dumps({**self.build_payload(inputs, parameters), "stream": True}),
+            }
+            if self.inference_component_name not in ["None", None]:
+                invoke_args["InferenceComponentName"] = self.inference_component_name
+            response = self.client.invoke_endpoint_with_response_stream(**invoke_args)
+
+            yield from self._parse_token_stream(response["Body"])
+
+        except Exception:
+            logger.exception("SageMaker streaming inference failed.")
+
+            raise
+
+    @staticmethod
+    def _parse_token_stream(event_stream) -> Iterator[str]:
+        # TGI emits server-sent events ("data:{...}\n\n"), which SageMaker splits into arbitrary byte chunks.
+        buffer = b""
+        for event in event_stream:
+            buffer += event.get("PayloadPart", {}).get("Bytes", b"")
+
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+
+                data = json.loads(line[len(b"data:") :])
+                token = data.get("token", {})
+                if not token.get("special", False):
+                    yield token.get("text", "")
+
+    async def ainference(
+        self, inputs: str, parameters: InferenceParameters | dict | None = None
+    ) -> Dict[str, Any]:
+        """
+        Performs the inference request without blocking the event loop.
+
+        boto3 has no native asyncio support, so the blocking `invoke_endpoint` call is sent to the IO executor.
+
+        Returns:
+            dict: The response from the inference request.
+        """
+
+        return await run_in_io_executor(self.inference, inputs, parameters)
+
+    def close(self) -> None:
+        self.client.close()
@@ -0,0 +1,135 @@
+from threading import Event, Thread
+from typing import Any, Dict, Iterator, Optional
+
+import torch
+from loguru import logger
+from transformers import (
+    AutoModelForCausalLM,
+    AutoTokenizer,
+    StoppingCriteria,
+    StoppingCriteriaList,
+    TextIteratorStreamer,
+)
+
+from application.utils import metrics
+from application.utils.concurrency import run_in_cpu_executor
+from domain.inference import Inference, InferenceParameters
+
+
+class _StopOnEvent(StoppingCriteria):
+    """Stops a generation once `event` is set, e.g. when the client of a stream went away."""
+
+    def __init__(self, event: Event) -> None:
+        self._event = event
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        return torch.full((input_ids.shape[0],), self._event.is_set(), dtype=torch.bool, device=input_ids.device)
+
+
+class LLMInferenceTransformers(Inference):
+    """
+    Class for running a small causal language model in-process with `transformers`.
+
+    Meant for CPU load tests, local development and as a fallback when no endpoint is available. The model is
+    loaded once and shared by every request; generation runs on the CPU executor in async code.
+    """
+
+    supports_batched_inputs = True
+
+    def __init__(
+        self,
+        model_id: str,
+        device: str = "cpu",
+        default_parameters: Optional[InferenceParameters] = None,
+    ) -> None:
+        super().__init__()
+
+        logger.info(f"Loading the local inference model {model_id} on {device}.")
+
+        self.model_id = model_id
+        self.device = device
+        self.default_parameters = default_parameters if default_parameters else InferenceParameters.from_env()
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_id)
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        # Decoder-only models continue the last token, so batched prompts are padded on the left.
+        self.tokenizer.padding_side = "left"
+
+        self.model = AutoModelForCausalLM.from_pretrained(model_id).to(device)
+        self.model.eval()
+
+    def build_payload(self, inputs: str, parameters: InferenceParameters | dict | None = None) -> Dict[str, Any]:
+        return {
+            "inputs": inputs,
+            "parameters": self.default_parameters.merge(parameters).to_payload(),
+        }
+
+    def inference(self, inputs: str, parameters: InferenceParameters | dict | None = None) -> list[Dict[str, Any]]:
+        return self.invoke(self.build_payload(inputs, parameters))
+
+    @metrics.track_stage("llm")
+    def invoke(self, payload: Dict[str, Any]) -> Any:
+        """
+        Generates the answers of a TGI-style payload. `inputs` may be a list to generate a padded batch.
+
+        Returns:
+            Any: The generations, in the same shape as the SageMaker endpoint returns them.
+        """
+
+        prompts = payload["inputs"] if isinstance(payload["inputs"], list) else [payload["inputs"]]
+        encoded = self.tokenizer(prompts, return_tensors="pt", padding=True).to(self.device)
+
+        with torch.inference_mode():
+            output_ids = self.model.generate(**encoded, **self._generation_kwargs(payload["parameters"]))
+
+        # Keep only the new tokens, which is what TGI returns with `return_full_text=False`.
+        answers = self.tokenizer.batch_decode(output_ids[:, encoded["input_ids"].shape[1] :], skip_special_tokens=True)
+        generations = [[{"generated_text": answer}] for answer in answers]
+
+        return generations if isinstance(payload["inputs"], list) else generations[0]
+
+    @metrics.track_stage("llm_stream")
+    def inference_stream(self, inputs: str, parameters: InferenceParameters | dict | None = None) -> Iterator[str]:
+        payload = self.build_payload(inputs, parameters)
+        encoded = self.tokenizer(payload["inputs"], return_tensors="pt").to(self.device)
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        stop_event = Event()
+
+        def generate() -> None:
+            with torch.inference_mode():
+                self.model.generate(
+                    **encoded,
+                    **self._generation_kwargs(payload["parameters"]),
+                    streamer=streamer,
+                    stopping_criteria=StoppingCriteriaList([_StopOnEvent(stop_event)]),
+                )
+
+        thread = Thread(target=generate, name="llm-local-stream", daemon=True)
+        thread.start()
+        try:
+            yield from streamer
+        finally:
+            # When the consumer stops early, e.g. a disconnected SSE client, stop generating after the current token.
+            stop_event.set()
+            thread.join()
+
+    async def ainference(
+        self, inputs: str, parameters: InferenceParameters | dict | None = None
+    ) -> list[Dict[str, Any]]:
+        return await run_in_cpu_executor(self.inference, inputs, parameters)
+
+    def _generation_kwargs(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        temperature = parameters["temperature"]
+        kwargs = {
+            "max_new_tokens": parameters["max_new_tokens"],
+            "repetition_penalty": parameters.get("repetition_penalty") or 1.0,
+            "pad_token_id": self.tokenizer.pad_token_id,
+            # Near-zero temperatures are greedy decoding in practice, and sampling at them is numerically unstable.
+            "do_sample": temperature > 1e-3,
+        }
+        if kwargs["do_sample"]:
+            kwargs["temperature"] = temperature
+            kwargs["top_p"] = parameters["top_p"]
+
+        return kwargs
@@ -1,13 +1,22 @@
 from __future__ import annotations
 
+from typing import Iterator
+
 from domain.inference import Inference
-from dotenv import load_dotenv
-import os
 
 # Load from .env file in current or parent directory
 from dotenv import load_dotenv
 load_dotenv()
 
+# Applied on top of the endpoint defaults, which already carry the max new tokens and temperature from the env.
+GENERATION_PARAMETERS = {"repetition_penalty": 1.1}
+
+DEFAULT_PROMPT = """
+            You are a content creator. Write what the user asked you to while using the provided context as the primary source of information for the content.
+                User query: {query}
+                Context: {context}
+            """
+
 
 class InferenceExecutor:
     def __init__(
@@ -21,24 +30,20 @@ class InferenceExecutor:
         self.query = query
         self.context = context if context else ""
 
-        if prompt is None:
-            self.prompt = """
-            You are a content creator. Write what the user asked you to while using the provided context as the primary source of information for the content.
-                User query: {query}
-                Context: {context}
-            """
-        else:
-            self.prompt = prompt
+        self.prompt = prompt if prompt is not None else DEFAULT_PROMPT
 
     def execute(self) -> str:
-        self.llm.set_payload(
-            inputs=self.prompt.format(query=self.query, context=self.context),
-            parameters={
-                "max_new_tokens": int(os.getenv("MAX_NEW_TOKENS_INFERENCE")),
-                "repetition_penalty": 1.1,
-                "temperature": float(os.getenv("TEMPERATURE_INFERENCE")),
-            },
-        )
-        answer = self.llm.inference()[0]["generated_text"]
+        answer = self.llm.inference(self._format_prompt(), GENERATION_PARAMETERS)[0]["generated_text"]
+
+        return answer
+
+    async def aexecute(self) -> str:
+        answer = (await self.llm.ainference(self._format_prompt(), GENERATION_PARAMETERS))[0]["generated_text"]
 
         return answer
+
+    def execute_stream(self) -> Iterator[str]:
+        yield from self.llm.inference_stream(self._format_prompt(), GENERATION_PARAMETERS)
+
+    def _format_prompt(self) -> str:
+        return self.prompt.format(query=self.query, context=self.context)
@@ -0,0 +1,238 @@
+import json
+import os
+import queue
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock, Thread
+from typing import Any, Dict, Iterator
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from domain.inference import Inference, InferenceParameters
+
+load_dotenv()
+
+
+class _PendingRequest:
+    def __init__(self, payload: Dict[str, Any]) -> None:
+        self.payload = payload
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+    @property
+    def parameters_key(self) -> str:
+        return json.dumps(self.payload.get("parameters", {}), sort_keys=True)
+
+
+class InferenceBatcher(Inference):
+    """
+    Coalesces concurrent inference calls in front of a shared LLM backend.
+
+    With `supports_batching` and a backend that `supports_batched_inputs`, calls that arrive within `batch_window_ms` of each other and share the same
+    generation parameters are sent as one payload with a list of `inputs`. Otherwise every call is sent on its
+    own, but at most `max_concurrency` requests are in flight, so bursts queue here instead of at the endpoint.
+
+    The backend must expose `build_payload` and `invoke`, as every backend in this package does.
+
+    Every call carries its own inputs and parameters, so one instance can be shared by threads and asyncio tasks.
+    `close` stops the batching thread once the queued calls are sent, then closes the backend.
+    """
+
+    def __init__(
+        self,
+        llm: Inference,
+        supports_batching: bool = False,
+        batch_window_ms: float = 5.0,
+        max_batch_size: int = 8,
+        max_concurrency: int = 4,
+    ) -> None:
+        super().__init__()
+
+        self._llm = llm
+        self._supports_batching = supports_batching and llm.supports_batched_inputs
+        if supports_batching and not self._supports_batching:
+            logger.warning(
+                f"{type(llm).__name__} doesn't accept batched inputs. Capping the concurrency without batching."
+            )
+        self._batch_window = batch_window_ms / 1000
+        self._max_batch_size = max_batch_size
+
+        self._semaphore = BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm-batch")
+        # None is the stop signal of the batching thread.
+        self._queue: queue.Queue[_PendingRequest | None] = queue.Queue()
+        # Guards `_closed` so no call is enqueued after the stop signal.
+        self._close_lock = Lock()
+        self._closed = False
+
+        self._stats_lock = Lock()
+        self._stats = {
+            "requests": 0,
+            "batches": 0,
+            "queue_depth": 0,
+            "in_flight": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+        }
+
+        if self._supports_batching:
+            self._worker = Thread(target=self._run, name="llm-batcher", daemon=True)
+            self._worker.start()
+
+    @classmethod
+    def from_env(cls, llm: Inference) -> "InferenceBatcher":
+        return cls(
+            llm=llm,
+            supports_batching=os.getenv("LLM_BATCHING_ENABLED", "False").strip().lower() == "true",
+            batch_window_ms=float(os.getenv("LLM_BATCH_WINDOW_MS", "5")),
+            max_batch_size=int(os.getenv("LLM_MAX_BATCH_SIZE", "8")),
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+        )
+
+    def inference(self, inputs: str, parameters: InferenceParameters | dict | None = None) -> Any:
+        self._raise_if_closed()
+
+        payload = self._llm.build_payload(inputs, parameters)
+
+        if self._supports_batching:
+            request = _PendingRequest(payload)
+            with self._close_lock:
+                self._raise_if_closed()
+                self._record_enqueue()
+                self._queue.put(request)
+
+            return request.future.result()
+
+        self._record_enqueue()
+        enqueued_at = time.perf_counter()
+        with self._semaphore:
+            self._record_dispatch([enqueued_at])
+            try:
+                return self._llm.invoke(payload)
+            finally:
+                self._record_done(1)
+
+    def inference_stream(self, inputs: str, parameters: InferenceParameters | dict | None = None) -> Iterator[str]:
+        """Streams a single request. Streams are never batched, but they share the concurrency limit."""
+
+        self._raise_if_closed()
+
+        self._record_enqueue()
+        enqueued_at = time.perf_counter()
+        with self._semaphore:
+            self._record_dispatch([enqueued_at])
+            try:
+                yield from self._llm.inference_stream(inputs, parameters)
+            finally:
+                self._record_done(1)
+
+    def close(self) -> None:
+        """Sends the queued calls, stops the batching thread and the executor, then closes the backend."""
+
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+
+            # Calls check `_closed` under the same lock before enqueueing, so the stop signal is the last item.
+            if self._supports_batching:
+                self._queue.put(None)
+
+        if self._supports_batching:
+            self._worker.join()
+        self._executor.shutdown(wait=True)
+
+        self._llm.close()
+
+    def stats(self) -> dict:
+        """Returns the queue depth, in-flight requests, batch counters and cumulative queue wait time."""
+
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["avg_batch_size"] = stats["requests"] / stats["batches"] if stats["batches"] else 0.0
+        stats["avg_wait_seconds"] = stats["wait_seconds_total"] / stats["requests"] if stats["requests"] else 0.0
+
+        return stats
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            request = self._queue.get()
+            if request is None:
+                return
+
+            requests = [request]
+            deadline = time.perf_counter() + self._batch_window
+            while len(requests) < self._max_batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request is None:
+                    # Send what was collected before stopping.
+                    stopping = True
+
+                    break
+                requests.append(request)
+
+            batches: dict[str, list[_PendingRequest]] = {}
+            for request in requests:
+                batches.setdefault(request.parameters_key, []).append(request)
+
+            for batch in batches.values():
+                self._semaphore.acquire()
+                self._executor.submit(self._send_batch, batch)
+
+    def _send_batch(self, batch: list[_PendingRequest]) -> None:
+        self._record_dispatch([request.enqueued_at for request in batch])
+        try:
+            if len(batch) == 1:
+                batch[0].future.set_result(self._llm.invoke(batch[0].payload))
+
+                return
+
+            payload = {**batch[0].payload, "inputs": [request.payload["inputs"] for request in batch]}
+            responses = self._llm.invoke(payload)
+            if len(responses) != len(batch):
+                raise ValueError(
+                    f"The endpoint returned {len(responses)} generations for a batch of {len(batch)} requests."
+                )
+
+            for request, response in zip(batch, responses, strict=True):
+                request.future.set_result([response] if isinstance(response, dict) else response)
+        except Exception as e:
+            logger.exception(f"Batched inference of {len(batch)} request(s) failed.")
+
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+        finally:
+            self._record_done(len(batch))
+            self._semaphore.release()
+
+    def _raise_if_closed(self) -> None:
+        if self._closed:
+            raise RuntimeError("The inference batcher is closed.")
+
+    def _record_enqueue(self) -> None:
+        with self._stats_lock:
+            self._stats["queue_depth"] += 1
+
+    def _record_dispatch(self, enqueued_at: list[float]) -> None:
+        now = time.perf_counter()
+        with self._stats_lock:
+            self._stats["queue_depth"] -= len(enqueued_at)
+            self._stats["requests"] += len(enqueued_at)
+            self._stats["batches"] += 1
+            self._stats["in_flight"] += len(enqueued_at)
+            for timestamp in enqueued_at:
+                self._stats["wait_seconds_total"] += now - timestamp
+                self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], now - timestamp)
+
+    def _record_done(self, num_requests: int) -> None:
+        with self._stats_lock:
+            self._stats["in_flight"] -= num_requests
@@ -5,14 +5,22 @@ from steps import feature_engineering as fe_steps
 
 @pipeline
 def feature_engineering(
-    author_full_names: list[str], wait_for: str | list[str] | None = None
+    author_full_names: list[str], wait_for: str | list[str] | None = None, streaming: bool = False
 ) -> list[str]:
+    if streaming:
+        # Documents never cross step boundaries: the last step reads, processes and loads them in windows.
+        author_ids = fe_steps.query_author_ids(author_full_names, after=wait_for)
+        stats = fe_steps.stream_to_vector_db(author_ids)
+
+        return [stats.invocation_id]
+
     raw_documents = fe_steps.query_data_warehouse(author_full_names, after=wait_for)
 
     cleaned_documents = fe_steps.clean_documents(raw_documents)
     last_step_1 = fe_steps.load_to_vector_db(cleaned_documents)
 
-    embedded_documents = fe_steps.chunk_and_embed(cleaned_documents)
-    last_step_2 = fe_steps.load_to_vector_db(embedded_documents)
+    embedded_documents, chunk_index = fe_steps.chunk_and_embed(cleaned_documents)
+    successful = fe_steps.load_to_vector_db(embedded_documents)
+    last_step_2 = fe_steps.delete_stale_embedded_chunks(chunk_index, successful)
 
     return [last_step_1.invocation_id, last_step_2.invocation_id]
@@ -2,6 +2,7 @@ from langchain.globals import set_verbose
 from loguru import logger
 
 from application.rag.retriever import ContextRetriever
+from infrastructure import tracing
 from infrastructure.opik_utils import configure_opik
 
 if __name__ == "__main__":
@@ -23,3 +24,5 @@ if __name__ == "__main__":
     logger.info("Retrieved documents:")
     for rank, document in enumerate(documents):
         logger.info(f"{rank + 1}: {document}")
+
+    tracing.shutdown()
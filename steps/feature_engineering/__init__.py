@@ -1,11 +1,15 @@
 from .clean import clean_documents
 from .load_to_vector_db import load_to_vector_db
-from .query_data_warehouse import query_data_warehouse
-from .rag import chunk_and_embed
+from .query_data_warehouse import query_author_ids, query_data_warehouse
+from .rag import chunk_and_embed, delete_stale_embedded_chunks
+from .stream import stream_to_vector_db
 
 __all__ = [
     "clean_documents",
     "load_to_vector_db",
+    "query_author_ids",
     "query_data_warehouse",
     "chunk_and_embed",
+    "delete_stale_embedded_chunks",
+    "stream_to_vector_db",
 ]
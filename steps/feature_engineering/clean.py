@@ -1,21 +1,26 @@
 from typing_extensions import Annotated
 from zenml import get_step_context, step
 
-from application.preprocessing import CleaningDispatcher
+from application.preprocessing import clean_documents_in_shards
 from domain.cleaned_documents import CleanedDocument
 
 
 @step
 def clean_documents(
     documents: Annotated[list, "raw_documents"],
+    num_workers: int | None = None,
+    shard_size: int = 32,
+    max_in_flight_shards: int | None = None,
 ) -> Annotated[list, "cleaned_documents"]:
-    cleaned_documents = []
-    for document in documents:
-        cleaned_document = CleaningDispatcher.dispatch(document)
-        cleaned_documents.append(cleaned_document)
+    cleaned_documents, shard_timings = clean_documents_in_shards(
+        documents, num_workers=num_workers, shard_size=shard_size, max_in_flight_shards=max_in_flight_shards
+    )
+
+    metadata = _get_metadata(cleaned_documents)
+    metadata["shards"] = _get_shards_metadata(shard_timings)
 
     step_context = get_step_context()
-    step_context.add_output_metadata(output_name="cleaned_documents", metadata=_get_metadata(cleaned_documents))
+    step_context.add_output_metadata(output_name="cleaned_documents", metadata=metadata)
 
     return cleaned_documents
 
@@ -37,3 +42,14 @@ def _get_metadata(cleaned_documents: list[CleanedDocument]) -> dict:
             value["authors"] = list(set(value["authors"]))
 
     return metadata
+
+
+def _get_shards_metadata(shard_timings: list[dict]) -> dict:
+    seconds = [shard_timing["seconds"] for shard_timing in shard_timings]
+
+    return {
+        "num_shards": len(shard_timings),
+        "total_seconds": round(sum(seconds), 4),
+        "max_seconds": max(seconds, default=0.0),
+        "timings": shard_timings,
+    }
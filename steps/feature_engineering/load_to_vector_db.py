@@ -4,12 +4,18 @@ from zenml import step
 
 from application import utils
 from domain.base import VectorBaseDocument
+from domain.embedded_chunks import EmbeddedChunk
+from infrastructure.semantic_cache import invalidate_authors
 
 
 @step
 def load_to_vector_db(
     documents: Annotated[list, "documents"],
 ) -> Annotated[bool, "successful"]:
+    return load_documents(documents)
+
+
+def load_documents(documents: list[VectorBaseDocument]) -> bool:
     logger.info(f"Loading {len(documents)} documents into the vector database.")
 
     grouped_documents = VectorBaseDocument.group_by_class(documents)
@@ -24,4 +30,7 @@ def load_to_vector_db(
                 )
                 return False
 
+        if issubclass(document_class, EmbeddedChunk):
+            invalidate_authors([str(document.author_id) for document in documents])
+
     return True
@@ -1,4 +1,5 @@
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator
 
 from loguru import logger
 from typing_extensions import Annotated
@@ -34,6 +35,34 @@ def query_data_warehouse(
     return documents
 
 
+@step
+def query_author_ids(
+    author_full_names: list[str],
+) -> Annotated[list[str], "author_ids"]:
+    """Resolves the authors only. The streaming pipeline reads their documents later, window by window."""
+
+    author_ids = []
+    for author_full_name in author_full_names:
+        first_name, last_name = utils.split_user_full_name(author_full_name)
+        user = UserDocument.get_or_create(first_name=first_name, last_name=last_name)
+        author_ids.append(str(user.id))
+
+    step_context = get_step_context()
+    step_context.add_output_metadata(
+        output_name="author_ids", metadata={"num_authors": len(author_ids), "authors": author_full_names}
+    )
+
+    return author_ids
+
+
+def iter_all_data(author_ids: list[str], batch_size: int = 100) -> Iterator[NoSQLBaseDocument]:
+    """Yields the articles, posts and repositories of every author from MongoDB cursors."""
+
+    for author_id in author_ids:
+        for document_class in (ArticleDocument, PostDocument, RepositoryDocument):
+            yield from document_class.iter_find(batch_size=batch_size, author_id=author_id)
+
+
 def fetch_all_data(user: UserDocument) -> dict[str, list[NoSQLBaseDocument]]:
     user_id = str(user.id)
     with ThreadPoolExecutor() as executor:
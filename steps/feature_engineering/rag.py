@@ -1,37 +1,94 @@
+from loguru import logger
 from typing_extensions import Annotated
 from zenml import get_step_context, step
 
-from application import utils
-from application.preprocessing import ChunkingDispatcher, EmbeddingDispatcher
+from application.preprocessing import ChunkingDispatcher, EmbeddedChunkIndex, EmbeddingDispatcher
 from domain.chunks import Chunk
 from domain.embedded_chunks import EmbeddedChunk
+from infrastructure.semantic_cache import invalidate_authors
 
 
 @step
 def chunk_and_embed(
     cleaned_documents: Annotated[list, "cleaned_documents"],
-) -> Annotated[list, "embedded_documents"]:
+    incremental: bool = False,
+) -> tuple[Annotated[list, "embedded_documents"], Annotated[dict, "chunk_index"]]:
     metadata = {"chunking": {}, "embedding": {}, "num_documents": len(cleaned_documents)}
 
-    embedded_chunks = []
-    for document in cleaned_documents:
-        chunks = ChunkingDispatcher.dispatch(document)
-        metadata["chunking"] = _add_chunks_metadata(chunks, metadata["chunking"])
-
-        for batched_chunks in utils.misc.batch(chunks, 10):
-            batched_embedded_chunks = EmbeddingDispatcher.dispatch(batched_chunks)
-            embedded_chunks.extend(batched_embedded_chunks)
-
-    metadata["embedding"] = _add_embeddings_metadata(embedded_chunks, metadata["embedding"])
-    metadata["num_chunks"] = len(embedded_chunks)
+    # The authors come from the documents, so the chunks of an author without any document left are kept.
+    chunk_index = (
+        EmbeddedChunkIndex(author_ids=[document.author_id for document in cleaned_documents]) if incremental else None
+    )
+    embedded_chunks = chunk_and_embed_documents(cleaned_documents, metadata, chunk_index=chunk_index)
     metadata["num_embedded_chunks"] = len(embedded_chunks)
 
     step_context = get_step_context()
     step_context.add_output_metadata(output_name="embedded_documents", metadata=metadata)
 
+    # The stale chunks are deleted by `delete_stale_embedded_chunks`, once their replacements are loaded.
+    return embedded_chunks, chunk_index.to_state() if chunk_index is not None else {}
+
+
+@step
+def delete_stale_embedded_chunks(
+    chunk_index: Annotated[dict, "chunk_index"],
+    successful: Annotated[bool, "successful"],
+) -> Annotated[dict, "num_deleted_chunks"]:
+    """
+    Deletes the chunks of edited or removed documents, after the chunks of the run were loaded. Does nothing
+    outside incremental runs or if loading failed, so the current chunks are never missing from the vector DB.
+    """
+
+    if not chunk_index:
+        return {}
+
+    if not successful:
+        logger.warning("Keeping the stale chunks: loading the embedded chunks failed.")
+
+        return {}
+
+    return delete_stale_chunks(EmbeddedChunkIndex.from_state(chunk_index))
+
+
+def chunk_and_embed_documents(
+    cleaned_documents: list,
+    metadata: dict,
+    chunk_index: EmbeddedChunkIndex | None = None,
+) -> list[EmbeddedChunk]:
+    """
+    Chunks the documents, then embeds the chunks of all of them together, in the token-budget batches of the
+    embedding engine. With a `chunk_index`, only the chunks missing from the vector DB are embedded. Adds to the
+    "chunking" and "embedding" entries and to the chunk counters of `metadata`.
+    """
+
+    chunks = []
+    for document in cleaned_documents:
+        document_chunks = ChunkingDispatcher.dispatch(document)
+        metadata["chunking"] = _add_chunks_metadata(document_chunks, metadata["chunking"])
+        chunks.extend(document_chunks)
+    metadata["num_chunks"] = metadata.get("num_chunks", 0) + len(chunks)
+
+    if chunk_index is not None:
+        num_chunks = len(chunks)
+        chunks = chunk_index.select_changed(chunks)
+        metadata["num_unchanged_chunks"] = metadata.get("num_unchanged_chunks", 0) + num_chunks - len(chunks)
+
+    embedded_chunks = EmbeddingDispatcher.dispatch(chunks)
+    metadata["embedding"] = _add_embeddings_metadata(embedded_chunks, metadata["embedding"])
+
     return embedded_chunks
 
 
+def delete_stale_chunks(chunk_index: EmbeddedChunkIndex) -> dict[str, int]:
+    """Deletes the chunks of edited or removed documents and invalidates the cached answers of their authors."""
+
+    num_deleted = chunk_index.delete_stale()
+    if any(num_deleted.values()):
+        invalidate_authors(chunk_index.author_ids)
+
+    return num_deleted
+
+
 def _add_chunks_metadata(chunks: list[Chunk], metadata: dict) -> dict:
     for chunk in chunks:
         category = chunk.get_category()
@@ -0,0 +1,128 @@
+import time
+from typing import Iterator
+
+from loguru import logger
+from typing_extensions import Annotated
+from zenml import get_step_context, step
+
+from application import utils
+from application.preprocessing import EmbeddedChunkIndex, clean_documents_in_shards, create_cleaning_pool
+from domain.cleaned_documents import CleanedDocument
+from domain.documents import Document
+
+from .load_to_vector_db import load_documents
+from .query_data_warehouse import iter_all_data
+from .rag import chunk_and_embed_documents, delete_stale_chunks
+
+
+@step
+def stream_to_vector_db(
+    author_ids: Annotated[list[str], "author_ids"],
+    window_size: int = 64,
+    max_pending_windows: int = 2,
+    cursor_batch_size: int = 100,
+    num_workers: int | None = None,
+    shard_size: int = 32,
+    incremental: bool = False,
+) -> Annotated[dict, "feature_engineering_stats"]:
+    """
+    Cleans, chunks, embeds and loads the documents of the authors `window_size` documents at a time.
+
+    A background thread reads the next windows from the MongoDB cursors while the current one is processed, at
+    most `max_pending_windows` ahead, and each window is dropped once it is loaded. Only counts leave the step,
+    so memory depends on the window size instead of the corpus size.
+
+    With `incremental`, only chunks missing from the vector DB are embedded, and once every window is loaded the
+    stored chunks of the authors that no document produced anymore are deleted.
+    """
+
+    metadata = {
+        "num_windows": 0,
+        "num_documents": 0,
+        "num_cleaned_documents": 0,
+        "num_chunks": 0,
+        "num_embedded_chunks": 0,
+        "num_deleted_chunks": {},
+        "seconds": {"cleaning": 0.0, "chunking_and_embedding": 0.0, "loading": 0.0},
+        "cleaning": {},
+        "chunking": {},
+        "embedding": {},
+        "successful": True,
+    }
+
+    chunk_index = EmbeddedChunkIndex(author_ids=author_ids) if incremental else None
+    # One cleaning pool for the whole stream, created before the reader thread starts.
+    cleaning_pool = create_cleaning_pool(num_workers) if num_workers != 1 else None
+    windows = utils.concurrency.iterate_in_background(
+        utils.misc.batch_iterable(iter_all_data(author_ids, batch_size=cursor_batch_size), window_size),
+        max_pending=max_pending_windows,
+    )
+    try:
+        _process_windows(
+            windows,
+            metadata,
+            cleaning_options={"num_workers": num_workers, "shard_size": shard_size, "executor": cleaning_pool},
+            embedding_options={"chunk_index": chunk_index},
+        )
+    finally:
+        windows.close()
+        if cleaning_pool is not None:
+            cleaning_pool.shutdown()
+
+    # Only after a complete run: a stream stopped early hasn't seen every current chunk.
+    if chunk_index is not None and metadata["successful"]:
+        metadata["num_deleted_chunks"] = delete_stale_chunks(chunk_index)
+
+    metadata["seconds"] = {stage: round(seconds, 3) for stage, seconds in metadata["seconds"].items()}
+
+    step_context = get_step_context()
+    step_context.add_output_metadata(output_name="feature_engineering_stats", metadata=metadata)
+
+    return {key: metadata[key] for key in ("num_documents", "num_embedded_chunks", "successful")}
+
+
+def _process_windows(
+    windows: Iterator[list[Document]], metadata: dict, cleaning_options: dict, embedding_options: dict
+) -> None:
+    for window in windows:
+        metadata["num_windows"] += 1
+        metadata["num_documents"] += len(window)
+
+        start_time = time.perf_counter()
+        cleaned_documents, _ = clean_documents_in_shards(window, **cleaning_options)
+        metadata["cleaning"] = _add_cleaned_metadata(cleaned_documents, metadata["cleaning"])
+        metadata["num_cleaned_documents"] += len(cleaned_documents)
+        metadata["seconds"]["cleaning"] += time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        embedded_chunks = chunk_and_embed_documents(cleaned_documents, metadata, **embedding_options)
+        metadata["num_embedded_chunks"] += len(embedded_chunks)
+        metadata["seconds"]["chunking_and_embedding"] += time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        successful = load_documents(cleaned_documents) and load_documents(embedded_chunks)
+        metadata["seconds"]["loading"] += time.perf_counter() - start_time
+        if not successful:
+            logger.error(f"Stopping the stream after window {metadata['num_windows']}: loading failed.")
+
+            metadata["successful"] = False
+
+            return
+
+        logger.info(
+            f"Window {metadata['num_windows']} loaded: {metadata['num_documents']} documents and "
+            f"{metadata['num_embedded_chunks']} chunks so far."
+        )
+
+
+def _add_cleaned_metadata(cleaned_documents: list[CleanedDocument], metadata: dict) -> dict:
+    for document in cleaned_documents:
+        category = document.get_category()
+        if category not in metadata:
+            metadata[category] = {"num_documents": 0, "authors": list()}
+
+        metadata[category]["num_documents"] += 1
+        if document.author_full_name not in metadata[category]["authors"]:
+            metadata[category]["authors"].append(document.author_full_name)
+
+    return metadata
@@ -0,0 +1,108 @@
+"""
+A local stand-in for the LLM server, to measure the serving path end to end on a laptop.
+
+It serves the TGI routes (`/generate`, `/generate_stream`) and the OpenAI-compatible `/v1/completions` route
+with a deterministic answer, sleeping `--token-latency` seconds per generated word. Point the API at it with:
+
+    LLM_INFERENCE_BACKEND=tgi LLM_HTTP_BASE_URL=http://localhost:8080 python -m tools.ml_service
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator
+
+import click
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from model.inference.fake import generate_fake_tokens
+
+app = FastAPI()
+app.state.token_latency = 0.0
+app.state.answer = None
+
+
+async def agenerate_tokens(inputs: str, max_new_tokens: int | None) -> AsyncIterator[str]:
+    # Sleep on the event loop instead of in the generator, so concurrent requests are served concurrently.
+    for token in generate_fake_tokens(inputs, max_new_tokens=max_new_tokens, answer=app.state.answer):
+        if app.state.token_latency > 0:
+            await asyncio.sleep(app.state.token_latency)
+
+        yield token
+
+
+async def agenerate(inputs: str, max_new_tokens: int | None) -> str:
+    return "".join([token async for token in agenerate_tokens(inputs, max_new_tokens)])
+
+
+@app.post("/generate")
+async def generate(request: Request) -> dict[str, Any]:
+    payload = await request.json()
+    parameters = payload.get("parameters") or {}
+
+    return {"generated_text": await agenerate(payload["inputs"], parameters.get("max_new_tokens"))}
+
+
+@app.post("/generate_stream")
+async def generate_stream(request: Request) -> StreamingResponse:
+    payload = await request.json()
+    parameters = payload.get("parameters") or {}
+
+    async def events() -> AsyncIterator[str]:
+        generated_text = ""
+        i = 0
+        async for token in agenerate_tokens(payload["inputs"], parameters.get("max_new_tokens")):
+            generated_text += token
+            yield f"data:{json.dumps({'token': {'id': i, 'text': token, 'special': False}, 'generated_text': None})}\n\n"
+            i += 1
+
+        yield f"data:{json.dumps({'token': {'id': -1, 'text': '', 'special': True}, 'generated_text': generated_text})}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/v1/completions")
+async def completions(request: Request):
+    payload = await request.json()
+    prompts = payload["prompt"] if isinstance(payload["prompt"], list) else [payload["prompt"]]
+    max_tokens = payload.get("max_tokens")
+    created = int(time.time())
+
+    if payload.get("stream"):
+
+        async def events() -> AsyncIterator[str]:
+            async for token in agenerate_tokens(prompts[0], max_tokens):
+                chunk = {"object": "text_completion", "created": created, "choices": [{"index": 0, "text": token}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    texts = await asyncio.gather(*[agenerate(prompt, max_tokens) for prompt in prompts])
+
+    return {
+        "object": "text_completion",
+        "created": created,
+        "model": payload.get("model"),
+        "choices": [{"index": i, "text": text, "finish_reason": "length"} for i, text in enumerate(texts)],
+    }
+
+
+@click.command(help="Serve a fake TGI / OpenAI-compatible LLM for local load tests.")
+@click.option("--host", default="0.0.0.0", help="Interface to bind.")
+@click.option("--port", default=8080, type=int, help="Port to listen on.")
+@click.option("--token-latency", default=0.02, type=float, help="Seconds spent generating each word.")
+@click.option("--answer", default=None, type=str, help="Fixed answer to return instead of the default one.")
+def main(host: str, port: int, token_latency: float, answer: str | None) -> None:
+    import uvicorn
+
+    app.state.token_latency = token_latency
+    app.state.answer = answer
+
+    uvicorn.run(app, host=host, port=port)
+
+
+if __name__ == "__main__":
+    main()
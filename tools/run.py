@@ -40,6 +40,10 @@ from pipelines.feature_engineering import feature_engineering
             # Run only the ETL pipeline
             python run.py --only-etl
 
+            \b
+            # Run the feature engineering pipeline in windows, with flat memory
+            python run.py --run-feature-engineering --feature-engineering-streaming
+
     """
 )
 @click.option(
@@ -65,11 +69,18 @@ from pipelines.feature_engineering import feature_engineering
     default=False,
     help="Whether to run the FE pipeline.",
 )
+@click.option(
+    "--feature-engineering-streaming",
+    is_flag=True,
+    default=False,
+    help="Run the FE pipeline in streaming mode, with the streaming config file.",
+)
 def main(
     no_cache: bool = False,
     run_etl: bool = False,
     etl_config_filename: str = "digital_data_etl.yaml",
     run_feature_engineering: bool = False,
+    feature_engineering_streaming: bool = False,
     run_evaluation: bool = False,
 ) -> None:
     assert (
@@ -100,7 +111,10 @@ def main(
 
     if run_feature_engineering:
         run_args_fe = {}
-        pipeline_args["config_path"] = root_dir / "configs" / "feature_engineering.yaml"
+        fe_config_filename = (
+            "feature_engineering_streaming.yaml" if feature_engineering_streaming else "feature_engineering.yaml"
+        )
+        pipeline_args["config_path"] = root_dir / "configs" / fe_config_filename
         pipeline_args["run_name"] = (
             f"feature_engineering_run_{dt.now().strftime('%Y_%m_%d_%H_%M_%S')}"
         )
@@ -1,3 +1,5 @@
+import json
+
 import streamlit as st
 import requests
 
@@ -14,24 +16,43 @@ st.markdown(
 # Query input
 query = st.text_area("Enter your query:", height=150, placeholder="E.g., How does LoRA work?")
 
+
+
+def stream_answer(response: requests.Response):
+    """Yield the answer tokens from the server-sent events of the /rag/stream endpoint."""
+
+    event = None
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("event:"):
+            event = line[len("event:") :].strip()
+        elif line.startswith("data:"):
+            data = json.loads(line[len("data:") :])
+            if event == "token":
+                yield data["text"]
+            elif event == "error":
+                raise RuntimeError(data.get("detail", "Unknown error"))
+
+
 # Generate button
 if st.button("Generate Answer"):
     if not query.strip():
         st.warning("⚠️ Please enter a valid query.")
     else:
-        with st.spinner("🧠 Thinking..."):
+        with st.spinner("🧠 Retrieving context..."):
             try:
                 response = requests.post(
-                    "http://localhost:8000/rag",  # Replace with correct IP if not localhost
+                    "http://localhost:8000/rag/stream",  # Replace with correct IP if not localhost
                     json={"query": query},
-                    timeout=60,
+                    stream=True,
+                    timeout=(10, 60),  # (connect, time between two streamed chunks)
                 )
                 response.raise_for_status()
-                result = response.json()
-                answer = result.get("answer", "⚠️ No answer returned.")
-
-                st.success("Generated Answer:")
-                st.text_area("Response:", value=answer.strip(), height=300, disabled=True)
-
             except requests.exceptions.RequestException as e:
                 st.error(f"❌ Failed to get response from backend:\n`{e}`")
+                st.stop()
+
+        st.success("Generated Answer:")
+        try:
+            st.write_stream(stream_answer(response))
+        except (requests.exceptions.RequestException, RuntimeError) as e:
+            st.error(f"❌ The answer stream was interrupted:\n`{e}`")